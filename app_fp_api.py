@@ -1,35 +1,46 @@
 import flet as ft
 from flet_webview import WebView
+import numpy as np
 import pandas as pd
 import webbrowser
 import hashlib
 from flet import Container, Text, Column, Row 
 import os
 import sys
+import time
 import boto3
+from fp_snapshot import load_snapshot, save_snapshot
+from fp_geocode import geocode_offers
+from fp_fixedwidth import iter_offer_chunks
+from fp_encoding import read_csv_sniffed
+from fp_categorical import encode_categoricals, memory_mb, print_memory_report
+from fp_reload import DEFAULT_POLL_INTERVAL, DatasetStore, SourceWatcher
+from fp_loader import BackgroundLoader
+from fp_filter import FacetLabels, format_count
+from fp_query import RESULT_CACHE_SIZE, QueryIndexes, QueryResult, query_signature
+from fp_search import normalize_text
+from fp_sort import SORT_CYCLE, SORT_DISTANCE, SORT_LOCALITY, SORT_UNITS
+from fp_worker import DEBOUNCE_S, ChunkSizer, QueryRunner, get_stream_executor
+from fp_cache import LRUCache
+from fp_match import CenterMatcher, load_overrides
+from fp_catalog import CenterCatalog
 
 # ----------------------------------------------------------------------
 # 1. CÀRREGA I PREPROCESSAMENT DE DADES DE FP 
 # ----------------------------------------------------------------------
 
 # Noms d'arxius
-FP_FILE = "oferta_fp_25_26.csv"
-ESP_FILE = "oferta_fp_especialitzacio.csv" 
-CENTER_COORDS_FILE = "a.csv" # <--- Arxiu amb coordenades reals
+FP_FILE = "grado.csv.txt" # Exportació del PDF en columnes (també accepta el CSV de convertiracsv.py)
+ESP_FILE = "especializacion.txt"
+CENTER_COORDS_FILE = "a.csv" # <--- Arxiu amb coordenades reals (també accepta 12_Centros.gpkg)
+CENTER_OVERRIDES_FILE = "center_overrides.csv" # Excepcions de la coincidència aproximada de centres
+SOURCE_FILES = [FP_FILE, ESP_FILE, CENTER_COORDS_FILE, CENTER_OVERRIDES_FILE]
+SNAPSHOT_NAME = "app_fp_api" # Instantània Parquet dels DataFrames ja netejats
 
 # Columnes finals esperades (9 elements)
 FP_COLS = ['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'RÉGIMEN', 'GRADO', 'FAMILIA', 'CICLO', 'TURNO', 'UNIDADES']
 CANONICAL_GRADES = ['BÁSICO', 'BÁSICO 2A OPORTUNIDAD', 'MEDIO', 'SUPERIOR']
 
-# --- MAPA DE COLUMNES DE L'ARXIU DE COORDENADES (a.csv) ---
-COORDS_COLUMNS = {
-    'dlibre': 'CENTRO_NAME',
-    'noms_mun': 'LOCALIDAD_NAME',
-    'provincia': 'PROVINCIA_NAME',
-    'latitud': 'LATITUD',
-    'longitud': 'LONGITUD',
-}
-
 # --- MAPA DE ESTANDARITZACIÓ DE PROVÍNCIES ---
 PROVINCE_MAP = {
     'ALACANT': 'ALACANT',
@@ -51,60 +62,38 @@ PROVINCE_CENTER_COORDS = {
     'CASTELLÓ': {'lat': 39.9871, 'lon': -0.0381, 'delta_lat': 0.15, 'delta_lon': 0.2},
 }
 
-# Diccionari per guardar coordenades consistents per a cada centre
+# Diccionari per guardar les coordenades simulades ja calculades per a cada centre
 coords_cache = {}
 comarca_map = {}
+# Catàleg de centres (a.csv) i la seua vista de coordenades reals indexada per clau
+center_catalog = CenterCatalog.empty(PROVINCE_MAP)
+coords_catalog = center_catalog.coords
+# Coincidència aproximada per als centres sense clau exacta al catàleg
+center_matcher = None
+
 def load_center_coordinates(file_path):
     """
-    Carrega el catàleg de centres (a.csv) i crea un diccionari de recerca de coordenades.
+    Carrega el catàleg de centres (a.csv) en una sola passada (només les columnes necessàries).
+    La taula de coordenades reals (coords_catalog) és una vista d'aquest catàleg.
     """
-    global coords_cache
+    global center_catalog, coords_catalog, coords_cache, center_matcher
     if not os.path.exists(file_path):
         print(f"⚠️ NO es pot carregar '{file_path}'. Utilitzant simulació de coordenades.")
         return
 
     try:
-        # Intentar UTF-8 i després ISO-8859-1 (latin1)
-        try:
-            df_coords = pd.read_csv(file_path, encoding='utf-8', on_bad_lines='warn')
-        except UnicodeDecodeError:
-            df_coords = pd.read_csv(file_path, encoding='latin1', on_bad_lines='warn')
-
-        # Assegurar-se que les columnes clau existeixen
-        required_cols = list(COORDS_COLUMNS.keys())
-        if not all(col in df_coords.columns for col in required_cols):
-             print(f"❌ Error: El fitxer '{file_path}' no té totes les columnes esperades: {required_cols}.")
-             return
-
-        # Renombrar i netejar
-        df_coords = df_coords.rename(columns=COORDS_COLUMNS)
-        
-        # Neteja i estandardització
-        for col in ['CENTRO_NAME', 'LOCALIDAD_NAME', 'PROVINCIA_NAME']:
-            df_coords[col] = df_coords[col].astype(str).str.strip().str.upper()
-        
-        df_coords['PROVINCIA_NAME'] = df_coords['PROVINCIA_NAME'].apply(lambda x: PROVINCE_MAP.get(x, x))
-
-        # Convertir coordenades a numèric
-        df_coords['LATITUD'] = pd.to_numeric(df_coords['LATITUD'], errors='coerce')
-        df_coords['LONGITUD'] = pd.to_numeric(df_coords['LONGITUD'], errors='coerce')
-        
-        # Filtrar files sense coordenades vàlides
-        df_coords = df_coords.dropna(subset=['LATITUD', 'LONGITUD'])
-        
-        # Crear la clau de recerca: CENTRE + LOCALITAT + PROVINCIA
-        df_coords['KEY'] = df_coords['PROVINCIA_NAME'] + "_" + df_coords['LOCALIDAD_NAME'] + "_" + df_coords['CENTRO_NAME']
-
-        # Omplir la caché de coordenades
-        for index, row in df_coords.iterrows():
-            if row['KEY'] not in coords_cache:
-                coords_cache[row['KEY']] = {'latitud': row['LATITUD'], 'longitud': row['LONGITUD']}
-        
-        print(f"✅ Coordenades de {len(coords_cache)} centres carregades de '{file_path}'.")
+        center_catalog = CenterCatalog.from_file(file_path, PROVINCE_MAP)
+        coords_catalog = center_catalog.coords
+        print(f"✅ Coordenades de {len(coords_catalog)} centres carregades de '{file_path}'.")
+        center_matcher = CenterMatcher(center_catalog.frame, load_overrides(CENTER_OVERRIDES_FILE))
+        center_catalog.spatial  # índex espacial dels centres, construït ara i no a la primera consulta
 
     except Exception as e:
         print(f"❌ Error crític en processar les coordenades de '{file_path}': {e}")
         coords_cache = {}
+        center_catalog = CenterCatalog.empty(PROVINCE_MAP)
+        coords_catalog = center_catalog.coords
+        center_matcher = None
 
 
 def get_consistent_coords(row):
@@ -116,7 +105,11 @@ def get_consistent_coords(row):
     # Crear la clau de recerca amb les dades de l'oferta de FP
     key = f"{row['PROVINCIA']}_{row['LOCALIDAD']}_{row['CENTRO']}"
     
-    # 1. Intentar trobar a la caché REAL 
+    # 1. Intentar trobar al catàleg REAL (vista de center_catalog)
+    if key in coords_catalog.index:
+        return coords_catalog.loc[key]
+
+    # Coordenades simulades ja calculades
     if key in coords_cache:
         return pd.Series(coords_cache[key])
     
@@ -173,96 +166,177 @@ def standardize_esp_grade(g_upper):
     return 'ESPECIALIZACIÓN'
 
 
-def load_and_clean_data():
-    """Càrrega i neteja els dos arxius CSV, retornant un dict de DataFrames amb coordenades (reals + simulades)."""
-    data_frames = {}
-    
-    # Funció auxiliar per llegir i estandarditzar CSV d'oferta
-    def safe_read_csv(file, skip_rows_func, cols):
-        try:
-            try:
-                df = pd.read_csv(file, header=None, skiprows=skip_rows_func, encoding='utf-8', on_bad_lines='warn')
-            except UnicodeDecodeError:
-                df = pd.read_csv(file, header=None, skiprows=skip_rows_func, encoding='latin1', on_bad_lines='warn')
+# Funció auxiliar per llegir i estandarditzar CSV d'oferta
+def safe_read_csv(file, skip_rows_func, cols):
+    try:
+        # Codificació detectada amb una mostra dels primers bytes: una sola lectura
+        df = read_csv_sniffed(file, header=None, skiprows=skip_rows_func, on_bad_lines='warn')
 
-            if df.shape[1] < len(cols) - 1:
-                raise ValueError(f"L'arxiu {file} té massa poques columnes.")
+        if df.shape[1] < len(cols) - 1:
+            raise ValueError(f"L'arxiu {file} té massa poques columnes.")
 
-            if len(cols) == 9 and df.shape[1] >= 8:
-                temp_cols_map = ['PROVINCIA', 'LOCALIDAD', 'CENTRO_REGIMEN', 'GRADO_RAW', 'FAMILIA', 'CICLO', 'TURNO', 'UNIDADES']
-                
-                # Si hi ha més de 8 columnes, usem les 9 esperades, si no, assumim que CENTRE/RÉGIMEN estan junts
-                if df.shape[1] >= 9:
-                    df = df.iloc[:, :9].copy()
-                    df.columns = cols
-                else:
-                    df = df.iloc[:, :8].copy()
-                    df.columns = temp_cols_map
-                    
-                    df['RÉGIMEN'] = df['CENTRO_REGIMEN'].astype(str).str.split().str[-1].str.upper()
-                    df['CENTRO'] = df['CENTRO_REGIMEN'].astype(str).apply(lambda x: ' '.join(x.split()[:-1]))
-                    df.drop(columns=['CENTRO_REGIMEN'], inplace=True)
-                    df = df[['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'RÉGIMEN', 'GRADO_RAW', 'FAMILIA', 'CICLO', 'TURNO', 'UNIDADES']].copy()
-                    df.columns = cols
-                
-                return df
+        if len(cols) == 9 and df.shape[1] >= 8:
+            temp_cols_map = ['PROVINCIA', 'LOCALIDAD', 'CENTRO_REGIMEN', 'GRADO_RAW', 'FAMILIA', 'CICLO', 'TURNO', 'UNIDADES']
+            
+            # Si hi ha més de 8 columnes, usem les 9 esperades, si no, assumim que CENTRE/RÉGIMEN estan junts
+            if df.shape[1] >= 9:
+                df = df.iloc[:, :9].copy()
+                df.columns = cols
             else:
-                raise ValueError(f"L'estructura de columnes de {file} no es correspon amb l'esperada.")
+                df = df.iloc[:, :8].copy()
+                df.columns = temp_cols_map
                 
-        except Exception as e:
-            raise Exception(f"Error en llegir {file}: {e}")
+                df['RÉGIMEN'] = df['CENTRO_REGIMEN'].astype(str).str.split().str[-1].str.upper()
+                df['CENTRO'] = df['CENTRO_REGIMEN'].astype(str).apply(lambda x: ' '.join(x.split()[:-1]))
+                df.drop(columns=['CENTRO_REGIMEN'], inplace=True)
+                df = df[['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'RÉGIMEN', 'GRADO_RAW', 'FAMILIA', 'CICLO', 'TURNO', 'UNIDADES']].copy()
+                df.columns = cols
+            
+            return df
+        else:
+            raise ValueError(f"L'estructura de columnes de {file} no es correspon amb l'esperada.")
+            
+    except Exception as e:
+        raise Exception(f"Error en llegir {file}: {e}")
 
-    # 0. Carregar el diccionari de coordenades reals
-    load_center_coordinates(CENTER_COORDS_FILE)
 
-    # --- Processar oferta_fp_25_26.csv (FP Standard) ---
+def read_offer_chunks(file, skip_rows_func, cols):
+    """
+    Blocs de l'oferta amb les columnes `cols`: l'exportació del PDF en columnes (.txt) es llegeix
+    en streaming amb fp_fixedwidth, sense CSV intermedi; un CSV (convertiracsv.py), d'una vegada.
+    """
+    if not file.endswith('.txt'):
+        yield safe_read_csv(file, skip_rows_func, cols)
+        return
     try:
-        df_fp = safe_read_csv(FP_FILE, lambda x: x < 4, FP_COLS)
-        
-        # Neteja i estandardització
-        for col in ['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'RÉGIMEN', 'FAMILIA', 'CICLO', 'TURNO']:
-             df_fp[col] = df_fp[col].astype(str).str.strip().str.upper().replace('NAN', '', regex=False)
-             
-        df_fp['PROVINCIA'] = df_fp['PROVINCIA'].apply(lambda x: PROVINCE_MAP.get(x, x))
-        df_fp['GRADO'] = df_fp['GRADO'].astype(str).apply(standardize_grade)
-        
-        df_fp = df_fp[df_fp['GRADO'].isin(CANONICAL_GRADES)].copy()
-        
-        df_fp['UNIDADES'] = pd.to_numeric(df_fp['UNIDADES'], errors='coerce').fillna(0).astype(int)
+        yield from iter_offer_chunks(file)
+    except Exception as e:
+        raise Exception(f"Error en llegir {file}: {e}")
+
+
+def clean_fp_standard(df_fp):
+    """Neteja i estandardització d'un bloc de l'oferta estàndard (només els graus canònics)."""
+    for col in ['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'RÉGIMEN', 'FAMILIA', 'CICLO', 'TURNO']:
+         df_fp[col] = df_fp[col].astype(str).str.strip().str.upper().replace('NAN', '', regex=False)
+         
+    df_fp['PROVINCIA'] = df_fp['PROVINCIA'].apply(lambda x: PROVINCE_MAP.get(x, x))
+    df_fp['GRADO'] = df_fp['GRADO'].astype(str).apply(standardize_grade)
+    
+    df_fp = df_fp[df_fp['GRADO'].isin(CANONICAL_GRADES)].copy()
+    
+    df_fp['UNIDADES'] = pd.to_numeric(df_fp['UNIDADES'], errors='coerce').fillna(0).astype(int)
+    return df_fp
+
+
+def clean_fp_especializacion(df_esp):
+    """Neteja i estandardització d'un bloc de l'oferta d'especialització (només mitjà i superior)."""
+    for col in ['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'RÉGIMEN', 'FAMILIA', 'CICLO', 'TURNO']:
+         df_esp[col] = df_esp[col].astype(str).str.strip().str.upper().replace('NAN', '', regex=False)
+
+    df_esp['PROVINCIA'] = df_esp['PROVINCIA'].apply(lambda x: PROVINCE_MAP.get(x, x))
+    df_esp['GRADO'] = df_esp['GRADO'].astype(str).apply(standardize_esp_grade)
+    
+    df_esp['UNIDADES'] = pd.to_numeric(df_esp['UNIDADES'], errors='coerce').fillna(0).astype(int)
+    
+    return df_esp[df_esp['GRADO'] != 'ESPECIALIZACIÓN'].copy()
+
+
+def load_fp_standard():
+    """Llegeix, neteja i geocodifica l'oferta estàndard. Retorna (DataFrame, correcte)."""
+    # --- Processar grado.csv.txt (FP Standard) ---
+    try:
+        # Cada bloc es neteja en arribar: el text en brut de tota l'exportació no s'acumula
+        chunks = read_offer_chunks(FP_FILE, lambda x: x < 4, FP_COLS)
+        df_fp = pd.concat([clean_fp_standard(chunk) for chunk in chunks], ignore_index=True)
 
         # Aplicar coordenades (busca real, si no, simula)
-        df_fp[['latitud', 'longitud']] = df_fp.apply(get_consistent_coords, axis=1)
+        df_fp[['latitud', 'longitud']] = geocode_offers(df_fp, coords_catalog, PROVINCE_CENTER_COORDS, center_matcher)
         
-        data_frames['FP_STANDARD'] = df_fp
         print(f"✅ Carregat {FP_FILE} amb {len(df_fp)} registres.")
+        return df_fp, True
     except Exception as e:
         print(f"❌ Error en carregar {FP_FILE}: {e}")
-        data_frames['FP_STANDARD'] = pd.DataFrame(columns=FP_COLS + ['latitud', 'longitud'])
+        return pd.DataFrame(columns=FP_COLS + ['latitud', 'longitud']), False
 
 
-    # --- Processar oferta_fp_especialitzacio.csv (Especialització) ---
+def load_fp_especializacion():
+    """Llegeix, neteja i geocodifica l'oferta d'especialització. Retorna (DataFrame, correcte)."""
+    # --- Processar especializacion.txt (Especialització) ---
     try:
-        df_esp = safe_read_csv(ESP_FILE, lambda x: x < 3, FP_COLS)
-        
-        # Neteja i estandardització
-        for col in ['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'RÉGIMEN', 'FAMILIA', 'CICLO', 'TURNO']:
-             df_esp[col] = df_esp[col].astype(str).str.strip().str.upper().replace('NAN', '', regex=False)
-
-        df_esp['PROVINCIA'] = df_esp['PROVINCIA'].apply(lambda x: PROVINCE_MAP.get(x, x))
-        df_esp['GRADO'] = df_esp['GRADO'].astype(str).apply(standardize_esp_grade)
-        
-        df_esp['UNIDADES'] = pd.to_numeric(df_esp['UNIDADES'], errors='coerce').fillna(0).astype(int)
-        
-        df_esp = df_esp[df_esp['GRADO'] != 'ESPECIALIZACIÓN'].copy()
+        chunks = read_offer_chunks(ESP_FILE, lambda x: x < 3, FP_COLS)
+        df_esp = pd.concat([clean_fp_especializacion(chunk) for chunk in chunks], ignore_index=True)
         
         # Aplicar coordenades (busca real, si no, simula)
-        df_esp[['latitud', 'longitud']] = df_esp.apply(get_consistent_coords, axis=1)
+        df_esp[['latitud', 'longitud']] = geocode_offers(df_esp, coords_catalog, PROVINCE_CENTER_COORDS, center_matcher)
 
-        data_frames['FP_ESPECIALIZACION'] = df_esp
         print(f"✅ Carregat {ESP_FILE} amb {len(df_esp)} registres.")
+        return df_esp, True
     except Exception as e:
         print(f"❌ Error en carregar {ESP_FILE}: {e}")
-        data_frames['FP_ESPECIALIZACION'] = pd.DataFrame(columns=FP_COLS + ['latitud', 'longitud'])
+        return pd.DataFrame(columns=FP_COLS + ['latitud', 'longitud']), False
+
+
+def _no_progress(stage, fraction):
+    pass
+
+
+def build_data_frames(previous=None, changed_files=None, progress=_no_progress):
+    """
+    Construeix el dict de DataFrames d'oferta. Retorna (data_frames, load_errors).
+    En una recàrrega en calent (`previous` + `changed_files`) només es tornen a calcular
+    els conjunts afectats: un canvi al catàleg de centres (o a les seues excepcions) afecta tots dos.
+    `progress(etapa, fracció)` rep l'etapa en curs (per a la barra de progrés de la càrrega inicial).
+    """
+    changed_files = set(changed_files or [])
+    catalog_changed = previous is None or bool({CENTER_COORDS_FILE, CENTER_OVERRIDES_FILE} & changed_files)
+
+    # 0. Carregar el catàleg de centres (una sola lectura d'a.csv). També cal
+    # si les dades anteriors venien d'una instantània i encara no s'havia llegit.
+    if catalog_changed or len(center_catalog) == 0:
+        progress("Llegint el catàleg de centres", 0.1)
+        load_center_coordinates(CENTER_COORDS_FILE)
+
+    data_frames = {}
+    load_errors = previous is not None and len(center_catalog) == 0
+
+    for key, source, loader, fraction in (('FP_STANDARD', FP_FILE, load_fp_standard, 0.3),
+                                          ('FP_ESPECIALIZACION', ESP_FILE, load_fp_especializacion, 0.6)):
+        if catalog_changed or source in changed_files:
+            progress(f"Carregant i geocodificant {source}", fraction)
+            data_frames[key], loaded = loader()
+            load_errors = load_errors or not loaded
+        else:
+            data_frames[key] = previous[key]
+
+    # Columnes de text com a categòriques amb categories compartides entre els dos conjunts
+    progress("Codificant columnes categòriques", 0.85)
+    memory_before = memory_mb(data_frames)
+    data_frames = encode_categoricals(data_frames)
+    print("✅ Columnes categòriques codificades:")
+    print_memory_report(memory_before, memory_mb(data_frames))
+
+    return data_frames, load_errors
+
+
+def load_and_clean_data(use_snapshot=True, progress=_no_progress):
+    """
+    Càrrega i neteja els dos arxius CSV, retornant un dict de DataFrames amb coordenades (reals + simulades).
+    Si hi ha una instantània vàlida (mateixos arxius d'origen) es carrega directament d'ella.
+    """
+    snapshot_sources = SOURCE_FILES
+    if use_snapshot:
+        progress("Comprovant la instantània de dades", 0.05)
+        data_frames = load_snapshot(SNAPSHOT_NAME, snapshot_sources)
+        if data_frames is not None:
+            print(f"✅ Dades carregades de la instantània '{SNAPSHOT_NAME}' ({len(data_frames['FP_STANDARD'])} + {len(data_frames['FP_ESPECIALIZACION'])} registres).")
+            return data_frames
+
+    data_frames, load_errors = build_data_frames(progress=progress)
+
+    # Guardar la instantània només si tot s'ha carregat correctament
+    if use_snapshot and not load_errors:
+        progress("Guardant la instantània de dades", 0.95)
+        save_snapshot(SNAPSHOT_NAME, snapshot_sources, data_frames)
 
     return data_frames
 
@@ -270,10 +344,78 @@ def get_clean_sorted_list(series):
     """Filtra NaNs, converteix a string i ordena la llista de valors únics."""
     return sorted(series.dropna().astype(str).str.strip().unique().tolist())
 
-# Càrrega global de dades
-data_dict = load_and_clean_data()
-fp_standard_df = data_dict['FP_STANDARD']
-fp_esp_df = data_dict['FP_ESPECIALIZACION']
+# Dades globals: es carreguen en segon pla (no en importar el mòdul) la primera vegada que cal
+data_dict = None
+fp_standard_df = None
+fp_esp_df = None
+
+# Conjunt de dades compartit per les sessions (es pot substituir amb una recàrrega en calent)
+data_store = DatasetStore(None)
+
+# Llistes d'opcions dels desplegables en cascada per estat dels filtres de dalt, compartides
+# per totes les sessions i pestanyes. Es buida a cada recàrrega.
+OPTION_CACHE_SIZE = 512
+option_cache = LRUCache(OPTION_CACHE_SIZE)
+OPTION_CONTROLS_CACHE_SIZE = 64
+
+# Resultats de consulta (files, totals, ordre i mapa) per signatura normalitzada, compartits per
+# totes les sessions i pestanyes. La signatura inclou el conjunt de dades; també es buida a cada recàrrega.
+result_cache = LRUCache(RESULT_CACHE_SIZE)
+
+
+def _load_initial_data(progress):
+    """Càrrega inicial (des del fil de data_loader): publica les dades a data_store en acabar."""
+    global data_dict, fp_standard_df, fp_esp_df
+    data_frames = load_and_clean_data(progress=progress)
+    data_dict = data_frames
+    fp_standard_df = data_frames['FP_STANDARD']
+    fp_esp_df = data_frames['FP_ESPECIALIZACION']
+    data_store.swap(data_frames)
+    return data_frames
+
+
+data_loader = BackgroundLoader(_load_initial_data)
+
+
+def reload_changed_sources(changed_files):
+    """
+    Recàrrega en calent (des del fil del vigilant): reconstrueix només els conjunts afectats
+    pels arxius canviats i publica el resultat d'una sola vegada. Si falla, es manté l'anterior.
+    """
+    global data_dict, fp_standard_df, fp_esp_df
+    print(f"🔄 Canvis detectats a {', '.join(sorted(changed_files))}. Recarregant dades...")
+
+    new_data, load_errors = build_data_frames(previous=data_store.data, changed_files=changed_files)
+    if load_errors:
+        print("⚠️ La recàrrega no s'ha completat; es mantenen les dades anteriors.")
+        return
+
+    save_snapshot(SNAPSHOT_NAME, SOURCE_FILES, new_data)
+    data_dict = new_data
+    fp_standard_df = new_data['FP_STANDARD']
+    fp_esp_df = new_data['FP_ESPECIALIZACION']
+    option_cache.clear()
+    stats = result_cache.stats()
+    print(f"📊 Memòria cau de resultats: {stats['hits']} encerts, {stats['misses']} errades "
+          f"({stats['hit_rate']:.0%}), {stats['entries']} entrades.")
+    result_cache.clear()
+    data_store.swap(new_data)
+    print(f"✅ Dades recarregades (versió {data_store.version}): {len(fp_standard_df)} + {len(fp_esp_df)} registres.")
+
+
+def start_data_watcher(interval=DEFAULT_POLL_INTERVAL):
+    """
+    Arranca el vigilant dels arxius d'oferta, especialització i catàleg de centres quan
+    acaba la càrrega inicial (les recàrregues parteixen d'aquelles dades).
+    """
+    def start_when_loaded(loader):
+        if not loader.done or loader.error is not None:
+            return
+        watcher = SourceWatcher(SOURCE_FILES, reload_changed_sources, interval)
+        watcher.start()
+        print(f"👀 Vigilant canvis a {', '.join(SOURCE_FILES)} (cada {interval:g} s).")
+
+    data_loader.subscribe(start_when_loaded)
 
 
 # ----------------------------------------------------------------------
@@ -353,24 +495,230 @@ def get_regime_style(regime: str):
     else:
         return ft.Colors.GREY_700, ft.Colors.with_opacity(0.1, ft.Colors.GREY_700), ft.Icons.APARTMENT
 
+class IsolatedCard(ft.Card):
+    """
+    Card que Flet no recorre quan actualitza el control pare: una actualització de la llista
+    (o de la pàgina) no passa per cada Text de cada targeta. Els canvis de dins de la targeta
+    s'envien actualitzant-la a ella (page.update(card)).
+    """
+
+    def is_isolated(self):
+        return True
+
+class OfferCard:
+    """
+    Targeta d'oferta reutilitzable. Els controls es creen una sola vegada i `bind` hi escriu
+    les dades d'una altra oferta: en canviar els filtres les mateixes targetes es tornen a
+    mostrar i Flet només envia al navegador les propietats que han canviat. `control` és
+    una IsolatedCard: qui canvie la targeta l'ha d'actualitzar explícitament.
+    """
+
+    def __init__(self, tab: "TabContent"):
+        self.tab = tab
+        self.offer_data = None
+        self.index = None
+
+        self.cycle_text = ft.Text(weight=ft.FontWeight.BOLD, size=15, color=ft.Colors.BLUE_GREY_900, expand=True)
+        self.grade_text = ft.Text(size=11, weight=ft.FontWeight.BOLD)
+        self.grade_badge = ft.Container(
+            content=self.grade_text,
+            border_radius=8,
+            padding=ft.padding.symmetric(horizontal=10, vertical=4)
+        )
+        self.regime_icon = ft.Icon(ft.Icons.SCHOOL, size=16)
+        self.center_text = ft.Text(size=13, color=ft.Colors.GREY_800, weight=ft.FontWeight.W_600, expand=True)
+        self.place_text = ft.Text(size=12, color=ft.Colors.GREY_700)
+        # Distància al punt del mode "a prop de" (amagada si no està actiu)
+        self.distance_text = ft.Text(size=12, color=ft.Colors.TEAL_700, weight=ft.FontWeight.BOLD, visible=False)
+        self.family_text = ft.Text(size=12, color=ft.Colors.GREY_700)
+        self.turno_text = ft.Text(size=12, color=ft.Colors.GREY_700)
+        self.units_text = ft.Text(size=12, color=ft.Colors.GREY_700, weight=ft.FontWeight.BOLD)
+
+        self.body = ft.Container(
+            padding=15,
+            bgcolor=ft.Colors.WHITE,
+            border_radius=8,
+            on_click=self.on_click,
+            content=ft.Column([
+                ft.Row([self.cycle_text, self.grade_badge], spacing=10),
+                
+                ft.Divider(height=5, color=ft.Colors.GREY_200),
+                
+                ft.Row([
+                    self.regime_icon,
+                    self.center_text,
+                    ft.Icon(ft.Icons.LOCATION_ON_OUTLINED, size=14, color=ft.Colors.GREY_600),
+                    self.place_text,
+                    self.distance_text,
+                ], spacing=8),
+
+                ft.Row([
+                    ft.Icon(ft.Icons.CATEGORY_OUTLINED, size=16, color=ft.Colors.INDIGO_600),
+                    self.family_text,
+                    ft.Container(expand=True),
+                    ft.Icon(ft.Icons.ACCESS_TIME, size=16, color=ft.Colors.AMBER_700),
+                    self.turno_text,
+                    ft.Container(width=10),
+                    ft.Icon(ft.Icons.GROUP, size=16, color=ft.Colors.GREEN_700),
+                    self.units_text,
+                    ft.Container(width=10),
+                    
+                    ft.TextButton(
+                        "Veure ubicació (GMaps)",
+                        icon=ft.Icons.MAP_OUTLINED,
+                        on_click=self.open_map_external,
+                        style=ft.ButtonStyle(color=ft.Colors.BLUE_500, padding=0)
+                    )
+                ], spacing=5),
+            ], spacing=8)
+        )
+        self.control = IsolatedCard(elevation=2, content=self.body)
+
+    def bind(self, offer_data: pd.Series, index: int):
+        """Escriu a la targeta les dades de l'oferta de la posició `index` de la llista i la desselecciona."""
+        self.offer_data = offer_data
+        self.index = index
+        regime_color, bg_color, icon = get_regime_style(offer_data['RÉGIMEN'])
+
+        grado_text = offer_data.get('GRADO', 'N/A').upper() 
+        ciclo_text = offer_data.get('CICLO', 'N/A').upper()
+        is_esp_course = 'CURSO' in ciclo_text
+
+        self.cycle_text.value = ciclo_text
+        self.grade_text.value = f"C. ESP. ({grado_text})" if is_esp_course else grado_text
+        self.grade_text.color = regime_color
+        self.grade_badge.bgcolor = bg_color
+        self.regime_icon.name = icon
+        self.regime_icon.color = regime_color
+        self.center_text.value = offer_data['CENTRO']
+        self.place_text.value = f"{offer_data['LOCALIDAD']} ({offer_data['PROVINCIA']})"
+        distance_km = offer_data.get('DISTANCIA_KM')
+        self.distance_text.visible = distance_km is not None and not pd.isna(distance_km)
+        self.distance_text.value = f"📏 {distance_km:.1f} km".replace(".", ",") if self.distance_text.visible else ""
+        self.family_text.value = f"Família: {offer_data['FAMILIA']}"
+        self.turno_text.value = f"Torn: {offer_data['TURNO']}"
+        self.units_text.value = f"Unitats: {offer_data['UNIDADES']}"
+        self.set_selected(False)
+
+    def set_selected(self, selected: bool):
+        """Ressalta (o no) la targeta seleccionada."""
+        self.body.bgcolor = ft.Colors.BLUE_50 if selected else ft.Colors.WHITE
+        self.body.border = ft.border.all(2, ft.Colors.BLUE_500) if selected else None
+        self.control.elevation = 5 if selected else 2
+
+    def on_click(self, e):
+        """Quan es fa clic a la targeta, es selecciona i es centra el mapa."""
+        self.tab.select_card(self)
+
+    def open_map_external(self, e):
+        """Obre el centre a Google Maps."""
+        search_query = f"{self.offer_data['CENTRO']}, {self.offer_data['LOCALIDAD']}, {self.offer_data['PROVINCIA']}"
+        map_url = f"https://www.google.com/maps/search/?api=1&query={search_query.replace(' ', '+')}" 
+        try:
+            webbrowser.open(map_url)
+        except Exception as ex:
+            print(f"Error obrint el mapa: {ex}")
+
 class TabContent:
     """Classe que encapsula el contingut d'una pestanya."""
+    # Desplegable i opció "totes" de cada columna filtrable
+    FILTER_DROPDOWNS = {
+        'PROVINCIA': ('province_dropdown', "TOTES LES PROVÍNCIES"),
+        'GRADO': ('grade_dropdown', "TOTS ELS GRAUS"),
+        'CICLO': ('cycle_dropdown', "TOTS ELS CICLES/CURSOS"),
+        'TURNO': ('turno_dropdown', "TOTS ELS TORNS"),
+    }
+    # Radis (km) del filtre de distància al centre de referència
+    NO_RADIUS = "SENSE LÍMIT"
+    RADIUS_OPTIONS_KM = [5, 10, 25, 50]
+    # Mode "a prop de": els NEAREST_K centres més propers al centre seleccionat o a una localitat
+    NO_NEAR = "DESACTIVAT"
+    NEAR_SELECTED = "📍 CENTRE SELECCIONAT"
+    NEAREST_K = 10
+    # Ordre de la llista (fp_sort); per defecte, el del resultat (rellevància de la cerca, distància
+    # del mode "a prop de") o, si no en té, per localitat i centre
+    SORT_DEFAULT = "PER DEFECTE"
+    SORT_LABELS = {SORT_DEFAULT: "Per defecte", SORT_LOCALITY: "Localitat i centre", SORT_UNITS: "Més unitats",
+                   SORT_DISTANCE: "Més a prop", SORT_CYCLE: "Nom del cicle"}
+    # Llista de resultats paginada: targetes per pàgina i distància (px) al final que en carrega més
+    RESULTS_PAGE_SIZE = 40
+    RESULTS_PREFETCH_PX = 600
+    # Targetes en trossos: mida del primer tros, mínima, i temps (ms) que hauria de tardar a pintar-se cada tros
+    STREAM_CHUNK_INITIAL = 8
+    STREAM_CHUNK_MIN = 4
+    STREAM_CHUNK_TARGET_MS = 40
+    # Dimensions del resum d'unitats (les del cub presents), en l'ordre del drill-down
+    SUMMARY_LABELS = {
+        'PROVINCIA': "Província", 'COMARCA': "Comarca", 'FAMILIA': "Família",
+        'GRADO': "Grau", 'TURNO': "Torn", 'RÉGIMEN': "Règim",
+    }
+
     def __init__(self, page: ft.Page, initial_df: pd.DataFrame, title: str, map_container_ref: ft.Ref):
         self.page = page
         self.initial_df = initial_df
         self.title = title
         self.map_container_ref = map_container_ref
         self.selected_card_index = None
-        self.current_filtered_df = pd.DataFrame()
+        self.current_result = None
+        # Textos amb facetes de cada desplegable: només es reescriuen les opcions que canvien
+        self.facet_labels = {col: FacetLabels(all_option) for col, (_, all_option) in self.FILTER_DROPDOWNS.items()}
+        # Targetes de la llista per posició, reutilitzades d'una consulta a l'altra (OfferCard); en cada
+        # consulta nova es retallen a una pàgina
+        self.card_pool = []
+        # Consultes al pool de fils compartit: només s'aplica la més nova (fp_worker)
+        self.query_runner = QueryRunner()
+
+        # Índexs del conjunt, compartits amb les altres sessions que el mostren (QueryIndexes): filtres,
+        # cerca lliure, espacial, centres del mode "a prop de", cub del resum i ordres de la llista.
+        # Es canvien tots alhora i sota query_runner.lock (set_data)
+        self.indexes = QueryIndexes(initial_df)
+        # Centre de referència (lat, lon, nom) del filtre de distància
+        self.reference_point = None
+        # Camí de drill-down del resum i files del resultat quan no es pot respondre des del cub
+        # (cerca, distància o mode "a prop de")
+        self.summary_path = []
+        self.summary_rows = None
+        # Controls d'opció ja construïts d'aquesta pestanya (un control només pot estar en una pàgina)
+        self.option_controls = LRUCache(OPTION_CONTROLS_CACHE_SIZE)
         
         # Preparació de dades específiques de la pestanya
-        self.PROVINCES = get_clean_sorted_list(initial_df['PROVINCIA'])
-        self.GRADES = get_clean_sorted_list(initial_df['GRADO'])
-        self.CYCLES = get_clean_sorted_list(initial_df['CICLO'])
+        self.PROVINCES = self.cached_values('PROVINCIA')
+        self.GRADES = self.cached_values('GRADO')
+        self.CYCLES = self.cached_values('CICLO')
+        self.TURNOS = self.cached_values('TURNO')
         
         # Controles de UI
-        self.results_list_column = ft.Column(scroll=ft.ScrollMode.AUTO, spacing=10, expand=True)
+        # Avís de "cap oferta" i, darrere, les targetes del pool ja muntades (mounted_cards): les que
+        # sobren en una consulta amb menys files s'amaguen en lloc de treure-les, per reutilitzar-les
+        self.no_results = ft.Container(
+            content=ft.Column([
+                ft.Icon(ft.Icons.SEARCH_OFF, size=60, color=ft.Colors.ORANGE_300), 
+                ft.Text("No s'han trobat ofertes amb aquests criteris.", 
+                      color=ft.Colors.ORANGE_700, text_align=ft.TextAlign.CENTER)], 
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER, 
+                spacing=20
+            ), 
+            padding=ft.padding.all(40),
+            visible=False
+        )
+        self.mounted_cards = 0
+        self.results_list_column = ft.ListView([self.no_results], spacing=10, expand=True, on_scroll_interval=100,
+                                               on_scroll=self.on_results_scroll)
+        self.results_more_text = ft.Text("", size=12, color=ft.Colors.GREY_600, italic=True)
+        self.results_more_button = ft.TextButton("Mostra'n més", icon=ft.Icons.EXPAND_MORE,
+                                                 on_click=self.show_more_results, visible=False)
+        self.display_rows = np.empty(0, dtype=np.int64)
+        self.display_distances = None
+        self.shown_count = 0
+        # Targetes que ha de tenir la llista (la pàgina demanada) i fil que les hi afegeix a trossos
+        self.stream_target = 0
+        self.stream_future = None
+        self.stream_generation = None  # generació de la consulta del fil en marxa (None si no n'hi ha)
+        self.chunk_sizer = ChunkSizer(self.STREAM_CHUNK_INITIAL, self.STREAM_CHUNK_MIN, self.RESULTS_PAGE_SIZE,
+                                      self.STREAM_CHUNK_TARGET_MS)
         self.counter_text = ft.Text("Ofertes trobades: 0", size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_800)
+        # Indicador de consulta en curs (al pool de fils)
+        self.query_progress = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=False)
         self.total_units_text = ft.Text("Unitats ofertades: 0", size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.GREEN_800)
         
         # Dropdowns
@@ -382,6 +730,54 @@ class TabContent:
 
         cycle_options = [ft.dropdown.Option("TOTS ELS CICLES/CURSOS")] + [ft.dropdown.Option(c) for c in self.CYCLES]
         self.cycle_dropdown = ft.Dropdown(options=cycle_options, label="Cicle / Curs", width=400, value="TOTS ELS CICLES/CURSOS")
+
+        turno_options = [ft.dropdown.Option("TOTS ELS TORNS")] + [ft.dropdown.Option(t) for t in self.TURNOS]
+        self.turno_dropdown = ft.Dropdown(options=turno_options, label="Torn", width=180, value="TOTS ELS TORNS")
+        
+        # Cerca lliure: sense accents ni majúscules, els resultats s'actualitzen en deixar d'escriure
+        self.search_field = ft.TextField(
+            label="Cerca (cicle, família, centre o localitat)", prefix_icon=ft.Icons.SEARCH,
+            width=400, dense=True, on_change=self.schedule_results
+        )
+        
+        # Distància: ofertes a menys de N km del centre de la targeta seleccionada
+        self.radius_dropdown = ft.Dropdown(
+            options=[ft.dropdown.Option(self.NO_RADIUS)] + [ft.dropdown.Option(f"{km} km") for km in self.RADIUS_OPTIONS_KM],
+            label="Distància", width=160, value=self.NO_RADIUS, on_change=self.schedule_results
+        )
+        self.near_dropdown = ft.Dropdown(options=self.near_options(), label="A prop de", width=260,
+                                         value=self.NO_NEAR, on_change=self.schedule_results)
+        self.sort_dropdown = ft.Dropdown(
+            options=self.sort_options(), label="Ordena per", width=180, value=self.SORT_DEFAULT, on_change=self.schedule_results
+        )
+        self.reference_text = ft.Text("Fes clic a una targeta per mesurar distàncies (i ordenar per proximitat) des del seu centre",
+                                      size=12, color=ft.Colors.GREY_600, italic=True)
+        
+        # Resum d'unitats: desglossament per una dimensió, amb drill-down (clic) i roll-up (fletxa)
+        self.summary_dimension_dropdown = ft.Dropdown(
+            options=self.summary_dimension_options(), label="Desglossa per", width=180, dense=True,
+            value=self.units_cube.dimensions[0], on_change=self.update_summary
+        )
+        self.summary_up_button = ft.IconButton(
+            icon=ft.Icons.ARROW_UPWARD, icon_color=ft.Colors.BLUE_GREY_700, on_click=self.summary_roll_up,
+            tooltip="Puja un nivell", disabled=True
+        )
+        self.summary_path_text = ft.Text("", size=12, color=ft.Colors.BLUE_GREY_600)
+        self.summary_list = ft.Column(scroll=ft.ScrollMode.AUTO, spacing=2, height=160)
+        self.summary_section = ft.Container(
+            padding=10,
+            border_radius=10,
+            bgcolor=ft.Colors.BLUE_GREY_50,
+            content=ft.Column([
+                ft.Row([
+                    ft.Text("📊 Resum d'unitats", size=14, weight=ft.FontWeight.W_600, color=ft.Colors.BLUE_GREY_800),
+                    self.summary_dimension_dropdown,
+                    self.summary_up_button,
+                    self.summary_path_text,
+                ], spacing=10, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+                self.summary_list,
+            ], spacing=5)
+        )
         
         # Botons
         self.update_button = ft.IconButton(
@@ -404,6 +800,8 @@ class TabContent:
         # Assignació de Handlers
         self.province_dropdown.on_change = self.update_cycle_dropdown
         self.grade_dropdown.on_change = self.update_cycle_dropdown
+        self.cycle_dropdown.on_change = self.update_facets
+        self.turno_dropdown.on_change = self.update_facets
         
         # Construcció de la interfície
         self.filter_section = ft.Container(
@@ -416,21 +814,26 @@ class TabContent:
                     self.province_dropdown,
                     self.grade_dropdown,
                     self.cycle_dropdown,
+                    self.turno_dropdown,
                     ft.Container(width=20),
                     self.update_button,
                     self.clear_button
-                ], vertical_alignment=ft.CrossAxisAlignment.END)
+                ], vertical_alignment=ft.CrossAxisAlignment.END),
+                ft.Row([self.search_field, self.radius_dropdown, self.near_dropdown, self.sort_dropdown, self.reference_text],
+                       vertical_alignment=ft.CrossAxisAlignment.CENTER)
             ], spacing=10)
         )
         
         self.results_section = ft.Column([
             ft.Row([
                 self.counter_text,
+                self.query_progress,
                 ft.Container(width=20),
                 self.total_units_text,
                 ft.Container(expand=True),
                 ft.Text("Fes clic a qualsevol targeta per veure-la al mapa", size=12, color=ft.Colors.GREY_500)
             ]),
+            self.summary_section,
             ft.Container(
                 content=self.results_list_column,
                 height=600,
@@ -438,7 +841,8 @@ class TabContent:
                 border_radius=10,
                 padding=10,
                 bgcolor=ft.Colors.WHITE
-            )
+            ),
+            ft.Row([self.results_more_text, self.results_more_button], alignment=ft.MainAxisAlignment.CENTER)
         ], spacing=10, expand=1)
         
         self.content = ft.Column(
@@ -446,100 +850,249 @@ class TabContent:
             expand=True
         )
     
-    def create_offer_card(self, offer_data: pd.Series, index: int) -> ft.Card:
-        """Crea una targeta d'oferta amb interacció de clic."""
-        regime_color, bg_color, icon = get_regime_style(offer_data['RÉGIMEN'])
-        
-        # Per obrir el mapa extern (Google Maps)
-        search_query = f"{offer_data['CENTRO']}, {offer_data['LOCALIDAD']}, {offer_data['PROVINCIA']}"
-        map_url = f"https://www.google.com/maps/search/?api=1&query={search_query.replace(' ', '+')}" 
+    @property
+    def filter_index(self):
+        return self.indexes.filter_index
 
-        def open_map_external(e):
-            try:
-                webbrowser.open(map_url)
-            except Exception as ex:
-                print(f"Error obrint el mapa: {ex}")
-
-        def on_card_click(e):
-            """Quan es fa clic a la targeta, es selecciona i es centra el mapa."""
-            # Desseleccionar la targeta anterior
-            if self.selected_card_index is not None and self.selected_card_index < len(self.results_list_column.controls):
-                old_card = self.results_list_column.controls[self.selected_card_index]
-                if isinstance(old_card.content, ft.Container):
-                    old_card.content.bgcolor = ft.Colors.WHITE
-                    old_card.elevation = 2
-                    old_card.content.border = None
-            
-            # Seleccionar la targeta actual
-            self.selected_card_index = index
-            if isinstance(e.control.content, ft.Container):
-                 e.control.content.bgcolor = ft.Colors.BLUE_50
-                 e.control.elevation = 5
-                 e.control.content.border = ft.border.all(2, ft.Colors.BLUE_500)
-            
-            self.center_map_on_selected(offer_data)
-            
+    @property
+    def search_index(self):
+        return self.indexes.search_index
+
+    @property
+    def spatial_index(self):
+        return self.indexes.spatial_index
+
+    @property
+    def nearest_index(self):
+        return self.indexes.nearest_index
+
+    @property
+    def units_cube(self):
+        return self.indexes.units_cube
+
+    @property
+    def sort_index(self):
+        return self.indexes.sort_index
+
+    def selected_filters(self, *columns):
+        """Filtres actius {columna: valor} dels desplegables de `columns` (per defecte, tots)."""
+        filters = {}
+        for col in columns or self.FILTER_DROPDOWNS:
+            dropdown_name, all_option = self.FILTER_DROPDOWNS[col]
+            value = getattr(self, dropdown_name).value
+            if value and value != all_option:
+                filters[col] = value
+        return filters
+
+    def upstream_filters(self, *upstream):
+        """Filtres actius dels desplegables de dalt (cap, si no n'hi ha)."""
+        return self.selected_filters(*upstream) if upstream else {}
+
+    def selected_radius_km(self):
+        """Radi triat al desplegable de distància (None si no n'hi ha o no hi ha centre de referència)."""
+        value = self.radius_dropdown.value
+        if self.reference_point is None or not value or value == self.NO_RADIUS:
+            return None
+        return float(value.split()[0])
+
+    def set_reference_point(self, offer_data: pd.Series):
+        """Usa el centre de l'oferta com a punt de referència per al filtre de distància."""
+        lat, lon = offer_data['latitud'], offer_data['longitud']
+        if pd.isna(lat) or pd.isna(lon) or (lat == 0.0 and lon == 0.0):
+            return
+        self.reference_point = (float(lat), float(lon), f"{offer_data['CENTRO']} ({offer_data['LOCALIDAD']})")
+        self.reference_text.value = f"📍 Distàncies des de: {self.reference_point[2]}"
+        # Ja es pot ordenar per distància
+        self.sort_dropdown.options = self.sort_options()
+
+    def locality_points(self):
+        """Punt de cada localitat: del catàleg si s'ha llegit; si no (instantània), dels centres de l'oferta."""
+        if len(center_catalog):
+            return center_catalog.locality_points
+        return self.nearest_index.locality_points
+
+    def near_options(self):
+        """Opcions del mode "a prop de": sense distàncies, el centre seleccionat i les localitats."""
+        labels = [self.NO_NEAR, self.NEAR_SELECTED] + list(self.locality_points().index)
+        return [ft.dropdown.Option(label) for label in labels]
+
+    def sort_options(self):
+        """Opcions de l'ordre de la llista; "Més a prop" està desactivada mentre no hi ha centre de referència."""
+        return [ft.dropdown.Option(key=key, text=label, disabled=key == SORT_DISTANCE and self.reference_point is None)
+                for key, label in self.SORT_LABELS.items()]
+
+    def selected_near_point(self):
+        """Punt (lat, lon, nom) del mode "a prop de"; None si no està actiu o no hi ha centre seleccionat."""
+        value = self.near_dropdown.value
+        if not value or value == self.NO_NEAR:
+            return None
+        if value == self.NEAR_SELECTED:
+            return self.reference_point
+        points = self.locality_points()
+        if value not in points.index:
+            return None
+        return float(points.at[value, 'LATITUD']), float(points.at[value, 'LONGITUD']), value
+
+    def summary_dimension_options(self):
+        return [ft.dropdown.Option(key=dim, text=self.SUMMARY_LABELS.get(dim, dim)) for dim in self.units_cube.dimensions]
+
+    def update_summary(self, e=None):
+        """
+        Omple el resum: ofertes i unitats per valor de la dimensió triada amb els filtres dels
+        desplegables i el camí de drill-down. Es respon des del cub; si el resultat ve de la
+        cerca, la distància o el mode "a prop de", des de les files del resultat.
+        """
+        dimension = self.summary_dimension_dropdown.value
+        path = dict(self.summary_path)
+        filters = {**self.selected_filters(), **path}
+        if self.summary_rows is None and self.units_cube.covers(filters):
+            items = self.units_cube.breakdown(dimension, filters)
+        else:
+            rows = self.filter_index.rows(filters) if self.summary_rows is None else self.summary_rows
+            if self.summary_rows is not None and path:
+                rows = np.intersect1d(rows, self.filter_index.rows(path))
+            items = self.filter_index.facet(dimension, weight_column='UNIDADES', rows=rows).items()
+
+        self.summary_path_text.value = " › ".join(["Tot"] + [value for _, value in self.summary_path])
+        self.summary_up_button.disabled = not self.summary_path
+        max_units = max((units for _, _, units in items), default=0) or 1
+        self.summary_list.controls = [self.summary_row(dimension, value, count, units, max_units)
+                                      for value, count, units in items]
+        if e:
             self.page.update()
-        
-        grado_text = offer_data.get('GRADO', 'N/A').upper() 
-        ciclo_text = offer_data.get('CICLO', 'N/A').upper()
-        
-        is_esp_course = 'CURSO' in ciclo_text
-        
-        grado_style_text = grado_text
-        if is_esp_course:
-            grado_style_text = f"C. ESP. ({grado_text})"
-        
-        card_content = ft.Container(
-            padding=15,
-            bgcolor=ft.Colors.WHITE,
-            border_radius=8,
-            on_click=on_card_click,
-            content=ft.Column([
-                ft.Row([
-                    ft.Text(ciclo_text, weight=ft.FontWeight.BOLD, size=15, color=ft.Colors.BLUE_GREY_900, expand=True),
-                    ft.Container(
-                        content=ft.Text(grado_style_text, size=11, color=regime_color, weight=ft.FontWeight.BOLD),
-                        bgcolor=ft.Colors.with_opacity(0.1, regime_color), 
-                        border_radius=8, 
-                        padding=ft.padding.symmetric(horizontal=10, vertical=4)
-                    )
-                ], spacing=10),
-                
-                ft.Divider(height=5, color=ft.Colors.GREY_200),
-                
-                ft.Row([
-                    ft.Icon(icon, size=16, color=regime_color),
-                    ft.Text(offer_data['CENTRO'], size=13, color=ft.Colors.GREY_800, weight=ft.FontWeight.W_600, expand=True),
-                    ft.Icon(ft.Icons.LOCATION_ON_OUTLINED, size=14, color=ft.Colors.GREY_600),
-                    ft.Text(f"{offer_data['LOCALIDAD']} ({offer_data['PROVINCIA']})", size=12, color=ft.Colors.GREY_700)
-                ], spacing=8),
 
-                ft.Row([
-                    ft.Icon(ft.Icons.CATEGORY_OUTLINED, size=16, color=ft.Colors.INDIGO_600),
-                    ft.Text(f"Família: {offer_data['FAMILIA']}", size=12, color=ft.Colors.GREY_700),
-                    ft.Container(expand=True),
-                    ft.Icon(ft.Icons.ACCESS_TIME, size=16, color=ft.Colors.AMBER_700),
-                    ft.Text(f"Torn: {offer_data['TURNO']}", size=12, color=ft.Colors.GREY_700),
-                    ft.Container(width=10),
-                    ft.Icon(ft.Icons.GROUP, size=16, color=ft.Colors.GREEN_700),
-                    ft.Text(f"Unitats: {offer_data['UNIDADES']}", size=12, color=ft.Colors.GREY_700, weight=ft.FontWeight.BOLD),
-                    ft.Container(width=10),
-                    
-                    ft.TextButton(
-                        "Veure ubicació (GMaps)",
-                        icon=ft.Icons.MAP_OUTLINED,
-                        on_click=open_map_external,
-                        style=ft.ButtonStyle(color=ft.Colors.BLUE_500, padding=0)
-                    )
-                ], spacing=5),
-            ], spacing=8)
+    def summary_row(self, dimension, value, count, units, max_units):
+        """Fila del resum; un clic hi baixa (drill-down) a la dimensió següent."""
+        def on_click(e):
+            self.summary_drill_down(dimension, value)
+
+        return ft.Container(
+            padding=ft.padding.symmetric(horizontal=8, vertical=2),
+            border_radius=6,
+            on_click=on_click if value is not None else None,
+            content=ft.Row([
+                ft.Text(value if value is not None else "(sense valor)", size=12, expand=True),
+                ft.ProgressBar(value=units / max_units, width=120, color=ft.Colors.GREEN_600,
+                               bgcolor=ft.Colors.GREY_200),
+                ft.Text(f"{format_count(count)} ofertes", size=12, width=90, text_align=ft.TextAlign.RIGHT),
+                ft.Text(f"{format_count(units)} u.", size=12, width=70, weight=ft.FontWeight.BOLD,
+                        color=ft.Colors.GREEN_800, text_align=ft.TextAlign.RIGHT),
+            ], spacing=10)
         )
+
+    def summary_drill_down(self, dimension, value):
+        """Fixa `dimension` = `value` i desglossa per la primera dimensió encara lliure."""
+        self.summary_path.append((dimension, value))
+        fixed = set(self.selected_filters()) | {dim for dim, _ in self.summary_path}
+        free = [dim for dim in self.units_cube.dimensions if dim not in fixed]
+        if free:
+            self.summary_dimension_dropdown.value = free[0]
+        self.update_summary()
+        self.page.update()
+
+    def summary_roll_up(self, e=None):
+        """Desfà l'últim drill-down i torna a desglossar per la dimensió que s'havia fixat."""
+        if self.summary_path:
+            dimension, _ = self.summary_path.pop()
+            self.summary_dimension_dropdown.value = dimension
+        self.update_summary()
+        self.page.update()
+
+    def option_key(self, column, *upstream):
+        """Clau de memòria cau: conjunt de dades, columna i valors dels filtres de dalt (p. ex. província i grau)."""
+        filters = self.upstream_filters(*upstream)
+        return (self.filter_index.token, column, tuple(filters.get(col) for col in upstream))
+
+    def cached_values(self, column, *upstream):
+        """Valors de `column` amb els filtres actius de `upstream`, a través de option_cache."""
+        filters = self.upstream_filters(*upstream)
+        return option_cache.get_or_compute(self.option_key(column, *upstream),
+                                           lambda: self.filter_index.values(column, filters))
+
+    def dropdown_options(self, column, *upstream):
+        """Opcions del desplegable de `column` ("totes" + valors); els controls es reutilitzen dins de la pestanya."""
+        all_option = self.FILTER_DROPDOWNS[column][1]
+
+        def build():
+            values = self.cached_values(column, *upstream)
+            return [ft.dropdown.Option(all_option)] + [ft.dropdown.Option(v) for v in values]
+
+        # Còpia de la llista: el desplegable la pot modificar, els controls són els mateixos
+        return list(self.option_controls.get_or_compute(self.option_key(column, *upstream), build))
+
+    def update_facets(self, e=None):
+        """
+        Mostra a cada opció dels desplegables quantes ofertes i unitats tornaria amb la resta
+        de filtres actius. Un sol recompte per desplegable, sense tornar a filtrar per opció.
+        Amb cerca, distància o "a prop de" es compta sobre les files de la consulta sencera sense
+        el filtre del desplegable: una opció no pot prometre ofertes que la cerca descartaria.
+        """
+        # Els textos de les opcions també els escriu apply_result (en un altre fil)
+        with self.query_runner.lock:
+            query = self.current_query()
+            indexes, filters, near_point = query['indexes'], query['filters'], query['near_point']
+            filters_only = not (query['radius_km'] or normalize_text(query['search']) or near_point)
+            # Files amb la cerca i el radi, per filtres: les comparteixen els desplegables sense filtre propi
+            query_rows = {}
+            for col, (dropdown_name, all_option) in self.FILTER_DROPDOWNS.items():
+                others = {c: v for c, v in filters.items() if c != col}
+                if filters_only:
+                    facet = indexes.filter_index.facet(col, others, 'UNIDADES')
+                else:
+                    key = tuple(sorted(others.items()))
+                    if key not in query_rows:
+                        query_rows[key] = self.query_rows(indexes, others, query['search'], query['radius_km'],
+                                                          query['radius_point'], None)[0]
+                    rows = query_rows[key]
+                    if near_point:
+                        # "A prop de" tria els centres després de filtrar: cada opció, amb els seus NEAREST_K centres
+                        lat, lon = near_point[:2]
+                        total_rows = indexes.nearest_index.nearest(lat, lon, rows, self.NEAREST_K)[0]
+                        rows = indexes.nearest_index.nearest_by_value(lat, lon, rows, indexes.filter_index.codes(col),
+                                                                      self.NEAREST_K)
+                        facet = indexes.filter_index.facet(col, weight_column='UNIDADES', rows=rows,
+                                                           total_rows=total_rows)
+                    else:
+                        facet = indexes.filter_index.facet(col, weight_column='UNIDADES', rows=rows)
+                self.facet_labels[col].apply(getattr(self, dropdown_name).options, facet)
+
+        if e:
+            self.schedule_results()
+            self.page.update()
+
+    def create_offer_card(self, offer_data: pd.Series, index: int) -> ft.Card:
+        """
+        Targeta de la posició `index` de la llista amb les dades de l'oferta: la del pool de la
+        pestanya, reutilitzada, i només se'n crea una de nova quan la llista en mostra més que el pool.
+        """
+        if index >= len(self.card_pool):
+            self.card_pool.append(OfferCard(self))
+        card = self.card_pool[index]
+        card.bind(offer_data, index)
+        return card.control
+
+    def select_card(self, card: OfferCard):
+        """Selecciona la targeta (desseleccionant l'anterior), centra el mapa i en fa el centre de referència."""
+        changed = self.deselect_card()
+        self.selected_card_index = card.index
+        card.set_selected(True)
         
-        return ft.Card(
-            elevation=2,
-            content=card_content
-        )
+        self.center_map_on_selected(card.offer_data)
+        self.set_reference_point(card.offer_data)
+        
+        self.page.update()
+        # Les targetes són aïllades: el ressaltat s'envia a part
+        self.page.update(card.control, *changed)
+
+    def deselect_card(self):
+        """Treu el ressaltat de la targeta seleccionada, si n'hi ha, i torna les targetes de la llista que cal enviar."""
+        changed = []
+        if self.selected_card_index is not None and self.selected_card_index < len(self.card_pool):
+            self.card_pool[self.selected_card_index].set_selected(False)
+            if self.selected_card_index < self.shown_count:
+                changed.append(self.card_pool[self.selected_card_index].control)
+        self.selected_card_index = None
+        return changed
     
     def center_map_on_selected(self, offer_data: pd.Series):
         """Centra el mapa en el centre seleccionat."""
@@ -577,26 +1130,19 @@ class TabContent:
     
     def show_all_centers(self, e=None):
         """Torna a mostrar tots els centres al mapa."""
-        if self.map_container_ref.current and not self.current_filtered_df.empty:
+        if self.map_container_ref.current and self.current_result is not None and len(self.current_result):
             
             # Desseleccionar la targeta si n'hi havia una de seleccionada
-            if self.selected_card_index is not None and self.selected_card_index < len(self.results_list_column.controls):
-                old_card = self.results_list_column.controls[self.selected_card_index]
-                if isinstance(old_card.content, ft.Container):
-                    old_card.content.bgcolor = ft.Colors.WHITE
-                    old_card.elevation = 2
-                    old_card.content.border = None
-            
-            self.selected_card_index = None # IMPORTANT: Reinicia l'índex
+            changed = self.deselect_card()
 
             # Crear el contingut del mapa massiu
-            total_centers = len(self.current_filtered_df)
+            total_centers = len(self.current_result)
             map_content = ft.Column([
                 ft.Text(f"📍 Mapa de tots els centres ({total_centers} centres)", 
                        size=18, weight="bold"),
                 ft.Container(
                     WebView(
-                        url=get_osm_url_all_centers(self.current_filtered_df),
+                        url=self.current_result.map_url,
                         expand=True
                     ),
                     height=700,
@@ -612,107 +1158,305 @@ class TabContent:
                 padding=10
             )
             self.page.update()
+            if changed:
+                self.page.update(*changed)
     
     def update_cycle_dropdown(self, e=None):
         """Actualitza el dropdown de cicles segons els filtres seleccionats."""
-        filtered_df = self.initial_df.copy()
-        selected_province = self.province_dropdown.value
-        selected_grade = self.grade_dropdown.value
-        
-        if selected_province and selected_province != "TOTES LES PROVÍNCIES":
-            filtered_df = filtered_df[filtered_df['PROVINCIA'] == selected_province]
-            
-        if selected_grade and selected_grade != "TOTS ELS GRAUS":
-            filtered_df = filtered_df[filtered_df['GRADO'] == selected_grade]
-        
-        filtered_cycles = get_clean_sorted_list(filtered_df['CICLO'])
-        
-        self.cycle_dropdown.options.clear()
-        self.cycle_dropdown.options.append(ft.dropdown.Option("TOTS ELS CICLES/CURSOS"))
-        self.cycle_dropdown.options.extend([ft.dropdown.Option(c) for c in filtered_cycles])
+        self.cycle_dropdown.options = self.dropdown_options('CICLO', 'PROVINCIA', 'GRADO')
         self.cycle_dropdown.value = "TOTS ELS CICLES/CURSOS"
         
         if e:
+            self.update_facets()
+            self.schedule_results()
             self.page.update()
     
+    @property
+    def current_filtered_df(self):
+        """Files del resultat actual com a DataFrame (es copien només quan algú les demana)."""
+        if self.current_result is None:
+            return pd.DataFrame()
+        filtered_df = self.filter_index.take(self.current_result.rows)
+        if self.current_result.distances is not None:
+            filtered_df = filtered_df.assign(DISTANCIA_KM=self.current_result.distances)
+        return filtered_df
+
+    def selected_sort(self):
+        """
+        Ordre triat (clau de fp_sort; None és l'ordre per defecte) i, per a la distància, el centre de
+        referència. Sense centre de referència, o si el resultat ja ve ordenat per distància (mode
+        "a prop de"), torna l'ordre per defecte.
+        """
+        value = self.sort_dropdown.value
+        if not value or value == self.SORT_DEFAULT:
+            return None, None
+        if value == SORT_DISTANCE:
+            if self.selected_near_point() or self.reference_point is None:
+                return None, None
+            return SORT_DISTANCE, self.reference_point
+        return value, None
+
+    def current_query(self):
+        """Paràmetres de la consulta dels controls, llegits al fil de l'esdeveniment (el càlcul es fa en un altre)."""
+        radius_km = self.selected_radius_km()
+        sort, sort_point = self.selected_sort()
+        return {
+            'indexes': self.indexes,
+            'filters': self.selected_filters(),
+            'search': self.search_field.value or "",
+            'radius_km': radius_km,
+            'radius_point': self.reference_point if radius_km else None,
+            'near_point': self.selected_near_point(),
+            'sort': sort,
+            'sort_point': sort_point,
+        }
+
+    def query_signature(self, query):
+        """Signatura normalitzada de la consulta (clau de result_cache)."""
+        query = dict(query)
+        indexes = query.pop('indexes')
+        return query_signature(indexes.filter_index.token, **query, k=self.NEAREST_K)
+
+    def query_rows(self, indexes, filters, search, radius_km, radius_point, near_point):
+        """
+        Files d'una consulta (filtres, distància, cerca, "a prop de") amb `indexes` en l'ordre del
+        resultat, i les distàncies i els centres del mode "a prop de" (None i 0 si no està actiu).
+        """
+        # Intersecció de les llistes de files de l'índex
+        rows = indexes.filter_index.rows(filters)
+        if radius_km:
+            # Només les ofertes a menys de radius_km del centre de referència
+            lat, lon = radius_point[:2]
+            rows = indexes.spatial_index.within_radius(lat, lon, radius_km, rows)
+        searching = bool(normalize_text(search))
+        if searching:
+            # Files que compleixen la cerca, de millor a pitjor coincidència
+            rows, _ = indexes.search_index.search(search, rows)
+        distances, n_centers = None, 0
+        if near_point:
+            # Ofertes dels NEAREST_K centres més propers al punt, del més proper al més llunyà
+            lat, lon = near_point[:2]
+            rows, distances, n_centers = indexes.nearest_index.nearest(lat, lon, rows, self.NEAREST_K)
+        return rows, distances, n_centers
+
+    def compute_result(self, indexes, filters, search, radius_km, radius_point, near_point, sort=None, sort_point=None):
+        """
+        Executa una consulta amb els índexs capturats per current_query (no els de la pestanya, que
+        una recàrrega pot canviar mentrestant): filtres, distància, cerca, "a prop de", ordre, totals i mapa.
+        """
+        rows, distances, n_centers = self.query_rows(indexes, filters, search, radius_km, radius_point, near_point)
+        searching = bool(normalize_text(search))
+        filtered_df = indexes.filter_index.take(rows)
+
+        filters_only = not (radius_km or searching or near_point)
+        if filters_only and indexes.units_cube.covers(filters):
+            _, total_units = indexes.units_cube.total(filters)
+        else:
+            total_units = int(filtered_df['UNIDADES'].sum())
+
+        # Ordre de la llista amb les permutacions precalculades: el triat o, per defecte, el del
+        # resultat amb cerca o "a prop de" i, si no, per localitat i centre
+        order = None
+        if sort == SORT_DISTANCE:
+            lat, lon = sort_point[:2]
+            order, distances = indexes.sort_index.distance_order(rows, lat, lon)
+        elif sort:
+            order = indexes.sort_index.order(rows, sort)
+        elif not (searching or near_point):
+            order = indexes.sort_index.order(rows, SORT_LOCALITY)
+        return QueryResult(rows, order, total_units, get_osm_url_all_centers(filtered_df),
+                           distances=distances, n_centers=n_centers, filters_only=filters_only)
+
     def update_results(self, e=None):
-        """Aplica tots els filtres i actualitza la llista de resultats i el mapa."""
-        self.update_button.disabled = True
-        self.clear_button.disabled = True
+        """Aplica tots els filtres ara mateix (botó, netejar filtres, recàrrega)."""
+        self.request_results()
         if e:
-            self.page.update()
-        
-        filtered_df = self.initial_df.copy()
-        
-        selected_province = self.province_dropdown.value
-        selected_grade = self.grade_dropdown.value
-        selected_cycle = self.cycle_dropdown.value
-        
-        if selected_province and selected_province != "TOTES LES PROVÍNCIES":
-            filtered_df = filtered_df[filtered_df['PROVINCIA'] == selected_province]
-            
-        if selected_grade and selected_grade != "TOTS ELS GRAUS":
-            filtered_df = filtered_df[filtered_df['GRADO'] == selected_grade]
+            self.show_query_progress()
+
+    def schedule_results(self, e=None):
+        """Canvi d'un desplegable o de la cerca: la consulta s'envia quan fa DEBOUNCE_S que no canvien."""
+        self.request_results(delay=DEBOUNCE_S)
+        if e:
+            self.show_query_progress()
+
+    def show_query_progress(self):
+        """Envia només l'indicador de consulta en curs (un page.update recorreria tota la pestanya)."""
+        if self.query_progress.page is not None:
+            self.query_progress.update()
+
+    def request_results(self, delay=0.0):
+        """
+        Envia la consulta dels controls al QueryRunner de la pestanya. Si no cal esperar i qualsevol
+        sessió ja l'ha feta (result_cache), s'aplica de seguida; si no, es calcula en un fil del pool
+        i només es mostra si encara és la consulta més nova de la pestanya.
+        """
+        # Captura i enviament sota el bloqueig: set_data no hi pot canviar els índexs pel mig
+        with self.query_runner.lock:
+            query = self.current_query()
+            signature = self.query_signature(query)
+            if not delay:
+                result = result_cache.get(signature)
+                if result is not None:
+                    self.query_runner.apply_now(self.apply_result, result)
+                    return
 
-        if selected_cycle and selected_cycle != "TOTS ELS CICLES/CURSOS":
-            filtered_df = filtered_df[filtered_df['CICLO'] == selected_cycle]
+            def compute():
+                if delay:
+                    # Durant l'espera una altra sessió pot haver fet la mateixa consulta
+                    return result_cache.get_or_compute(signature, lambda: self.compute_result(**query))
+                result = self.compute_result(**query)
+                result_cache.put(signature, result)
+                return result
+
+            self.query_progress.visible = True
+            self.query_runner.submit(compute, self.apply_result, delay)
+
+    def apply_result(self, result: QueryResult):
+        """Mostra el resultat d'una consulta: resum, mapa, comptadors i la primera pàgina de targetes."""
+        self.current_result = result
+        self.query_progress.visible = False
         
-        self.current_filtered_df = filtered_df.copy()
+        # El resum torna al primer nivell; amb cerca, distància o "a prop de" es calcula sobre el resultat
+        self.summary_path = []
+        self.summary_rows = None if result.filters_only else result.rows
+        self.update_summary()
         
         # MOSTRAR TOTS ELS PUNTS PER DEFECTE (Això és el que garanteix la vista múltiple)
         self.show_all_centers()
         
-        total_units = filtered_df['UNIDADES'].sum()
-        self.counter_text.value = f"Ofertes trobades: {len(filtered_df)}"
+        self.counter_text.value = f"Ofertes trobades: {len(result)}"
+        near_point = self.selected_near_point()
+        if near_point and result.distances is not None:
+            self.counter_text.value += f" als {result.n_centers} centres més propers a {near_point[2]}"
         # Format per separat milers i decimals
-        self.total_units_text.value = f"Unitats ofertades: {total_units:,}".replace(",", "TEMP").replace(".", ",").replace("TEMP", ".") 
+        self.total_units_text.value = f"Unitats ofertades: {result.total_units:,}".replace(",", "TEMP").replace(".", ",").replace("TEMP", ".") 
         
-        self.results_list_column.controls.clear()
-        self.selected_card_index = None
+        self.deselect_card()
+        # Es queden muntades (i al pool) les targetes d'una pàgina com a molt; append_cards torna a
+        # mostrar les que omple
+        self.mounted_cards = min(self.mounted_cards, self.RESULTS_PAGE_SIZE)
+        del self.results_list_column.controls[1 + self.mounted_cards:]
+        del self.card_pool[self.mounted_cards:]
+        for card in self.card_pool[:self.mounted_cards]:
+            card.control.visible = False
         
-        if not filtered_df.empty:
-            display_df = filtered_df.sort_values(by=['LOCALIDAD', 'CENTRO']).head(1000)
-            
-            for index, row in display_df.iterrows():
-                self.results_list_column.controls.append(
-                    self.create_offer_card(row, len(self.results_list_column.controls))
-                )
-
-            if len(filtered_df) > 1000:
-                 self.results_list_column.controls.append(
-                    ft.Container(
-                        content=ft.Text(f"⚠️ Mostrant les primeres 1000 ofertes d'un total de {len(filtered_df)}.", 
-                                      color=ft.Colors.ORANGE_700, italic=True, size=12), 
-                        alignment=ft.alignment.center, 
-                        padding=ft.padding.all(10)
-                    )
-                )
-        else:
-            self.results_list_column.controls.append(
-                ft.Container(
-                    content=ft.Column([
-                        ft.Icon(ft.Icons.SEARCH_OFF, size=60, color=ft.Colors.ORANGE_300), 
-                        ft.Text("No s'han trobat ofertes amb aquests criteris.", 
-                              color=ft.Colors.ORANGE_700, text_align=ft.TextAlign.CENTER)], 
-                        horizontal_alignment=ft.CrossAxisAlignment.CENTER, 
-                        spacing=20
-                    ), 
-                    padding=ft.padding.all(40)
-                )
-            )
+        # Ordre de la llista com a posicions; les targetes es construeixen a pàgines
+        self.results_more_text.value = ""
+        self.results_more_button.visible = False
+        self.display_rows = result.rows if result.order is None else result.rows[result.order]
+        self.display_distances = (result.distances if result.distances is None or result.order is None
+                                  else result.distances[result.order])
+        self.shown_count = 0
+        self.stream_target = min(self.RESULTS_PAGE_SIZE, len(self.display_rows))
+        
+        self.no_results.visible = not len(self.display_rows)
+        
+        # El primer tros surt amb els comptadors; la resta de la pàgina arriba a trossos (stream_results)
+        cards = self.append_cards(self.STREAM_CHUNK_INITIAL) if len(self.display_rows) else []
         
-        self.update_button.disabled = False
-        self.clear_button.disabled = False
+        self.update_facets()
         self.page.update()
+        # Les targetes són aïllades: el contingut de les reutilitzades s'envia a part. S'amaguen ja les
+        # que sobren en aquesta pàgina; les d'abans del final de la pàgina les reomple stream_results
+        changed = cards + [card.control for card in self.card_pool[self.stream_target:self.mounted_cards]]
+        if changed:
+            self.page.update(*changed)
+        self.start_stream()
     
+    def show_more_results(self, e=None):
+        """Demana la pàgina següent del resultat: les seues targetes arriben a trossos."""
+        # La paginació pot arribar mentre un fil del pool aplica un resultat nou
+        with self.query_runner.lock:
+            if self.shown_count < self.stream_target:
+                return  # la pàgina anterior encara s'està afegint
+            self.stream_target = min(self.shown_count + self.RESULTS_PAGE_SIZE, len(self.display_rows))
+            self.start_stream()
+
+    def append_cards(self, count):
+        """
+        Afegeix a la llista les `count` targetes següents (fins a stream_target; només aquestes files
+        es copien) i les torna: s'han d'actualitzar després de la llista perquè són aïllades.
+
+        És una càrrega per pàgines, no una llista amb finestra: les targetes ja afegides es queden
+        muntades mentre es baixa, de manera que, si es desplaça fins al final, la llista acaba amb
+        tantes targetes com files té el resultat. Només una consulta nova la retalla a una pàgina.
+        """
+        start, stop = self.shown_count, min(self.shown_count + count, self.stream_target)
+        page_df = self.filter_index.take(self.display_rows[start:stop])
+        if self.display_distances is not None:
+            page_df = page_df.assign(DISTANCIA_KM=self.display_distances[start:stop])
+        cards = []
+        for index, (_, row) in enumerate(page_df.iterrows(), start):
+            cards.append(self.create_offer_card(row, index))
+            cards[-1].visible = True
+            if index >= self.mounted_cards:
+                self.results_list_column.controls.append(cards[-1])
+                self.mounted_cards += 1
+        self.shown_count = stop
+
+        remaining = len(self.display_rows) - self.shown_count
+        self.results_more_text.value = (f"Mostrant {self.shown_count} de {len(self.display_rows)} ofertes"
+                                        if remaining else "")
+        self.results_more_button.visible = remaining > 0
+        return cards
+
+    def start_stream(self):
+        """Posa en marxa el fil que afegeix les targetes que falten fins a stream_target, si no n'hi ha cap."""
+        with self.query_runner.lock:
+            generation = self.query_runner.generation
+            if self.shown_count >= self.stream_target or self.stream_generation == generation:
+                return
+            self.stream_generation = generation
+            self.stream_future = get_stream_executor().submit(self.stream_results, generation)
+
+    def stream_results(self, generation):
+        """
+        Afegeix les targetes a trossos, amb una actualització per tros, fins a stream_target. Entre
+        trossos es deixa el bloqueig (hi pot entrar un resultat nou) i s'atura si arriba una
+        consulta més nova. La mida del tros s'ajusta al temps de pintar l'anterior.
+        """
+        while True:
+            with self.query_runner.lock:
+                if not self.query_runner.is_current(generation) or self.shown_count >= self.stream_target:
+                    if self.stream_generation == generation:
+                        self.stream_generation = None
+                    return
+                start = time.perf_counter()
+                try:
+                    cards = self.append_cards(self.chunk_sizer.size)
+                    # Només la llista, el peu i les targetes del tros (no tota la pestanya)
+                    self.page.update(self.results_list_column, self.results_more_text, self.results_more_button, *cards)
+                except Exception as e:
+                    print(f"⚠️ No s'han pogut afegir les targetes a la llista: {e}")
+                    self.stream_generation = None
+                    return
+                self.chunk_sizer.record(len(cards), time.perf_counter() - start)
+
+    def wait_results(self, timeout=None):
+        """Espera la consulta pendent i les targetes que encara s'hi afegeixen (scripts de prova i benchmarks)."""
+        self.query_runner.wait(timeout)
+        future = self.stream_future
+        if future is not None:
+            future.exception(timeout)
+
+    def on_results_scroll(self, e):
+        """Carrega la pàgina següent quan el desplaçament s'acosta al final de la llista."""
+        if self.shown_count >= len(self.display_rows):
+            return
+        if e.max_scroll_extent is not None and e.pixels >= e.max_scroll_extent - self.RESULTS_PREFETCH_PX:
+            self.show_more_results()
+
     def clear_filters(self, e=None):
         """Neteja els filtres."""
         self.province_dropdown.value = "TOTES LES PROVÍNCIES"
         self.grade_dropdown.value = "TOTS ELS GRAUS"
+        self.search_field.value = ""
+        self.radius_dropdown.value = self.NO_RADIUS
+        self.near_dropdown.value = self.NO_NEAR
+        self.sort_dropdown.value = self.SORT_DEFAULT
+        self.turno_dropdown.value = "TOTS ELS TORNS"
         
-        self.cycle_dropdown.options.clear()
-        self.cycle_dropdown.options.append(ft.dropdown.Option("TOTS ELS CICLES/CURSOS"))
-        self.cycle_dropdown.options.extend([ft.dropdown.Option(c) for c in self.CYCLES])
+        self.cycle_dropdown.options = self.dropdown_options('CICLO')
         self.cycle_dropdown.value = "TOTS ELS CICLES/CURSOS"
         
         self.update_results()
@@ -721,6 +1465,62 @@ class TabContent:
         """Inicialitza els resultats sense disparar l'actualització de la pàgina."""
         self.update_results()
 
+    @staticmethod
+    def restore_selection(dropdown: ft.Dropdown, value):
+        """Torna a seleccionar `value` si encara és una de les opcions del desplegable."""
+        if value is not None and any(option.key == value for option in dropdown.options):
+            dropdown.value = value
+
+    def set_data(self, df: pd.DataFrame):
+        """
+        Substitueix les dades de la pestanya (recàrrega en calent) i refresca opcions i resultats.
+        Els filtres seleccionats es mantenen si encara existeixen en les dades noves.
+        """
+        # Les consultes pendents eren sobre les dades velles
+        self.query_runner.cancel()
+        # Els índexs i les files de la llista es canvien sota el bloqueig: cap resultat ni tros de
+        # targetes d'un altre fil no pot llegir les files velles contra les dades noves
+        with self.query_runner.lock:
+            selected_province = self.province_dropdown.value
+            selected_grade = self.grade_dropdown.value
+            selected_cycle = self.cycle_dropdown.value
+            selected_turno = self.turno_dropdown.value
+            selected_near = self.near_dropdown.value
+
+            self.initial_df = df
+            self.indexes = QueryIndexes(df)
+            # Les targetes que queden es reemplacen amb el resultat nou; fins llavors no se n'afegeixen més
+            self.display_rows = self.display_rows[:0]
+            self.display_distances = None
+            self.shown_count = self.stream_target = 0
+            self.option_controls.clear()
+            self.PROVINCES = self.cached_values('PROVINCIA')
+            self.GRADES = self.cached_values('GRADO')
+            self.CYCLES = self.cached_values('CICLO')
+            self.TURNOS = self.cached_values('TURNO')
+
+            self.province_dropdown.options = self.dropdown_options('PROVINCIA')
+            self.province_dropdown.value = "TOTES LES PROVÍNCIES"
+            self.restore_selection(self.province_dropdown, selected_province)
+
+            self.grade_dropdown.options = self.dropdown_options('GRADO')
+            self.grade_dropdown.value = "TOTS ELS GRAUS"
+            self.restore_selection(self.grade_dropdown, selected_grade)
+
+            self.update_cycle_dropdown()
+            self.restore_selection(self.cycle_dropdown, selected_cycle)
+
+            self.turno_dropdown.options = self.dropdown_options('TURNO')
+            self.turno_dropdown.value = "TOTS ELS TORNS"
+            self.restore_selection(self.turno_dropdown, selected_turno)
+
+            # El catàleg (i per tant les localitats) també es pot haver recarregat
+            self.near_dropdown.options = self.near_options()
+            self.near_dropdown.value = self.NO_NEAR
+            self.restore_selection(self.near_dropdown, selected_near)
+
+            self.update_results()
+
 
 class ChatTab:
     """Pestanya de Chatbot connectada a AWS Bedrock amb el perfil projecte1."""
@@ -793,16 +1593,58 @@ class ChatTab:
         )
         
 def main(page: ft.Page):
-    """Funció principal de l'aplicació Flet amb pestanyes i mapa."""
-    
+    """
+    Funció principal de l'aplicació Flet amb pestanyes i mapa. La capçalera i la barra
+    de progrés es pinten de seguida; les pestanyes es construeixen quan les dades estan a punt.
+    """
+    session_start = time.perf_counter()
+
     page.title = "Oferta de Formació Professional 25/26 - CV"
     page.theme_mode = ft.ThemeMode.LIGHT
     page.padding = 20
     page.scroll = ft.ScrollMode.ADAPTIVE
     page.window_width = 1400
     page.window_height = 900
-    
-    if fp_standard_df.empty and fp_esp_df.empty:
+
+    header = ft.Row([
+        ft.Icon(ft.Icons.AUTO_STORIES, size=30, color=ft.Colors.BLUE_900),
+        ft.Text("Visor d'Oferta de Formació Professional - Generalitat Valenciana", 
+                size=28, weight=ft.FontWeight.W_900, color=ft.Colors.BLUE_900)
+    ])
+
+    loading_bar = ft.ProgressBar(value=data_loader.fraction, width=500, color=ft.Colors.BLUE_900)
+    loading_text = ft.Text(f"{data_loader.stage}...", size=14, color=ft.Colors.GREY_700)
+    loading_view = ft.Column([loading_bar, loading_text], spacing=10)
+
+    page.add(header, loading_view)
+    print(f"⏱️ Primera pintura de la sessió: {(time.perf_counter() - session_start) * 1000:.0f} ms.")
+
+    # Callbacks d'aquesta sessió que cal donar de baixa en desconnectar-se
+    session_callbacks = {}
+
+    def on_disconnect(e):
+        data_loader.unsubscribe(on_loader_progress)
+        if 'reload' in session_callbacks:
+            data_store.unsubscribe(session_callbacks['reload'])
+
+    page.on_disconnect = on_disconnect
+
+    def on_loader_progress(loader):
+        if not loader.done:
+            loading_bar.value = loader.fraction
+            loading_text.value = f"{loader.stage}..."
+            page.update()
+            return
+
+        page.controls.remove(loading_view)
+        if loader.error is not None or data_store.data is None:
+            show_load_error()
+        else:
+            build_tabs(data_store.data)
+        print(f"⏱️ Dades a punt a la sessió: {(time.perf_counter() - session_start) * 1000:.0f} ms "
+              f"(càrrega en segon pla: {loader.elapsed * 1000:.0f} ms).")
+
+    def show_load_error():
         page.add(
             ft.Text("❌ Error: No s'ha pogut carregar o processar l'oferta de FP.", 
                     size=20, weight=ft.FontWeight.BOLD, color=ft.Colors.RED),
@@ -810,90 +1652,107 @@ def main(page: ft.Page):
                     size=14, color=ft.Colors.GREY_700)
         )
         page.update()
-        return
-    
-    map_container_ref = ft.Ref[ft.Container]()
+
+    def build_tabs(current_data):
+        # Conjunt de dades vigent en acabar la càrrega (les recàrregues arriben per data_store)
+        fp_standard_df = current_data['FP_STANDARD']
+        fp_esp_df = current_data['FP_ESPECIALIZACION']
+
+        if fp_standard_df.empty and fp_esp_df.empty:
+            show_load_error()
+            return
+
+        map_container_ref = ft.Ref[ft.Container]()
     
-    tab_standard = TabContent(page, fp_standard_df, "FP Estàndard (Bàsic, Medi, Superior)", map_container_ref)
-    tab_especializacion = TabContent(page, fp_esp_df, "FP Cursos d'Especialització", map_container_ref)
-    tab_chat = ChatTab(page)
+        tab_standard = TabContent(page, fp_standard_df, "FP Estàndard (Bàsic, Medi, Superior)", map_container_ref)
+        tab_especializacion = TabContent(page, fp_esp_df, "FP Cursos d'Especialització", map_container_ref)
+        tab_chat = ChatTab(page)
+
+        # Recàrrega en calent: quan es publiquen dades noves, es refresquen les pestanyes d'aquesta sessió
+        def on_data_reloaded(data_frames):
+            tab_standard.set_data(data_frames['FP_STANDARD'])
+            tab_especializacion.set_data(data_frames['FP_ESPECIALIZACION'])
+
+        data_store.subscribe(on_data_reloaded)
+        session_callbacks['reload'] = on_data_reloaded
     
-    active_tab_content = ft.Ref[ft.Column]()
+        active_tab_content = ft.Ref[ft.Column]()
 
-    def tabs_changed(e):
-        # Amagar o mostrar el mapa segons la pestanya
-        map_container.visible = (e.control.selected_index != 2)
+        def tabs_changed(e):
+            # Amagar o mostrar el mapa segons la pestanya
+            map_container.visible = (e.control.selected_index != 2)
         
-        if e.control.selected_index == 0:
-            active_tab_content.current.controls[0] = tab_standard.content
-            tab_standard.show_all_centers()
-        elif e.control.selected_index == 1:
-            active_tab_content.current.controls[0] = tab_especializacion.content
-            tab_especializacion.show_all_centers()
-        elif e.control.selected_index == 2:
-            active_tab_content.current.controls[0] = tab_chat.content
+            if e.control.selected_index == 0:
+                active_tab_content.current.controls[0] = tab_standard.content
+                tab_standard.show_all_centers()
+            elif e.control.selected_index == 1:
+                active_tab_content.current.controls[0] = tab_especializacion.content
+                tab_especializacion.show_all_centers()
+            elif e.control.selected_index == 2:
+                active_tab_content.current.controls[0] = tab_chat.content
         
-        page.update()
+            page.update()
 
-    initial_map_content = ft.Column([
-        ft.Text(f"📍 Mapa de tots els centres ({len(fp_standard_df)} centres)", 
-               size=18, weight="bold"),
-        ft.Container(
-            WebView(
-                url=get_osm_url_all_centers(fp_standard_df),
-                expand=True
+        initial_map_content = ft.Column([
+            ft.Text(f"📍 Mapa de tots els centres ({len(fp_standard_df)} centres)", 
+                   size=18, weight="bold"),
+            ft.Container(
+                WebView(
+                    url=get_osm_url_all_centers(fp_standard_df),
+                    expand=True
+                ),
+                height=700,
+                border=ft.border.all(1, ft.Colors.GREY_300),
+                border_radius=10,
             ),
-            height=700,
-            border=ft.border.all(1, ft.Colors.GREY_300),
-            border_radius=10,
-        ),
-        ft.Text(f"Mostrant fins a 100 marcadors", size=12, color=ft.Colors.GREY_600)
-    ], spacing=10)
+            ft.Text(f"Mostrant fins a 100 marcadors", size=12, color=ft.Colors.GREY_600)
+        ], spacing=10)
     
-    map_container = ft.Container(
-        ref=map_container_ref,
-        content=initial_map_content,
-        expand=2,
-        padding=ft.padding.all(10)
-    )
+        map_container = ft.Container(
+            ref=map_container_ref,
+            content=initial_map_content,
+            expand=2,
+            padding=ft.padding.all(10)
+        )
 
-    header = ft.Row([
-        ft.Icon(ft.Icons.AUTO_STORIES, size=30, color=ft.Colors.BLUE_900),
-        ft.Text("Visor d'Oferta de Formació Professional - Generalitat Valenciana", 
-                size=28, weight=ft.FontWeight.W_900, color=ft.Colors.BLUE_900)
-    ])
-    
-    tabs_control = ft.Tabs(
-        selected_index=0,
-        on_change=tabs_changed,
-        tabs=[
-            ft.Tab(text="FP Estàndard", icon=ft.Icons.CLASS_OUTLINED),
-            ft.Tab(text="Especialització", icon=ft.Icons.STAR),
-            ft.Tab(text="Agent IA", icon=ft.Icons.SMART_TOY), 
-        ],
-        expand=True
-    )
+        tabs_control = ft.Tabs(
+            selected_index=0,
+            on_change=tabs_changed,
+            tabs=[
+                ft.Tab(text="FP Estàndard", icon=ft.Icons.CLASS_OUTLINED),
+                ft.Tab(text="Especialització", icon=ft.Icons.STAR),
+                ft.Tab(text="Agent IA", icon=ft.Icons.SMART_TOY), 
+            ],
+            expand=True
+        )
     
-    main_content_row = ft.Row(
-        controls=[
-            ft.Column(
-                ref=active_tab_content,
-                controls=[tab_standard.content],
-                expand=3,
-                scroll=ft.ScrollMode.AUTO
-            ),
-            ft.VerticalDivider(width=1, color=ft.Colors.GREY_300),
-            map_container,
-        ],
-        expand=True,
-        spacing=10
-    )
+        main_content_row = ft.Row(
+            controls=[
+                ft.Column(
+                    ref=active_tab_content,
+                    controls=[tab_standard.content],
+                    expand=3,
+                    scroll=ft.ScrollMode.AUTO
+                ),
+                ft.VerticalDivider(width=1, color=ft.Colors.GREY_300),
+                map_container,
+            ],
+            expand=True,
+            spacing=10
+        )
     
-    page.add(header, tabs_control, main_content_row)
+        page.add(tabs_control, main_content_row)
+
+        # Inicialitzar la primera pestanya (Això també crida a show_all_centers)
+        tab_standard.initialize_results()
 
-    # Inicialitzar la primera pestanya (Això també crida a show_all_centers)
-    tab_standard.initialize_results()
+    data_loader.subscribe(on_loader_progress)
+    data_loader.start()
 
 if __name__ == "__main__":
+    # La càrrega comença ja, en segon pla, mentre s'obri la finestra
+    data_loader.start()
+    # Recàrrega en calent: les sessions obertes reben les dades noves sense reiniciar
+    start_data_watcher()
     # S'utilitza AppView.FLET_APP per assegurar la correcta visualització del WebView (mapa)
     ft.app(target=main, view=ft.WEB_BROWSER)
\ No newline at end of file
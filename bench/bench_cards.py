@@ -0,0 +1,118 @@
+"""
+Benchmark del pool de targetes d'oferta (OfferCard): bytes que Flet envia
+al navegador per cada canvi de filtres, amb les targetes reutilitzades
+(el pool de la pestanya, que només reescriu les propietats que canvien)
+i amb targetes noves a cada consulta (buidant el pool, com abans). La
+connexió és la del servidor de sockets de Flet sense el socket: serialitza
+cada lot de comandes igual i en compta els bytes.
+
+Cal Flet 0.28 (el protocol de comandes d'aquesta versió).
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_cards.py [app_fp_api|app_fp_api_comarca] [canvis]
+"""
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import flet as ft  # noqa: E402
+from flet.core.local_connection import LocalConnection  # noqa: E402
+from flet.core.protocol import (  # noqa: E402
+    ClientActions,
+    ClientMessage,
+    CommandEncoder,
+    PageCommandsBatchResponsePayload,
+)
+
+
+class CountingConnection(LocalConnection):
+    """Connexió que processa les comandes com FletSocketServer però només compta els bytes del missatge."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_sent = 0
+        self.messages_sent = 0
+
+    def send_command(self, session_id, command):
+        result, message = self._process_command(command)
+        if message:
+            self._count(ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, [message]))
+        return result
+
+    def send_commands(self, session_id, commands):
+        results = []
+        messages = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ["add", "get"]:
+                results.append(result)
+            if message:
+                messages.append(message)
+        if messages:
+            self._count(ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def _count(self, message):
+        self.bytes_sent += len(json.dumps(message, cls=CommandEncoder, separators=(",", ":")).encode("utf-8"))
+        self.messages_sent += 1
+
+
+def run_changes(tab, conn, changes, pooled):
+    """Aplica cada canvi de filtres i torna (bytes, ms) mitjans per canvi."""
+    conn.bytes_sent = 0
+    elapsed = 0.0
+    for province, grade in changes:
+        if not pooled:
+            # Com abans: cap targeta muntada ni per reutilitzar
+            tab.card_pool.clear()
+            del tab.results_list_column.controls[1:]
+            tab.mounted_cards = 0
+        tab.province_dropdown.value = province
+        tab.grade_dropdown.value = grade
+        start = time.perf_counter()
+        tab.update_results()
+        tab.wait_results()
+        elapsed += time.perf_counter() - start
+    return conn.bytes_sent / len(changes), elapsed / len(changes) * 1000
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    n_changes = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+    offers = data['FP_STANDARD']
+
+    conn = CountingConnection()
+    page = ft.Page(conn, "bench", asyncio.new_event_loop())
+    tab = app.TabContent(page, offers, "FP", ft.Ref[ft.Container]())
+    page.add(tab.content)
+    tab.initialize_results()
+    tab.wait_results()
+
+    # Canvis de província i grau alternats (cada un mostra la primera pàgina de targetes)
+    provinces = ["TOTES LES PROVÍNCIES"] + tab.cached_values('PROVINCIA')
+    grades = ["TOTS ELS GRAUS"] + tab.cached_values('GRADO')
+    changes = [(provinces[i % len(provinces)], grades[(i // len(provinces)) % len(grades)])
+               for i in range(n_changes)]
+
+    fresh_bytes, fresh_ms = run_changes(tab, conn, changes, pooled=False)
+    pooled_bytes, pooled_ms = run_changes(tab, conn, changes, pooled=True)
+
+    print(f"Targetes d'oferta ({module_name}, {n_changes} canvis de filtres, "
+          f"{tab.RESULTS_PAGE_SIZE} targetes per pàgina)")
+    print(f"  Targetes noves:     {fresh_bytes / 1024:8.1f} KB/canvi | {fresh_ms:6.1f} ms/canvi")
+    print(f"  Pool reutilitzat:   {pooled_bytes / 1024:8.1f} KB/canvi | {pooled_ms:6.1f} ms/canvi | "
+          f"x{fresh_bytes / pooled_bytes:.1f} menys bytes")
+
+
+if __name__ == "__main__":
+    main()
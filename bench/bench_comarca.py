@@ -0,0 +1,119 @@
+"""
+Benchmark de l'assignació de comarques: l'antic get_comarca fila a fila
+(DataFrame.apply, amb la recerca lineal per subcadena) contra
+fp_comarca.ComarcaResolver, amb l'oferta completa i una còpia x`factor`
+on part de les localitats s'han escrit sense accents o amb text de més
+(perquè passen per la recerca per subcadena). També mostra les
+localitats on els dos resultats no coincideixen: són les que ara es
+resolen per una variant o un àlies de la clau del mapa
+(fp_comarca.LOCALITY_ALIASES) abans que per subcadena.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_comarca.py [factor]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import app_fp_api_comarca as app  # noqa: E402
+from fp_comarca import ComarcaResolver, strip_accents  # noqa: E402
+
+
+def legacy_get_comarca(comarca_data, provincia, localidad):
+    """Còpia de l'antic get_comarca (recerca lineal, accents llevats a cada clau)."""
+    provincia = str(provincia).strip().upper()
+    localidad = str(localidad).strip().upper()
+    if provincia in comarca_data:
+        if localidad in comarca_data[provincia]:
+            return comarca_data[provincia][localidad]
+        replacements = {
+            'À': 'A', 'Á': 'A', 'Â': 'A', 'È': 'E', 'É': 'E', 'Ê': 'E',
+            'Ì': 'I', 'Í': 'I', 'Î': 'I', 'Ò': 'O', 'Ó': 'O', 'Ô': 'O',
+            'Ù': 'U', 'Ú': 'U', 'Û': 'U', 'Ç': 'C', 'Ñ': 'N'
+        }
+        localidad_normalizada = localidad
+        for orig, repl in replacements.items():
+            localidad_normalizada = localidad_normalizada.replace(orig, repl)
+        for loc_key, comarca in comarca_data[provincia].items():
+            loc_key_normalizada = loc_key
+            for orig, repl in replacements.items():
+                loc_key_normalizada = loc_key_normalizada.replace(orig, repl)
+            if (loc_key_normalizada == localidad_normalizada or
+                    localidad_normalizada in loc_key_normalizada or
+                    loc_key_normalizada in localidad_normalizada):
+                return comarca
+        if 'DE LA PLANA' in localidad:
+            localidad_simple = localidad.replace('DE LA PLANA', '').strip()
+            if localidad_simple in comarca_data[provincia]:
+                return comarca_data[provincia][localidad_simple]
+    if provincia == 'VALÈNCIA':
+        return 'CIUTAT DE VALÈNCIA'
+    elif provincia == 'ALACANT':
+        return 'ALACANTÍ'
+    elif provincia == 'CASTELLÓ':
+        return 'PLANA ALTA'
+    return f'NO DEFINIDA - {provincia}'
+
+
+def variant_copy(df, factor):
+    """Còpia x`factor`: a cada còpia, una de cada tres localitats canviada (sense accents o amb sufix)."""
+    copies = [df]
+    for i in range(1, factor):
+        copy = df.copy()
+        changed = np.arange(len(copy)) % 3 == i % 3
+        localidad = copy['LOCALIDAD'].astype(str)
+        altered = localidad.map(strip_accents) if i % 2 else localidad + f" {i}"
+        copy['LOCALIDAD'] = localidad.where(~changed, altered)
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def run(label, df, comarca_data, resolver):
+    start = time.perf_counter()
+    legacy = df.apply(lambda row: legacy_get_comarca(comarca_data, row['PROVINCIA'], row['LOCALIDAD']), axis=1)
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    resolved = resolver.resolve(df['PROVINCIA'], df['LOCALIDAD'])
+    t_resolver = time.perf_counter() - start
+
+    differs = legacy.astype(object).to_numpy() != resolved.astype(object).to_numpy()
+    changed = df[differs].assign(ANTIGA=legacy[differs], NOVA=resolved[differs]).drop_duplicates()
+    print(f"  {label:<22} {len(df):7} files | fila a fila {t_legacy * 1000:9.1f} ms | "
+          f"índex {t_resolver * 1000:7.1f} ms | x{t_legacy / t_resolver:7.1f} | "
+          f"diferents: {len(changed)} localitats | subcadena: {len(resolver.substring_hits)} localitats")
+    for row in changed.head(10).itertuples(index=False):
+        print(f"     {row.PROVINCIA} / {row.LOCALIDAD}: {row.ANTIGA} -> {row.NOVA}")
+
+
+def main():
+    factor = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    data = app.data_loader.wait()
+    if len(app.center_catalog) == 0:
+        # Dades d'una instantània: el catàleg no s'ha llegit
+        app.load_center_coordinates(app.CENTER_COORDS_FILE)
+        app.load_comarcas_data(app.center_catalog)
+
+    offers = pd.concat([data['FP_STANDARD'], data['FP_ESPECIALIZACION']], ignore_index=True)
+    offers = offers[['PROVINCIA', 'LOCALIDAD']].astype(str)
+
+    start = time.perf_counter()
+    resolver = ComarcaResolver(app.COMARCA_DATA)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print()
+    print(f"Benchmark de comarques ({sum(len(v) for v in app.COMARCA_DATA.values())} localitats al mapa)")
+    print(f"  Construcció de l'índex: {build_ms:.1f} ms")
+    run("Oferta completa", offers, app.COMARCA_DATA, resolver)
+    run(f"Còpia amb variants x{factor}", variant_copy(offers, factor), app.COMARCA_DATA, resolver)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de la reprojecció de centres: un pyproj.Transformer nou per
+centre (com feia prova.utm_to_latlon) contra fp_coords (Transformer en
+memòria cau i columnes senceres), amb el WKT de 12_Centros(Valencia).csv.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_coords.py [centres_per_call]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import fp_coords  # noqa: E402
+from fp_coords import latlon_to_utm, parse_wkt_points, utm_to_latlon  # noqa: E402
+
+
+def per_call_transformer(x, y):
+    """Com l'antic prova.utm_to_latlon: Transformer nou a cada crida."""
+    import pyproj
+    result = []
+    for easting, northing in zip(x, y):
+        transformer = pyproj.Transformer.from_crs("EPSG:25830", "EPSG:4326", always_xy=True)
+        lon, lat = transformer.transform(easting, northing)
+        result.append((lat, lon))
+    return result
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    per_call = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    wkt = pd.read_csv("12_Centros(Valencia).csv", usecols=['WKT'], dtype=str)['WKT']
+    parse_ms, (x, y) = timed(parse_wkt_points, wkt)
+    print(f"Parser WKT: {parse_ms:7.1f} ms ({len(wkt)} punts)")
+
+    fwd_ms, (lat, lon) = timed(utm_to_latlon, x, y)
+    back_ms, (bx, by) = timed(latlon_to_utm, lat, lon)
+    error = max(np.nanmax(np.abs(bx - x)), np.nanmax(np.abs(by - y)))
+    print(f"fp_coords 25830 -> 4326: {fwd_ms:7.1f} ms   4326 -> 25830: {back_ms:7.1f} ms   "
+          f"(error d'anada i tornada {error:.1e} m, pyproj: {fp_coords.PYPROJ_AVAILABLE})")
+
+    if fp_coords.PYPROJ_AVAILABLE:
+        old_ms, _ = timed(per_call_transformer, x[:per_call], y[:per_call], repeat=1)
+        print(f"Transformer per crida: {old_ms:7.1f} ms per a {per_call} centres "
+              f"(~{old_ms / per_call * len(wkt):.0f} ms per a tots)")
+
+        fp_coords.PYPROJ_AVAILABLE = False
+        try:
+            series_ms, (slat, slon) = timed(utm_to_latlon, x, y)
+        finally:
+            fp_coords.PYPROJ_AVAILABLE = True
+        diff = max(np.nanmax(np.abs(slat - lat)), np.nanmax(np.abs(slon - lon)))
+        print(f"Sèries de Krüger (sense pyproj): {series_ms:7.1f} ms (diferència màxima {diff:.1e}°)")
+
+
+if __name__ == "__main__":
+    main()
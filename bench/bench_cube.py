@@ -0,0 +1,70 @@
+"""
+Benchmark del cub d'ofertes i unitats (fp_cube): temps de construcció
+dels 64 cuboides i consultes de desglossament (per una dimensió, amb un o
+dos filtres) respostes des del cub contra el mateix càlcul amb màscares i
+groupby sobre el DataFrame. Comprova que els resultats són idèntics.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_cube.py [app_fp_api|app_fp_api_comarca] [consultes]
+"""
+import importlib
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_cube import UnitsCube  # noqa: E402
+
+
+def pandas_breakdown(df, dimension, filters):
+    """Desglossament directe: màscares, groupby i ordenació per unitats."""
+    subset = df
+    for col, value in filters.items():
+        subset = subset[subset[col].astype(str).str.strip() == value]
+    grouped = subset.groupby(subset[dimension].astype(str).str.strip())['UNIDADES'].agg(['size', 'sum'])
+    grouped = grouped.sort_values(['sum', 'size'], ascending=False)
+    return [(value, int(count), int(units)) for value, (count, units) in grouped.iterrows()]
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+
+    print(f"Cub d'unitats ({module_name}, {n_queries} consultes)")
+    rng = random.Random(0)
+    for name, df in data.items():
+        start = time.perf_counter()
+        cube = UnitsCube(df)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        queries = []
+        for _ in range(n_queries):
+            dimension = rng.choice(cube.dimensions)
+            others = [dim for dim in cube.dimensions if dim != dimension]
+            filters = {dim: str(df[dim].iloc[rng.randrange(len(df))]).strip()
+                       for dim in rng.sample(others, rng.randint(1, 2))}
+            queries.append((dimension, filters))
+
+        start = time.perf_counter()
+        found = [cube.breakdown(dimension, filters) for dimension, filters in queries]
+        t_cube = (time.perf_counter() - start) / n_queries * 1e6
+
+        start = time.perf_counter()
+        expected = [pandas_breakdown(df, dimension, filters) for dimension, filters in queries]
+        t_pandas = (time.perf_counter() - start) / n_queries * 1e6
+
+        identical = sum(sorted(f) == sorted(e) for f, e in zip(found, expected))
+        print(f"  {name:<20} {len(df):6} files | {len(cube.cuboids)} cuboides, {cube.n_cells} cel·les en {build_ms:.1f} ms")
+        print(f"  {'':<20} cub {t_cube:8.1f} µs/consulta | pandas {t_pandas:8.1f} µs/consulta | "
+              f"x{t_pandas / t_cube:.1f} | idèntics: {identical}/{n_queries}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark dels filtres de les pestanyes: màscares encadenades sobre còpies
+del DataFrame (com feien TabContent.update_results i els desplegables)
+contra l'índex invertit de fp_filter, amb FP_STANDARD repetit `factor`
+vegades i combinacions aleatòries de filtres. També mesura les facetes
+de tots els desplegables, amb un CICLO diferent per còpia (milers de
+cicles distints): només el recompte i el recompte amb els textos de les
+opcions, reescrits opció a opció (com abans) o amb FacetLabels.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_filter.py [app_fp_api|app_fp_api_comarca] [factor] [consultes]
+"""
+import importlib
+import os
+import random
+import statistics
+import sys
+import time
+
+import flet as ft
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_filter import FacetLabels, FilterIndex, facet_label  # noqa: E402
+
+
+def chained_masks(df, filters):
+    """Com abans: còpia inicial, una màscara per filtre i còpia final."""
+    filtered_df = df.copy()
+    for col, value in filters.items():
+        filtered_df = filtered_df[filtered_df[col] == value]
+    return filtered_df.copy()
+
+
+def random_filters(df, columns, rng):
+    chosen = rng.sample(columns, rng.randint(1, min(4, len(columns))))
+    return {col: rng.choice(df[col].dropna().unique().tolist()) for col in chosen}
+
+
+def timings_ms(func, queries):
+    result = []
+    for filters in queries:
+        start = time.perf_counter()
+        func(filters)
+        result.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def report(label, timings):
+    p99 = np.percentile(timings, 99)
+    print(f"  {label:<44} mediana {statistics.median(timings):8.3f} ms   p99 {p99:8.3f} ms")
+
+
+DROPDOWN_COLUMNS = ['PROVINCIA', 'COMARCA', 'LOCALIDAD', 'GRADO', 'CICLO']
+
+
+ALL_OPTION = "TOTS"
+
+
+def all_facets(index, filters, options=None, labels=None):
+    """
+    Com TabContent.update_facets: una faceta per desplegable amb la resta de filtres i, amb
+    `options`, els textos de les opcions (amb FacetLabels si es passen `labels`, si no opció a opció).
+    """
+    for col in DROPDOWN_COLUMNS:
+        if col not in index.columns:
+            continue
+        others = {c: v for c, v in filters.items() if c != col}
+        facet = index.facet(col, others, 'UNIDADES')
+        if options is None:
+            continue
+        if labels is not None:
+            labels[col].apply(options[col], facet)
+            continue
+        for option in options[col]:
+            if option.key == ALL_OPTION:
+                option.text = facet_label(ALL_OPTION, facet.total_count, facet.total_weight)
+            else:
+                option.text = facet_label(option.key, *facet.get(option.key))
+
+
+def dropdown_options(index, columns):
+    return {col: [ft.dropdown.Option(ALL_OPTION)] + [ft.dropdown.Option(v) for v in index.values(col)]
+            for col in columns}
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    factor = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    n_queries = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+
+    app = importlib.import_module(module_name)
+    base = app.data_loader.wait()['FP_STANDARD']
+    df = pd.concat([base] * factor, ignore_index=True)
+
+    start = time.perf_counter()
+    index = FilterIndex(df)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(0)
+    queries = [random_filters(df, index.columns, rng) for _ in range(n_queries)]
+
+    print(f"Benchmark de filtres ({module_name}, {len(df)} files = {factor}x, {n_queries} consultes)")
+    print(f"  Construcció de l'índex: {build_ms:.1f} ms ({len(index.columns)} columnes)")
+    report("Màscares encadenades + còpies", timings_ms(lambda f: chained_masks(df, f), queries[:50]))
+    report("Índex: files que compleixen", timings_ms(index.rows, queries))
+    report("Índex: opcions de CICLO", timings_ms(lambda f: index.values('CICLO', f), queries))
+    report("Índex: files + DataFrame resultat", timings_ms(lambda f: index.take(index.rows(f)), queries))
+
+    # Un CICLO distint per còpia: milers de valors a la faceta de cicles
+    copy_number = np.repeat(np.arange(factor), len(base)).astype(str)
+    many_cycles = df.assign(CICLO=df['CICLO'].astype(str) + " #" + copy_number)
+    many_index = FilterIndex(many_cycles)
+    dropdown_columns = [col for col in DROPDOWN_COLUMNS if col in many_index.columns]
+    cycle_queries = [random_filters(many_cycles, dropdown_columns, rng) for _ in range(n_queries)]
+    n_cycles = len(many_index.values('CICLO'))
+    print(f"  Facetes dels desplegables ({n_cycles} cicles):")
+    report("recompte", timings_ms(lambda f: all_facets(many_index, f), cycle_queries))
+    options = dropdown_options(many_index, dropdown_columns)
+    report("recompte + textos opció a opció", timings_ms(lambda f: all_facets(many_index, f, options), cycle_queries))
+    options = dropdown_options(many_index, dropdown_columns)
+    labels = {col: FacetLabels(ALL_OPTION) for col in dropdown_columns}
+    report("recompte + textos amb FacetLabels", timings_ms(lambda f: all_facets(many_index, f, options, labels), cycle_queries))
+    # Mateixos textos que opció a opció
+    reference = dropdown_options(many_index, dropdown_columns)
+    all_facets(many_index, cycle_queries[-1], reference)
+    same = all(a.text == b.text for col in dropdown_columns for a, b in zip(options[col], reference[col]))
+    print(f"  Textos idèntics: {same}")
+
+
+if __name__ == "__main__":
+    main()
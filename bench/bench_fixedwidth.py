@@ -0,0 +1,71 @@
+"""
+Benchmark del lector de l'exportació del PDF: la conversió antiga
+(readlines + split per 2 o més espais, com feia convertiracsv.py) contra
+el lector en streaming de fp_fixedwidth, amb grado.csv.txt,
+especializacion.txt i una exportació sintètica de diverses regions
+(grado.csv.txt concatenat `factor` vegades).
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_fixedwidth.py [factor]
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_fixedwidth import read_offer_txt  # noqa: E402
+
+_SPLIT_RE = re.compile(r'\s{2,}')
+
+
+def read_by_regex_split(file_path):
+    """Conversió antiga: totes les línies en memòria i columnes genèriques col_N."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f.readlines() if line.strip()][1:]
+    data = [_SPLIT_RE.split(line) for line in lines]
+    max_cols = max(len(row) for row in data)
+    for row in data:
+        row.extend([""] * (max_cols - len(row)))
+    return pd.DataFrame(data, columns=[f"col_{i + 1}" for i in range(max_cols)])
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    factor = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    with open("grado.csv.txt", "r", encoding="utf-8") as f:
+        grado_text = f.read()
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', encoding='utf-8', delete=False) as tmp:
+        tmp.write(grado_text * factor)
+        multi_path = tmp.name
+
+    try:
+        for label, path in [("grado.csv.txt", "grado.csv.txt"),
+                            ("especializacion.txt", "especializacion.txt"),
+                            (f"grado.csv.txt x{factor}", multi_path)]:
+            old_ms, old_df = timed(read_by_regex_split, path)
+            new_ms, new_df = timed(read_offer_txt, path)
+            print(f"{label:<24} split regex: {old_ms:8.1f} ms ({old_df.shape[1]} col_N)   "
+                  f"streaming: {new_ms:8.1f} ms ({len(new_df)} files, {new_df['CENTRO'].eq('').sum()} sense centre)")
+    finally:
+        os.remove(multi_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark de la geocodificació: get_consistent_coords fila a fila (apply)
+contra geocode_offers vectoritzat, amb el conjunt complet d'ofertes i amb
+una còpia sintètica x100 (centres renombrats perquè passen per la simulació).
+També comprova que els dos resultats són idèntics bit a bit.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_geocode.py [app_fp_api|app_fp_api_comarca]
+"""
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_geocode import geocode_offers  # noqa: E402
+
+
+def synthetic_copy(df, factor):
+    """Còpia x`factor`: la primera còpia és l'original, la resta amb centres inexistents."""
+    copies = [df]
+    for i in range(1, factor):
+        copy = df.copy()
+        copy['CENTRO'] = copy['CENTRO'] + f" #{i}"
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def run(app, label, df):
+    # Reiniciar la caché perquè la versió fila a fila no aprofite simulacions anteriors
+    app.coords_cache.clear()
+    app.coords_cache.update(app.coords_catalog.to_dict('index'))
+
+    start = time.perf_counter()
+    rowwise = df.apply(app.get_consistent_coords, axis=1)
+    t_rowwise = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = geocode_offers(df, app.coords_catalog, app.PROVINCE_CENTER_COORDS)
+    t_vectorized = time.perf_counter() - start
+
+    identical = np.array_equal(rowwise[['latitud', 'longitud']].to_numpy(), vectorized.to_numpy())
+    print(f"  {label:<22} {len(df):>8} files | fila a fila {t_rowwise * 1000:9.1f} ms | "
+          f"vectoritzat {t_vectorized * 1000:7.1f} ms | x{t_rowwise / t_vectorized:6.1f} | idèntic: {identical}")
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api"
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+
+    # El catàleg real s'ha de carregar encara que les dades vinguen d'una instantània
+    app.load_center_coordinates(app.CENTER_COORDS_FILE)
+
+    offers = pd.concat(
+        [data['FP_STANDARD'], data['FP_ESPECIALIZACION']], ignore_index=True
+    ).drop(columns=['latitud', 'longitud'])
+    # Les columnes categòriques tornen a text per poder generar centres sintètics
+    offers = offers.astype({col: str for col in offers.columns if isinstance(offers[col].dtype, pd.CategoricalDtype)})
+
+    print()
+    print(f"Benchmark de geocodificació ({module_name})")
+    run(app, "Conjunt complet", offers)
+    run(app, "Còpia sintètica x100", synthetic_copy(offers, 100))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark i revisió de la coincidència aproximada de centres (fp_match):
+temps de construcció dels índexs del catàleg, temps per resoldre tots els
+centres distints de l'oferta que no tenen clau exacta, recompte per mètode
+i els centres amb menys confiança. Opcionalment guarda la taula completa
+per revisar-la i copiar les correccions a center_overrides.csv.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_match.py [app_fp_api|app_fp_api_comarca] [informe.csv]
+"""
+import importlib
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_geocode import build_center_key  # noqa: E402
+from fp_match import CenterMatcher, load_overrides  # noqa: E402
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    report_file = sys.argv[2] if len(sys.argv) > 2 else None
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+    if len(app.center_catalog) == 0:
+        # Dades d'una instantània: el catàleg no s'ha llegit
+        app.load_center_coordinates(app.CENTER_COORDS_FILE)
+
+    offers = pd.concat([data['FP_STANDARD'], data['FP_ESPECIALIZACION']], ignore_index=True)
+    offers = offers[['PROVINCIA', 'LOCALIDAD', 'CENTRO']].astype(str)
+    missing = offers[~build_center_key(offers).isin(app.coords_catalog.index)].drop_duplicates()
+
+    start = time.perf_counter()
+    matcher = CenterMatcher(app.center_catalog.frame, load_overrides(app.CENTER_OVERRIDES_FILE))
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    matcher.resolve(missing['PROVINCIA'], missing['LOCALIDAD'], missing['CENTRO'])
+    resolve_ms = (time.perf_counter() - start) * 1000
+
+    report = matcher.report(missing['PROVINCIA'], missing['LOCALIDAD'], missing['CENTRO'])
+
+    print(f"Coincidència de centres ({module_name}, catàleg de {len(matcher)} centres)")
+    print(f"  Construcció dels índexs: {build_ms:.1f} ms")
+    print(f"  {len(missing)} centres sense clau exacta resolts en {resolve_ms:.1f} ms")
+    for method, count in report['MÈTODE'].value_counts().items():
+        print(f"    {method:<20} {count:5}")
+
+    print("  Menys confiança:")
+    with pd.option_context('display.width', 200, 'display.max_colwidth', 40):
+        print(report.head(10)[['LOCALIDAD', 'CENTRO', 'CENTRO_CATALEG', 'CONFIANÇA', 'MÈTODE']].to_string(index=False))
+
+    if report_file:
+        report.to_csv(report_file, index=False)
+        print(f"💾 Informe complet guardat a '{report_file}'.")
+
+
+if __name__ == "__main__":
+    main()
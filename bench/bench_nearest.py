@@ -0,0 +1,94 @@
+"""
+Benchmark del mode "a prop de" (fp_nearest): els K centres més propers a
+una localitat que ofereixen un cicle (i grau), amb l'índex compartit i
+amb l'enfocament directe en pandas (filtrar, distància de cada fila,
+drop_duplicates per centre i ordenar). Després simula moltes sessions
+fent consultes alhora des d'un ThreadPoolExecutor sobre el mateix índex.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_nearest.py [app_fp_api|app_fp_api_comarca] [consultes] [sessions]
+"""
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_filter import get_filter_index  # noqa: E402
+from fp_nearest import DEFAULT_K, NearestCenters, locality_points  # noqa: E402
+from fp_spatial import haversine_km  # noqa: E402
+
+
+def pandas_nearest(df, filters, lat, lon, k):
+    """Centres més propers sense índex: màscares, distància per fila i ordenació."""
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in filters.items():
+        mask &= (df[col] == value).to_numpy()
+    subset = df[mask]
+    subset = subset[(subset['latitud'] != 0.0) | (subset['longitud'] != 0.0)]
+    subset = subset.assign(DISTANCIA_KM=haversine_km(subset['latitud'].to_numpy(dtype=float),
+                                                     subset['longitud'].to_numpy(dtype=float), lat, lon))
+    centers = subset.drop_duplicates(subset=['PROVINCIA', 'LOCALIDAD', 'CENTRO']).nsmallest(k, 'DISTANCIA_KM')
+    return subset.merge(centers[['PROVINCIA', 'LOCALIDAD', 'CENTRO']]).sort_values('DISTANCIA_KM')
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    n_sessions = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+    offers = data['FP_STANDARD']
+
+    start = time.perf_counter()
+    index = NearestCenters(offers)
+    build_ms = (time.perf_counter() - start) * 1000
+    filter_index = get_filter_index(offers)
+    points = locality_points(offers['PROVINCIA'], offers['LOCALIDAD'], offers['latitud'], offers['longitud'])
+
+    # Consultes: localitat a l'atzar i cicle (amb el seu grau) a l'atzar
+    rng = np.random.default_rng(0)
+    combos = offers[['CICLO', 'GRADO']].drop_duplicates().astype(str).to_numpy()
+    queries = []
+    for _ in range(n_queries):
+        cycle, grade = combos[rng.integers(len(combos))]
+        point = points.iloc[rng.integers(len(points))]
+        queries.append(({'CICLO': cycle, 'GRADO': grade}, float(point['LATITUD']), float(point['LONGITUD'])))
+
+    def indexed(query):
+        filters, lat, lon = query
+        return index.nearest(lat, lon, filter_index.rows(filters), DEFAULT_K)
+
+    start = time.perf_counter()
+    results = [indexed(q) for q in queries]
+    t_index = (time.perf_counter() - start) / n_queries * 1e6
+
+    start = time.perf_counter()
+    expected = [pandas_nearest(offers, *q, DEFAULT_K) for q in queries]
+    t_pandas = (time.perf_counter() - start) / n_queries * 1e6
+
+    same = sum(len(rows) == len(frame) for (rows, _, _), frame in zip(results, expected))
+
+    print(f"Centres més propers ({module_name}, {len(offers)} ofertes, {index.n_centers} centres, K={DEFAULT_K})")
+    print(f"  Construcció de l'índex: {build_ms:.1f} ms")
+    print(f"  Índex + filtres: {t_index:8.1f} µs/consulta | pandas: {t_pandas:8.1f} µs/consulta | "
+          f"x{t_pandas / t_index:.1f} | mateix nombre d'ofertes: {same}/{n_queries}")
+
+    # Moltes sessions alhora sobre el mateix índex (sense còpies per sessió)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        list(pool.map(indexed, queries * 4))
+    elapsed = time.perf_counter() - start
+    print(f"  {n_sessions} sessions, {4 * n_queries} consultes: {elapsed * 1000:.1f} ms "
+          f"({4 * n_queries / elapsed:.0f} consultes/s)")
+
+
+if __name__ == "__main__":
+    main()
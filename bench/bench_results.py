@@ -0,0 +1,91 @@
+"""
+Benchmark de la memòria cau de resultats compartida (fp_query): simula
+moltes sessions que fan consultes de filtres amb una distribució
+esbiaixada (la vista per defecte i unes poques províncies i graus
+populars) i compara el temps de la consulta completa (files, totals,
+ordre de la llista i URL del mapa) amb el d'un encert a la memòria cau.
+Mostra els comptadors d'encerts i errades.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_results.py [app_fp_api|app_fp_api_comarca] [consultes] [entrades]
+"""
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_cache import LRUCache  # noqa: E402
+from fp_filter import get_filter_index  # noqa: E402
+from fp_query import QueryResult, query_signature  # noqa: E402
+from fp_sort import get_sort_index  # noqa: E402
+
+
+def run_query(app, filter_index, sort_index, filters):
+    """La part de filtres de TabContent.compute_result: files, unitats, ordre per localitat i centre, mapa."""
+    rows = filter_index.rows(filters)
+    filtered_df = filter_index.take(rows)
+    order = sort_index.order(rows)
+    return QueryResult(rows, order, int(filtered_df['UNIDADES'].sum()), app.get_osm_url_all_centers(filtered_df))
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    maxsize = int(sys.argv[3]) if len(sys.argv) > 3 else 256
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+    offers = data['FP_STANDARD']
+    filter_index = get_filter_index(offers)
+    sort_index = get_sort_index(offers)
+
+    # Consultes: la meitat la vista per defecte, la resta província/grau/cicle amb pes decreixent (Zipf)
+    rng = np.random.default_rng(0)
+    provinces = filter_index.values('PROVINCIA')
+    grades = filter_index.values('GRADO')
+    cycles = filter_index.values('CICLO')
+    queries = []
+    for _ in range(n_queries):
+        filters = {}
+        if rng.random() >= 0.5:
+            filters['PROVINCIA'] = provinces[min(rng.zipf(2.0) - 1, len(provinces) - 1)]
+            if rng.random() < 0.5:
+                filters['GRADO'] = grades[min(rng.zipf(2.0) - 1, len(grades) - 1)]
+            if rng.random() < 0.3:
+                filters['CICLO'] = cycles[min(rng.zipf(1.5) - 1, len(cycles) - 1)]
+        queries.append(filters)
+
+    start = time.perf_counter()
+    for filters in queries:
+        run_query(app, filter_index, sort_index, filters)
+    t_engine = (time.perf_counter() - start) / n_queries * 1e3
+
+    cache = LRUCache(maxsize)
+    start = time.perf_counter()
+    for filters in queries:
+        cache.get_or_compute(query_signature(filter_index.token, filters),
+                             lambda: run_query(app, filter_index, sort_index, filters))
+    t_cached = (time.perf_counter() - start) / n_queries * 1e3
+
+    start = time.perf_counter()
+    for _ in range(n_queries):
+        cache.get(query_signature(filter_index.token, {}))
+    t_hit = (time.perf_counter() - start) / n_queries * 1e6
+    cache.hits -= n_queries  # les lectures de l'encert no compten per a la taxa de la simulació
+
+    stats = cache.stats()
+    print(f"Memòria cau de resultats ({module_name}, {n_queries} consultes, {len(set(map(str, queries)))} distintes)")
+    print(f"  Sense memòria cau: {t_engine:7.2f} ms/consulta")
+    print(f"  Amb memòria cau:   {t_cached:7.2f} ms/consulta | encert (vista per defecte): {t_hit:.1f} µs")
+    print(f"  Encerts {stats['hits']}, errades {stats['misses']} ({stats['hit_rate']:.0%}), "
+          f"{stats['entries']}/{stats['maxsize']} entrades")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark de la cerca lliure (fp_search): construcció de l'índex de
+trigrames i temps per tecla escrivint consultes lletra a lletra, amb
+FP_STANDARD + FP_ESPECIALIZACION repetits `factor` vegades. A cada còpia
+els centres porten un nom distint, de manera que el vocabulari creix amb
+el factor.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_search.py [app_fp_api|app_fp_api_comarca] [factor]
+"""
+import importlib
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_search import SearchIndex  # noqa: E402
+
+QUERIES = [
+    "ciberseguridad",
+    "mantenimento industrial",
+    "VALENCIA informatica",
+    "cuina alacant",
+    "sanitat castello",
+    "ies lluis vives",
+    "administracion y finanzas",
+]
+
+
+def keystrokes(query):
+    """Totes les prefixos de la consulta, com si s'escrivira lletra a lletra."""
+    return [query[:i] for i in range(1, len(query) + 1)]
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    factor = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+    base = pd.concat([data['FP_STANDARD'], data['FP_ESPECIALIZACION']], ignore_index=True)
+    df = pd.concat([base] * factor, ignore_index=True)
+    copy_number = np.repeat(np.arange(factor), len(base)).astype(str)
+    df['CENTRO'] = df['CENTRO'].astype(str) + " SEU" + copy_number
+
+    start = time.perf_counter()
+    index = SearchIndex(df)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Benchmark de cerca ({module_name}, {len(df)} files = {factor}x, {len(index.words)} paraules)")
+    print(f"  Construcció de l'índex: {build_ms:.1f} ms")
+
+    all_timings = []
+    for query in QUERIES:
+        timings = []
+        for typed in keystrokes(query):
+            start = time.perf_counter()
+            rows, _ = index.search(typed)
+            timings.append((time.perf_counter() - start) * 1000)
+        all_timings.extend(timings)
+        print(f"  {query!r:<30} {len(rows):7} files   màx. per tecla {max(timings):7.3f} ms")
+
+    print(f"  Per tecla: mediana {statistics.median(all_timings):.3f} ms   "
+          f"p99 {np.percentile(all_timings, 99):.3f} ms   màx. {max(all_timings):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark dels ordres de la llista precalculats (fp_sort): sobre una
+còpia gran de l'oferta (les files repetides N vegades), ordena el
+resultat de moltes consultes de filtres amb sort_values (com abans, per
+localitat i centre) i amb la permutació de SortIndex, per a cada ordre
+del selector, i comprova que l'ordre és el mateix que el de pandas. Per
+distància es compara amb un argsort de les distàncies de cada fila.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_sort.py [app_fp_api|app_fp_api_comarca] [còpies] [consultes]
+"""
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_filter import get_filter_index  # noqa: E402
+from fp_sort import DESCENDING_COLUMNS, SORT_COLUMNS, SORT_DISTANCE, SortIndex  # noqa: E402
+from fp_spatial import haversine_km  # noqa: E402
+
+
+def pandas_order(filtered_df, columns):
+    """L'ordre d'abans: sort_values sobre les files filtrades (posicions dins del resultat)."""
+    ascending = [col not in DESCENDING_COLUMNS for col in columns]
+    return filtered_df.reset_index(drop=True).sort_values(by=columns, ascending=ascending,
+                                                          kind='stable').index.to_numpy()
+
+
+def row_distances(filtered_df, lat, lon):
+    """Distància (km) de cada fila filtrada al punt, sense l'índex de centres."""
+    return haversine_km(filtered_df['latitud'].to_numpy(dtype=float), filtered_df['longitud'].to_numpy(dtype=float),
+                        lat, lon)
+
+
+def timed(queries, order):
+    """ms per consulta de `order(rows)` i els ordres obtinguts."""
+    start = time.perf_counter()
+    orders = [order(rows) for rows in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, orders
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    n_queries = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+    offers = pd.concat([data['FP_STANDARD']] * copies, ignore_index=True)
+    filter_index = get_filter_index(offers)
+
+    start = time.perf_counter()
+    sort_index = SortIndex(offers)
+    t_build = (time.perf_counter() - start) * 1000
+
+    # Consultes: totes les ofertes, per província, per grau i per província i grau
+    rng = np.random.default_rng(0)
+    provinces = filter_index.values('PROVINCIA')
+    grades = filter_index.values('GRADO')
+    queries = []
+    for _ in range(n_queries):
+        filters = {}
+        if rng.random() < 0.7:
+            filters['PROVINCIA'] = provinces[rng.integers(len(provinces))]
+        if rng.random() < 0.5:
+            filters['GRADO'] = grades[rng.integers(len(grades))]
+        queries.append(filter_index.rows(filters))
+    frames = [filter_index.take(rows) for rows in queries]
+    mean_rows = sum(len(rows) for rows in queries) / n_queries
+
+    print(f"Ordres de la llista ({module_name}, {len(offers)} ofertes, {n_queries} consultes, "
+          f"{mean_rows:.0f} files de mitjana) | permutacions construïdes en {t_build:.0f} ms")
+    for key, columns in SORT_COLUMNS.items():
+        frame_iter = iter(frames)
+        t_pandas, expected = timed(queries, lambda rows: pandas_order(next(frame_iter), columns))
+        t_index, orders = timed(queries, lambda rows: sort_index.order(rows, key))
+        ok = all(np.array_equal(a, b) for a, b in zip(orders, expected))
+        print(f"  {key:<10} sort_values {t_pandas:7.2f} ms | permutació {t_index:6.3f} ms | "
+              f"x{t_pandas / t_index:5.1f} | {'correcte' if ok else 'INCORRECTE'}")
+
+    # Per distància a un punt (València): argsort de la distància de cada fila contra els centres del resultat
+    lat, lon = 39.4699, -0.3763
+    frame_iter = iter(frames)
+    t_pandas, _ = timed(queries, lambda rows: np.argsort(row_distances(next(frame_iter), lat, lon), kind='stable'))
+    t_index, results = timed(queries, lambda rows: sort_index.distance_order(rows, lat, lon))
+    ok = all(np.all(np.diff(np.nan_to_num(distances[order], nan=np.inf)) >= 0) for order, distances in results)
+    print(f"  {SORT_DISTANCE:<10} argsort     {t_pandas:7.2f} ms | centres   {t_index:6.3f} ms | "
+          f"x{t_pandas / t_index:5.1f} | {'correcte' if ok else 'INCORRECTE'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark de l'índex espacial (fp_spatial): consultes per radi i per
+requadre sobre l'oferta i sobre els centres del catàleg, amb l'índex i
+amb la comparació de força bruta (haversine sobre totes les files), i
+la combinació amb els filtres dels desplegables (FilterIndex.rows).
+Comprova que els resultats són idèntics. Amb `factor` > 1 també mesura
+una còpia de l'oferta x`factor` amb els punts desplaçats a l'atzar uns
+quants km (amb poques dades, la força bruta en NumPy és competitiva).
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_spatial.py [app_fp_api|app_fp_api_comarca] [consultes] [factor]
+"""
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fp_filter import get_filter_index  # noqa: E402
+from fp_spatial import OfferSpatialIndex, SpatialIndex, haversine_km  # noqa: E402
+
+
+def brute_radius(lat, lon, lat0, lon0, radius_km):
+    """Posicions a menys de `radius_km` (haversine sobre totes les files)."""
+    return np.flatnonzero(haversine_km(lat, lon, lat0, lon0) <= radius_km)
+
+
+def brute_bbox(lat, lon, min_lat, min_lon, max_lat, max_lon):
+    return np.flatnonzero((lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon))
+
+
+def timed(fn, queries, repeat=3):
+    """Resultats i temps per consulta (µs): la millor de `repeat` passades (la primera paga la memòria freda)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(*q) for q in queries]
+        best = min(best, time.perf_counter() - start)
+    return results, best / len(queries) * 1e6
+
+
+def run(label, index, lat, lon, queries, radius_km):
+    """Radi i requadre amb l'índex i per força bruta."""
+    found, t_index = timed(lambda a, b: index.within_radius(a, b, radius_km), queries)
+    expected, t_brute = timed(lambda a, b: brute_radius(lat, lon, a, b, radius_km), queries)
+    identical = all(np.array_equal(f, e) for f, e in zip(found, expected))
+    print(f"  {label:<10} radi {radius_km:>4} km | índex {t_index:8.1f} µs | força bruta {t_brute:8.1f} µs | "
+          f"x{t_brute / t_index:6.1f} | mitjana {np.mean([len(f) for f in found]):7.1f} | idèntic: {identical}")
+
+    d = radius_km / 111.0
+    boxes = [(a - d, b - d, a + d, b + d) for a, b in queries]
+    found, t_index = timed(index.within_bbox, boxes)
+    expected, t_brute = timed(lambda *box: brute_bbox(lat, lon, *box), boxes)
+    identical = all(np.array_equal(f, e) for f, e in zip(found, expected))
+    print(f"  {label:<10} requadre     | índex {t_index:8.1f} µs | força bruta {t_brute:8.1f} µs | "
+          f"x{t_brute / t_index:6.1f} | idèntic: {identical}")
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    factor = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+    if len(app.center_catalog) == 0:
+        # Dades d'una instantània: el catàleg no s'ha llegit
+        app.load_center_coordinates(app.CENTER_COORDS_FILE)
+
+    offers = data['FP_STANDARD']
+    start = time.perf_counter()
+    offer_index = OfferSpatialIndex(offers)
+    offer_ms = (time.perf_counter() - start) * 1000
+
+    frame = app.center_catalog.frame
+    start = time.perf_counter()
+    center_index = SpatialIndex(frame['LATITUD'].to_numpy(dtype=float), frame['LONGITUD'].to_numpy(dtype=float))
+    center_ms = (time.perf_counter() - start) * 1000
+
+    # Punts de consulta: centres reals de l'oferta
+    rng = np.random.default_rng(0)
+    points = offers[['latitud', 'longitud']].to_numpy(dtype=float)
+    points = points[(points != 0.0).all(axis=1) & np.isfinite(points).all(axis=1)]
+    queries = [tuple(points[i]) for i in rng.integers(0, len(points), n_queries)]
+
+    print(f"Índex espacial ({module_name}, {n_queries} consultes)")
+    print(f"  Construcció: oferta {len(offer_index)} punts en {offer_ms:.1f} ms | "
+          f"centres {len(center_index)} punts en {center_ms:.1f} ms")
+
+    offer_lat = offers['latitud'].to_numpy(dtype=float)
+    offer_lon = offers['longitud'].to_numpy(dtype=float)
+    center_lat = frame['LATITUD'].to_numpy(dtype=float)
+    center_lon = frame['LONGITUD'].to_numpy(dtype=float)
+    for radius_km in (1, 5, 25):
+        run("Oferta", offer_index, offer_lat, offer_lon, queries, radius_km)
+        run("Centres", center_index, center_lat, center_lon, queries, radius_km)
+
+    if factor > 1:
+        jitter = rng.normal(0.0, 0.03, size=(factor * len(offer_lat), 2))
+        big_lat = np.tile(offer_lat, factor) + jitter[:, 0]
+        big_lon = np.tile(offer_lon, factor) + jitter[:, 1]
+        start = time.perf_counter()
+        big_index = SpatialIndex(big_lat, big_lon)
+        print(f"  Còpia x{factor}: {len(big_index)} punts en {(time.perf_counter() - start) * 1000:.1f} ms")
+        for radius_km in (1, 5, 25):
+            run(f"x{factor}", big_index, big_lat, big_lon, queries, radius_km)
+
+    # Composició amb els filtres dels desplegables
+    filter_index = get_filter_index(offers)
+    grade = str(offers['GRADO'].iloc[0])
+    rows = filter_index.rows({'GRADO': grade})
+    found, t_index = timed(lambda a, b: offer_index.within_radius(a, b, 25, rows), queries)
+    start = time.perf_counter()
+    for a, b in queries:
+        mask = pd.Series(False, index=offers.index)
+        mask.iloc[brute_radius(offer_lat, offer_lon, a, b, 25)] = True
+        offers[mask & (offers['GRADO'] == grade)]
+    t_pandas = (time.perf_counter() - start) / len(queries) * 1e6
+    print(f"  Radi 25 km + GRADO={grade}: índex {t_index:.1f} µs | màscares pandas {t_pandas:.1f} µs | "
+          f"mitjana {np.mean([len(f) for f in found]):.1f} ofertes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark d'arrancada en fred i en calent de load_and_clean_data.
+
+En fred s'esborra la instantània abans de cada càrrega (es llegeixen i es
+netegen els CSV); en calent es carrega la instantània Parquet ja guardada.
+També es mesura la importació del mòdul, que ja no carrega les dades.
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_startup.py [app_fp_api|app_fp_api_comarca] [repeticions]
+"""
+import importlib
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import fp_snapshot  # noqa: E402
+
+
+def time_call(func, repeats, before=None):
+    timings = []
+    for _ in range(repeats):
+        if before:
+            before()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api"
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    if not fp_snapshot.PARQUET_AVAILABLE:
+        print("❌ pyarrow no està instal·lat: no es poden guardar instantànies Parquet.")
+        return
+
+    start = time.perf_counter()
+    app = importlib.import_module(module_name)
+    import_ms = (time.perf_counter() - start) * 1000
+
+    clear = lambda: fp_snapshot.clear_snapshot(app.SNAPSHOT_NAME)
+    cold = time_call(app.load_and_clean_data, repeats, before=clear)
+    warm = time_call(app.load_and_clean_data, repeats)
+
+    print()
+    print(f"Benchmark d'arrancada ({module_name}, {repeats} repeticions)")
+    print(f"  Importació del mòdul (sense dades):    {import_ms:8.1f} ms")
+    print(f"  Fred  (CSV + neteja + geocodificació): mediana {statistics.median(cold) * 1000:8.1f} ms")
+    print(f"  Calent (instantània Parquet):          mediana {statistics.median(warm) * 1000:8.1f} ms")
+    print(f"  Acceleració: x{statistics.median(cold) / statistics.median(warm):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark de les targetes en trossos (TabContent.stream_results): temps
+fins que es veuen els comptadors i les primeres targetes i fins que la
+pàgina és completa, amb la pàgina sencera en un sol page.update (com
+abans) i a trossos de mida adaptativa. La connexió compta els bytes com
+bench_cards.py i espera el temps que tardarien a passar per un enllaç de
+`KB/s` (0 = sense espera). També comprova que una consulta nova atura
+les targetes de l'anterior.
+
+Cal Flet 0.28 (com bench_cards.py).
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_stream.py [app_fp_api|app_fp_api_comarca] [consultes] [KB/s]
+"""
+import asyncio
+import importlib
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import flet as ft  # noqa: E402
+from bench_cards import CountingConnection  # noqa: E402
+from fp_worker import ChunkSizer  # noqa: E402
+
+
+class LinkConnection(CountingConnection):
+    """Connexió que, a més de comptar els bytes, espera el que tardarien a enviar-se a `kb_per_s`."""
+
+    def __init__(self, kb_per_s):
+        super().__init__()
+        self.kb_per_s = kb_per_s
+
+    def _count(self, message):
+        before = self.bytes_sent
+        super()._count(message)
+        if self.kb_per_s:
+            time.sleep((self.bytes_sent - before) / 1024 / self.kb_per_s)
+
+
+def instrument(tab):
+    """Registra el final de cada apply_result i la mida de cada tros de targetes."""
+    events = {'applied': [], 'chunks': []}
+    apply_result, append_cards = tab.apply_result, tab.append_cards
+
+    def timed_apply(result):
+        apply_result(result)
+        events['applied'].append(time.perf_counter())
+
+    def counted_append(count):
+        cards = append_cards(count)
+        events['chunks'].append(len(cards))
+        return cards
+
+    tab.apply_result, tab.append_cards = timed_apply, counted_append
+    return events
+
+
+def run_queries(tab, events, changes):
+    """Temps mitjans (ms) fins als comptadors + primer tros i fins a la pàgina completa."""
+    first, full = [], []
+    for province, grade in changes:
+        tab.province_dropdown.value = province
+        tab.grade_dropdown.value = grade
+        events['applied'].clear()
+        start = time.perf_counter()
+        tab.update_results()
+        tab.wait_results()
+        full.append(time.perf_counter() - start)
+        first.append(events['applied'][-1] - start)
+    return sum(first) / len(first) * 1000, sum(full) / len(full) * 1000
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    kb_per_s = float(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+    offers = data['FP_STANDARD']
+
+    page = ft.Page(LinkConnection(kb_per_s), "bench", asyncio.new_event_loop())
+    tab = app.TabContent(page, offers, "FP", ft.Ref[ft.Container]())
+    page.add(tab.content)
+    tab.initialize_results()
+    tab.wait_results()
+    events = instrument(tab)
+
+    provinces = ["TOTES LES PROVÍNCIES"] + tab.cached_values('PROVINCIA')
+    grades = ["TOTS ELS GRAUS"] + tab.cached_values('GRADO')
+    changes = [(provinces[i % len(provinces)], grades[(i // len(provinces)) % len(grades)])
+               for i in range(n_queries)]
+    # Totes les consultes ja a la memòria cau: només es mesura el pintat
+    for province, grade in changes:
+        tab.province_dropdown.value, tab.grade_dropdown.value = province, grade
+        tab.update_results()
+        tab.wait_results()
+
+    print(f"Targetes en trossos ({module_name}, {n_queries} consultes, {tab.RESULTS_PAGE_SIZE} targetes per pàgina, "
+          f"enllaç {kb_per_s:.0f} KB/s)")
+    # Com abans: tota la pàgina en el primer tros
+    tab.STREAM_CHUNK_INITIAL = tab.RESULTS_PAGE_SIZE
+    first_ms, full_ms = run_queries(tab, events, changes)
+    print(f"  Pàgina sencera:  primeres targetes {first_ms:6.1f} ms | pàgina completa {full_ms:6.1f} ms")
+
+    del tab.STREAM_CHUNK_INITIAL
+    sizer = tab.chunk_sizer
+    events['chunks'].clear()
+    first_ms, full_ms = run_queries(tab, events, changes)
+    print(f"  En trossos:      primeres targetes {first_ms:6.1f} ms | pàgina completa {full_ms:6.1f} ms | "
+          f"trossos {len(events['chunks'])}, mida final {sizer.size} (últims: {events['chunks'][-6:]})")
+
+    # Una consulta nova a mitja pàgina: l'anterior no hi afegeix cap targeta més
+    tab.STREAM_CHUNK_INITIAL = tab.STREAM_CHUNK_MIN
+    tab.chunk_sizer = ChunkSizer(tab.STREAM_CHUNK_MIN, tab.STREAM_CHUNK_MIN, tab.STREAM_CHUNK_MIN, sizer.target_ms)
+    tab.province_dropdown.value, tab.grade_dropdown.value = changes[0]
+    tab.update_results()
+    time.sleep(0.01)
+    tab.province_dropdown.value, tab.grade_dropdown.value = changes[1]
+    tab.update_results()
+    tab.wait_results()
+    shown = [card.offer_data.name for card in tab.card_pool[:tab.shown_count]]
+    expected = list(tab.filter_index.take(tab.display_rows[:tab.shown_count]).index)
+    visible = sum(1 for control in tab.results_list_column.controls[1:] if control.visible)
+    ok = shown == expected and visible == tab.shown_count == tab.stream_target
+    print(f"  Consulta nova a mitja pàgina: {tab.shown_count} targetes, totes de la consulta nova | "
+          f"{'correcte' if ok else 'INCORRECTE'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark de les consultes fora del fil dels esdeveniments (fp_worker):
+sobre una còpia gran de l'oferta (les files repetides N vegades), un
+usuari canvia els desplegables de província i grau moltes vegades seguides.
+Es compara el temps que queda bloquejat cada gestor d'esdeveniment i el
+que tarda a veure's el resultat final amb la consulta síncrona d'abans
+(filtrar i mostrar dins del gestor) i amb el QueryRunner, amb i sense
+debounce. Comprova que el resultat mostrat és el de l'últim canvi.
+
+Cal Flet 0.28 (com bench_cards.py).
+
+Ús (des de l'arrel del projecte):
+    python bench/bench_worker.py [app_fp_api|app_fp_api_comarca] [còpies] [canvis] [interval_ms]
+"""
+import asyncio
+import importlib
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import flet as ft  # noqa: E402
+from bench_cards import CountingConnection  # noqa: E402
+
+
+def run_burst(app, tab, changes, gap_s, mode):
+    """
+    Aplica els canvis com els gestors dels desplegables, separats `gap_s` segons. El recompte
+    de les opcions (comú a tots els modes) no es cronometra. Torna (bloqueig mitjà ms, bloqueig
+    màxim ms, ms des de l'últim canvi fins al resultat final, consultes calculades).
+    """
+    app.result_cache.clear()
+    computed = []
+    compute_result = type(tab).compute_result
+
+    def counting_compute(**query):
+        computed.append(query)
+        return compute_result(tab, **query)
+
+    tab.compute_result = counting_compute
+    blocked = []
+    for province, grade in changes:
+        tab.province_dropdown.value = province
+        tab.grade_dropdown.value = grade
+        tab.update_facets()
+        start = time.perf_counter()
+        if mode == "síncrona":
+            # Com abans: la consulta sencera i la llista dins del gestor
+            tab.apply_result(tab.compute_result(**tab.current_query()))
+        elif mode == "pool":
+            tab.update_results(e=True)
+        else:
+            tab.schedule_results(e=True)
+        blocked.append(time.perf_counter() - start)
+        time.sleep(gap_s)
+    last = time.perf_counter() - gap_s
+    tab.wait_results()
+    settled = (time.perf_counter() - last) * 1000
+    del tab.compute_result
+    return sum(blocked) / len(blocked) * 1000, max(blocked) * 1000, settled, len(computed)
+
+
+def main():
+    module_name = sys.argv[1] if len(sys.argv) > 1 else "app_fp_api_comarca"
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    n_changes = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    gap_ms = float(sys.argv[4]) if len(sys.argv) > 4 else 20
+
+    app = importlib.import_module(module_name)
+    data = app.data_loader.wait()
+    offers = pd.concat([data['FP_STANDARD']] * copies, ignore_index=True)
+
+    page = ft.Page(CountingConnection(), "bench", asyncio.new_event_loop())
+    tab = app.TabContent(page, offers, "FP", ft.Ref[ft.Container]())
+    page.add(tab.content)
+    tab.initialize_results()
+    tab.wait_results()
+
+    provinces = ["TOTES LES PROVÍNCIES"] + tab.cached_values('PROVINCIA')
+    grades = ["TOTS ELS GRAUS"] + tab.cached_values('GRADO')
+    changes = [(provinces[i % len(provinces)], grades[(i // len(provinces)) % len(grades)])
+               for i in range(n_changes)]
+    # L'últim canvi torna a la vista més pesada (totes les ofertes)
+    changes[-1] = (provinces[0], grades[0])
+    expected = len(offers)
+
+    print(f"Consultes fora del fil dels esdeveniments ({module_name}, {len(offers)} ofertes, "
+          f"{n_changes} canvis cada {gap_ms:.0f} ms)")
+    for mode in ("síncrona", "pool", "pool + debounce"):
+        applied, dropped = tab.query_runner.applied, tab.query_runner.dropped
+        mean_ms, max_ms, settled_ms, n_computed = run_burst(app, tab, changes, gap_ms / 1000, mode)
+        shown = len(tab.current_result)
+        print(f"  {mode:<16} gestor {mean_ms:6.1f} ms (màx. {max_ms:6.1f}) | resultat final {settled_ms:6.0f} ms després | "
+              f"consultes calculades {n_computed:2}, aplicades pel pool {tab.query_runner.applied - applied:2}, "
+              f"descartades {tab.query_runner.dropped - dropped:2} | "
+              f"{'correcte' if shown == expected else f'INCORRECTE ({shown} != {expected})'}")
+
+if __name__ == "__main__":
+    main()
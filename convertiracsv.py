@@ -1,42 +1,14 @@
-import pandas as pd
-import re
+from fp_fixedwidth import iter_offer_chunks
 
 
 txt_file = "grado.csv.txt"
 csv_file = "oferta_fp_25_26.csv"
 
-data = []
+# Llegir el TXT en streaming: les columnes s'infereixen per cada bloc de capçalera
+# i cada bloc de files ja arriba amb PROVINCIA…UNIDADES separades i tipades
+rows = 0
+for i, chunk in enumerate(iter_offer_chunks(txt_file)):
+    chunk.to_csv(csv_file, mode='w' if i == 0 else 'a', header=(i == 0), index=False, encoding="utf-8")
+    rows += len(chunk)
 
-# Leer líneas del TXT
-with open(txt_file, "r", encoding="utf-8") as f:
-    lines = f.readlines()
-
-# Saltar títulos o líneas vacías
-lines = [line.strip() for line in lines if line.strip()]
-lines = lines[1:]  # si quieres saltar la primera línea de encabezado grande
-
-# Expresión regular: separar por 2 o más espacios consecutivos
-pattern = re.compile(r'\s{2,}')
-
-for line in lines:
-    row = pattern.split(line)
-    data.append(row)
-
-# Determinar el número máximo de columnas en cualquier fila
-max_cols = max(len(row) for row in data)
-
-# Normalizar filas cortas rellenando con ""
-for row in data:
-    while len(row) < max_cols:
-        row.append("")
-
-# Crear nombres de columnas automáticos
-columns = [f"col_{i+1}" for i in range(max_cols)]
-
-# Crear DataFrame
-df = pd.DataFrame(data, columns=columns)
-
-# Guardar CSV
-df.to_csv(csv_file, index=False, encoding="utf-8")
-
-print(f"Archivo CSV generado: {csv_file}")
+print(f"Archivo CSV generado: {csv_file} ({rows} filas)")
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+# ----------------------------------------------------------------------
+# MEMÒRIA CAU LRU LIMITADA
+# ----------------------------------------------------------------------
+#
+# Memòria cau compartida entre fils (sessions de Flet, fil de recàrrega)
+# amb un nombre màxim d'entrades: quan s'omple, es descarta la que fa més
+# temps que no s'usa. Porta el compte d'encerts i errades per poder
+# comprovar si les claus triades serveixen de res.
+
+DEFAULT_MAXSIZE = 256
+
+
+class LRUCache:
+    """Diccionari limitat a `maxsize` entrades amb política LRU i comptadors d'encerts."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Valor de `key`; si no hi és, el calcula amb `compute()` (fora del bloqueig) i el guarda."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        """Buida la memòria cau (p. ex. després d'una recàrrega de dades); els comptadors es mantenen."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,245 @@
+import re
+
+import pandas as pd
+
+from fp_coords import utm_to_latlon
+from fp_encoding import read_csv_sniffed
+from fp_geocode import build_coords_catalog
+from fp_gpkg import GeoPackage
+from fp_nearest import locality_points
+from fp_spatial import SpatialIndex
+
+# ----------------------------------------------------------------------
+# CATÀLEG DE CENTRES (a.csv) LLEGIT UNA SOLA VEGADA
+# ----------------------------------------------------------------------
+#
+# a.csv té 29 columnes però només en calen 9. El catàleg es llegeix una
+# vegada amb usecols i en queda una sola còpia en memòria; la taula de
+# coordenades per clau (PROVINCIA_LOCALIDAD_CENTRO), el mapa de comarques
+# per localitat, la recerca per codi INE, l'índex espacial dels centres i
+# el punt de referència de cada localitat són vistes derivades d'ella.
+
+CATALOG_COLUMNS = ['codcen', 'dlibre', 'cod_ine_mun', 'noms_mun', 'localidad_oficial',
+                   'comarca', 'provincia', 'latitud', 'longitud']
+
+TARGET_PROVINCES = ['ALACANT', 'VALÈNCIA', 'CASTELLÓ']
+
+_COMARCA_ARTICLE_RE = re.compile(r'^(el |la |l\'|els |les )', flags=re.IGNORECASE)
+
+
+def _upper_strip(series):
+    """Com str(x).strip().upper() però conservant els NaN (igual que astype(str) a pandas 3)."""
+    return series.astype(str).str.strip().str.upper()
+
+
+def _detect_province(provincia_upper, province_map):
+    """Província canònica per al mapa de comarques ('' si no és de les tres objectiu)."""
+    provincia = province_map.get(provincia_upper, provincia_upper)
+    if provincia in TARGET_PROVINCES:
+        return provincia
+    if 'ALACANT' in provincia_upper or 'ALICANT' in provincia_upper:
+        return 'ALACANT'
+    if 'VALÈNCIA' in provincia_upper or 'VALENCIA' in provincia_upper:
+        return 'VALÈNCIA'
+    if 'CASTELL' in provincia_upper:
+        return 'CASTELLÓ'
+    return ''
+
+
+class CenterCatalog:
+    """
+    Catàleg de centres amb les columnes normalitzades:
+    CODCEN, CENTRO, COD_INE, LOCALIDAD, LOCALIDAD_OFICIAL, COMARCA, PROVINCIA, LATITUD, LONGITUD, KEY.
+    """
+
+    def __init__(self, frame, province_map):
+        self.frame = frame
+        self.province_map = province_map
+        self._coords = None
+        self._localities = None
+        self._ine = None
+        self._spatial = None
+        self._locality_points = None
+
+    @classmethod
+    def empty(cls, province_map=None):
+        columns = ['CODCEN', 'CENTRO', 'COD_INE', 'LOCALIDAD', 'LOCALIDAD_OFICIAL',
+                   'COMARCA', 'PROVINCIA', 'LATITUD', 'LONGITUD', 'KEY']
+        return cls(pd.DataFrame(columns=columns), province_map or {})
+
+    @classmethod
+    def from_file(cls, file_path, province_map):
+        """Tria el lector segons l'extensió: GeoPackage (.gpkg) o CSV (la resta)."""
+        if file_path.lower().endswith('.gpkg'):
+            return cls.from_gpkg(file_path, province_map)
+        return cls.from_csv(file_path, province_map)
+
+    @classmethod
+    def from_csv(cls, file_path, province_map):
+        """Llegeix a.csv en una sola passada (només CATALOG_COLUMNS) i normalitza les columnes."""
+        raw = read_csv_sniffed(file_path, usecols=CATALOG_COLUMNS, dtype={'codcen': str, 'cod_ine_mun': str},
+                               on_bad_lines='warn')
+        return cls._from_raw(raw, province_map)
+
+    @classmethod
+    def from_gpkg(cls, file_path, province_map, table=None):
+        """
+        Mateix catàleg llegit del GeoPackage (12_Centros.gpkg) amb sqlite3. A més de les
+        columnes d'a.csv, conserva les coordenades natives de la geometria (X, Y; EPSG:25830).
+        """
+        with GeoPackage(file_path) as gpkg:
+            raw = gpkg.read_points(table, columns=CATALOG_COLUMNS)
+            gpkg_srs = gpkg.srs_id(table)
+        # El GeoPackage guarda textos buits on read_csv posaria NaN
+        text = [col for col in CATALOG_COLUMNS if col not in ('latitud', 'longitud')]
+        raw[text] = raw[text].replace('', None).astype(str)
+        catalog = cls._from_raw(raw, province_map)
+        frame = catalog.frame
+        frame['X'] = raw['x'].to_numpy()
+        frame['Y'] = raw['y'].to_numpy()
+        # Centres sense latitud/longitud en text: es deriven de la geometria
+        missing = (frame['LATITUD'].isna() | frame['LONGITUD'].isna()) & frame['X'].notna()
+        if missing.any():
+            lat, lon = utm_to_latlon(frame.loc[missing, 'X'].to_numpy(), frame.loc[missing, 'Y'].to_numpy(),
+                                     crs=f"EPSG:{gpkg_srs}")
+            frame.loc[missing, 'LATITUD'] = lat
+            frame.loc[missing, 'LONGITUD'] = lon
+        return catalog
+
+    @classmethod
+    def _from_raw(cls, raw, province_map):
+        """Normalitza les columnes crues (amb els noms d'a.csv) al format del catàleg."""
+        frame = pd.DataFrame({
+            'CODCEN': raw['codcen'].str.strip().str.zfill(8),
+            'CENTRO': _upper_strip(raw['dlibre']),
+            'COD_INE': raw['cod_ine_mun'].str.strip().str.zfill(5),
+            'LOCALIDAD': _upper_strip(raw['noms_mun']),
+            'LOCALIDAD_OFICIAL': raw['localidad_oficial'],
+            'COMARCA': raw['comarca'],
+            'PROVINCIA': _upper_strip(raw['provincia']).map(lambda x: province_map.get(x, x)),
+            'LATITUD': pd.to_numeric(raw['latitud'], errors='coerce'),
+            'LONGITUD': pd.to_numeric(raw['longitud'], errors='coerce'),
+        })
+        frame['KEY'] = frame['PROVINCIA'] + "_" + frame['LOCALIDAD'] + "_" + frame['CENTRO']
+        return cls(frame, province_map)
+
+    def __len__(self):
+        return len(self.frame)
+
+    # --- Vista 1: coordenades per clau de centre ---
+
+    @property
+    def coords(self):
+        """Taula (latitud, longitud) indexada per KEY; guanya la primera aparició de cada clau."""
+        if self._coords is None:
+            self._coords = build_coords_catalog(self.frame.dropna(subset=['LATITUD', 'LONGITUD']))
+        return self._coords
+
+    def coords_for(self, keys):
+        """Recerca vectoritzada de coordenades reals per clau (NaN si el centre no hi és)."""
+        keys = pd.Index(keys)
+        found = self.coords.reindex(keys)
+        found.index = keys
+        return found
+
+    # --- Vista 2: comarca per localitat ---
+
+    @property
+    def localities(self):
+        """
+        Taula (PROVINCIA, LOCALIDAD, COMARCA) amb les mateixes regles que el mapa
+        de comarques original: localitat oficial, article inicial de la comarca
+        eliminat, guanya la primera aparició i s'afegeix la variant sense parèntesi.
+        """
+        if self._localities is None:
+            self._localities = self._build_localities()
+        return self._localities
+
+    def _build_localities(self):
+        # PROVINCIA ja està mapejada; el mapa és idempotent i la detecció per subcadena cobreix la resta
+        provincia = self.frame['PROVINCIA'].fillna('').map(lambda x: _detect_province(x, self.province_map))
+        localidad = self.frame['LOCALIDAD_OFICIAL'].fillna('').astype(str).str.strip().str.upper().str.strip()
+        comarca = self.frame['COMARCA'].fillna('').astype(str).str.strip()
+        comarca = comarca.str.replace(_COMARCA_ARTICLE_RE, '', regex=True).str.upper()
+
+        valid = (provincia != '') & (localidad != '') & (comarca != '')
+        candidates = pd.DataFrame({'PROVINCIA': provincia, 'LOCALIDAD': localidad, 'COMARCA': comarca})[valid]
+        # Les repeticions d'una mateixa localitat no canvien res: només cal recórrer la primera
+        candidates = candidates.drop_duplicates(subset=['PROVINCIA', 'LOCALIDAD'], keep='first')
+
+        table = {}
+        for prov, loc, com in candidates.itertuples(index=False, name=None):
+            if (prov, loc) in table:
+                continue
+            table[(prov, loc)] = com
+            if '(' in loc:
+                loc_sin_parentesis = loc.split('(')[0].strip()
+                if loc_sin_parentesis and loc_sin_parentesis != loc:
+                    table[(prov, loc_sin_parentesis)] = com
+
+        index = pd.MultiIndex.from_tuples(list(table.keys()), names=['PROVINCIA', 'LOCALIDAD']) if table else \
+            pd.MultiIndex.from_arrays([[], []], names=['PROVINCIA', 'LOCALIDAD'])
+        return pd.Series(list(table.values()), index=index, name='COMARCA', dtype=object)
+
+    def comarca_map(self):
+        """Vista com a diccionari {provincia: {localitat: comarca}} (l'antic COMARCA_DATA)."""
+        result = {}
+        for (prov, loc), com in self.localities.items():
+            result.setdefault(prov, {})[loc] = com
+        return result
+
+    def comarca_for(self, provincia, localidad):
+        """Recerca vectoritzada exacta de comarca per (província, localitat); NaN si no hi és."""
+        keys = pd.MultiIndex.from_arrays([
+            pd.Series(provincia).astype(str).str.strip().str.upper().to_numpy(),
+            pd.Series(localidad).astype(str).str.strip().str.upper().to_numpy(),
+        ])
+        return pd.Series(self.localities.reindex(keys).to_numpy(), dtype=object)
+
+    # --- Vista 3: municipi per codi INE ---
+
+    @property
+    def ine(self):
+        """Taula de municipis (LOCALIDAD, LOCALIDAD_OFICIAL, COMARCA, PROVINCIA) indexada per COD_INE."""
+        if self._ine is None:
+            municipis = self.frame.drop_duplicates(subset='COD_INE', keep='first')
+            self._ine = municipis.set_index('COD_INE')[['LOCALIDAD', 'LOCALIDAD_OFICIAL', 'COMARCA', 'PROVINCIA']]
+        return self._ine
+
+    def by_ine(self, codes):
+        """Recerca vectoritzada per codi INE (accepta enters o textos, amb o sense zeros inicials)."""
+        codes = pd.Series(codes).astype(str).str.strip().str.zfill(5)
+        found = self.ine.reindex(codes.to_numpy())
+        found.index = codes.index
+        return found
+
+    # --- Vista 4: índex espacial dels centres ---
+
+    @property
+    def spatial(self):
+        """SpatialIndex sobre LATITUD/LONGITUD; les posicions són les files de `frame`."""
+        if self._spatial is None:
+            self._spatial = SpatialIndex(self.frame['LATITUD'].to_numpy(dtype=float),
+                                         self.frame['LONGITUD'].to_numpy(dtype=float))
+        return self._spatial
+
+    def centers_within_radius(self, lat, lon, radius_km):
+        """Centres del catàleg a menys de `radius_km` del punt."""
+        return self.frame.iloc[self.spatial.within_radius(lat, lon, radius_km)]
+
+    def centers_within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Centres del catàleg dins del requadre en latitud/longitud."""
+        return self.frame.iloc[self.spatial.within_bbox(min_lat, min_lon, max_lat, max_lon)]
+
+    # --- Vista 5: punt de referència de cada localitat ---
+
+    @property
+    def locality_points(self):
+        """
+        Taula (PROVINCIA, LOCALIDAD, LATITUD, LONGITUD) amb el punt mitjà dels centres de cada
+        localitat, indexada per l'etiqueta "LOCALIDAD (PROVINCIA)" i ordenada per localitat.
+        """
+        if self._locality_points is None:
+            self._locality_points = locality_points(self.frame['PROVINCIA'], self.frame['LOCALIDAD'],
+                                                    self.frame['LATITUD'], self.frame['LONGITUD'])
+        return self._locality_points
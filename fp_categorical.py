@@ -0,0 +1,69 @@
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# COLUMNES CATEGÒRIQUES AMB CATEGORIES COMPARTIDES
+# ----------------------------------------------------------------------
+#
+# Després de la neteja, les columnes de text de l'oferta repeteixen els
+# mateixos valors en majúscules milers de vegades. Es guarden com a
+# categòriques amb un únic diccionari per columna, compartit entre
+# FP_STANDARD i FP_ESPECIALIZACION: els filtres `df[col] == valor`
+# comparen codis enters i els dos conjunts es poden concatenar sense
+# tornar a codificar. Les categories estan ordenades alfabèticament, de
+# manera que sort_values dona el mateix ordre que amb els textos.
+
+SHARED_CATEGORIES_KEY = 'categories compartides'
+
+CATEGORICAL_COLUMNS = ['PROVINCIA', 'COMARCA', 'LOCALIDAD', 'CENTRO', 'RÉGIMEN', 'GRADO', 'FAMILIA', 'CICLO', 'TURNO']
+
+
+def shared_dtypes(data_frames, columns=CATEGORICAL_COLUMNS):
+    """Un CategoricalDtype per columna amb la unió ordenada dels valors de tots els DataFrames."""
+    dtypes = {}
+    for col in columns:
+        values = set()
+        for df in data_frames.values():
+            if col in df.columns:
+                values.update(df[col].dropna().astype(str).unique())
+        if values:
+            dtypes[col] = pd.CategoricalDtype(categories=sorted(values))
+    return dtypes
+
+
+def encode_categoricals(data_frames, columns=CATEGORICAL_COLUMNS):
+    """Retorna un dict nou amb les columnes `columns` convertides a categòriques compartides."""
+    dtypes = shared_dtypes(data_frames, columns)
+    encoded = {}
+    for key, df in data_frames.items():
+        present = {col: dtype for col, dtype in dtypes.items() if col in df.columns}
+        encoded[key] = df.astype(present) if present else df
+    return encoded
+
+
+def memory_mb(data_frames):
+    """
+    Memòria ocupada (MB, incloent-hi els textos) per cada DataFrame. Les categories
+    compartides es compten una sola vegada, en una entrada a banda.
+    """
+    usage = {}
+    categories = {}
+    for key, df in data_frames.items():
+        total = df.index.memory_usage(deep=True)
+        for col in df.columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                total += series.cat.codes.nbytes
+                categories[col] = series.cat.categories.memory_usage(deep=True)
+            else:
+                total += series.memory_usage(deep=True, index=False)
+        usage[key] = total / 1e6
+    if categories:
+        usage[SHARED_CATEGORIES_KEY] = sum(categories.values()) / 1e6
+    return usage
+
+
+def print_memory_report(before, after):
+    """Mostra la memòria de cada conjunt abans i després de la codificació."""
+    for key in after:
+        print(f"   💾 {key}: {before.get(key, 0):.2f} MB -> {after[key]:.2f} MB")
+    print(f"   💾 Total: {sum(before.values()):.2f} MB -> {sum(after.values()):.2f} MB")
@@ -0,0 +1,200 @@
+import re
+from bisect import bisect_left
+
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# COMARCA PER LOCALITAT: ÍNDEX PRECALCULAT
+# ----------------------------------------------------------------------
+#
+# get_comarca es cridava fila a fila amb DataFrame.apply i, quan la
+# localitat no hi era tal qual, recorria totes les localitats de la
+# província tornant a llevar els accents de cada clau amb una dotzena de
+# str.replace. Ara, en carregar el mapa de comarques, es calculen una
+# sola vegada per província: les claus sense accents (diccionari), i
+# tots els sufixos d'aquestes claus ordenats (per trobar amb bisect les
+# claus que contenen la localitat buscada). Les ofertes es resolen per
+# parells (província, localitat) distints i el resultat s'escampa a totes
+# les files amb un sol take.
+#
+# Les claus del mapa porten l'article entre parèntesis ("ALCORA (L')",
+# "VALL D'UIXÓ (LA)") i algunes estan en castellà ("CASTELLÓN DE LA
+# PLANA"), mentre que l'oferta sol escriure "L'ALCORA" o "CASTELLÓ DE LA
+# PLANA". Per això, en construir l'índex, cada clau hi entra també amb
+# les seues variants (sense el parèntesi, amb l'article al davant, sense
+# "DE LA PLANA") i amb els noms de LOCALITY_ALIASES; totes apunten a la
+# posició de la clau original. L'ordre de preferència és: exacta,
+# variant (alguna variant de la localitat és igual a una variant d'una
+# clau), subcadena (guanya la primera localitat del mapa que la conté o
+# hi està continguda) i, finalment, la comarca per defecte.
+
+# Mateixos reemplaçaments que feia get_comarca (només majúscules)
+_ACCENTS = str.maketrans({
+    'À': 'A', 'Á': 'A', 'Â': 'A',
+    'È': 'E', 'É': 'E', 'Ê': 'E',
+    'Ì': 'I', 'Í': 'I', 'Î': 'I',
+    'Ò': 'O', 'Ó': 'O', 'Ô': 'O',
+    'Ù': 'U', 'Ú': 'U', 'Û': 'U',
+    'Ç': 'C', 'Ñ': 'N',
+})
+
+DEFAULT_COMARCAS = {
+    'VALÈNCIA': 'CIUTAT DE VALÈNCIA',
+    'ALACANT': 'ALACANTÍ',
+    'CASTELLÓ': 'PLANA ALTA',
+}
+
+# Noms de l'oferta que no són cap variant de la clau del mapa (clau -> altres noms)
+LOCALITY_ALIASES = {
+    'CASTELLÓN DE LA PLANA': ('CASTELLÓ DE LA PLANA',),
+}
+
+# Articles que el mapa posa entre parèntesis darrere del nom
+ARTICLES = ("L'", 'EL', 'LA', 'ELS', 'LES', 'LOS', 'LAS')
+PLANA_SUFFIX = ' DE LA PLANA'
+_BRACKETED = re.compile(r"(.*?)\s*[(\[]([^)\]]*)[)\]]\s*")
+
+# Com s'ha resolt cada localitat
+METHOD_EXACT = 'exacta'
+METHOD_VARIANT = 'variant'
+METHOD_SUBSTRING = 'subcadena'
+METHOD_DEFAULT = 'per defecte'
+
+
+def strip_accents(text):
+    return text.translate(_ACCENTS)
+
+
+def locality_variants(name):
+    """
+    Formes sense accents d'un nom de localitat: el nom, sense el parèntesi final
+    ("ALCORA (L')" -> "ALCORA"), amb l'article al davant ("L'ALCORA") i sense "DE LA PLANA".
+    """
+    normalized = strip_accents(name)
+    variants = [normalized]
+    bracketed = _BRACKETED.fullmatch(normalized)
+    if bracketed:
+        base, inside = bracketed.group(1), bracketed.group(2).strip()
+        variants.append(base)
+        if inside in ARTICLES:
+            variants.append(inside + base if inside.endswith("'") else f"{inside} {base}")
+    variants.extend(variant[:-len(PLANA_SUFFIX)] for variant in list(variants)
+                    if variant.endswith(PLANA_SUFFIX))
+    return list(dict.fromkeys(variant for variant in variants if variant))
+
+
+class _ProvinceIndex:
+    """
+    Localitats d'una província: variants sense accents de cada clau (i dels seus àlies) i
+    els seus sufixos ordenats, amb l'ordre original de la clau.
+    """
+
+    def __init__(self, localities):
+        self.keys = list(localities)
+        self.comarcas = list(localities.values())
+        self.exact = dict(localities)
+
+        # Primera posició (ordre del mapa) de cada variant
+        self.first_by_normalized = {}
+        for position, key in enumerate(self.keys):
+            for name in (key,) + LOCALITY_ALIASES.get(key, ()):
+                for variant in locality_variants(name):
+                    self.first_by_normalized.setdefault(variant, position)
+        suffixes = []
+        for variant, position in self.first_by_normalized.items():
+            suffixes.extend((variant[start:], position) for start in range(len(variant) + 1))
+        suffixes.sort()
+        self.suffixes = [suffix for suffix, _ in suffixes]
+        self.suffix_positions = [position for _, position in suffixes]
+
+    def variant_match(self, localidad):
+        """Primera localitat (ordre del mapa) amb una variant igual a alguna variant de `localidad`, o None."""
+        positions = [self.first_by_normalized.get(variant) for variant in locality_variants(localidad)]
+        positions = [position for position in positions if position is not None]
+        return min(positions) if positions else None
+
+    def first_match(self, localidad):
+        """
+        Primera localitat (ordre del mapa) amb una variant que conté `localidad` sense accents
+        o hi està continguda. Retorna la posició o None.
+        """
+        normalized = strip_accents(localidad)
+        candidates = []
+
+        # Claus que contenen la localitat: sufixos que comencen per ella (inclou la igualtat)
+        start = bisect_left(self.suffixes, normalized)
+        end = start
+        while end < len(self.suffixes) and self.suffixes[end].startswith(normalized):
+            end += 1
+        if end > start:
+            candidates.append(min(self.suffix_positions[start:end]))
+
+        # Claus contingudes en la localitat: totes les subcadenes, contra el diccionari
+        for begin in range(len(normalized) + 1):
+            for stop in range(begin, len(normalized) + 1):
+                position = self.first_by_normalized.get(normalized[begin:stop])
+                if position is not None:
+                    candidates.append(position)
+
+        return min(candidates) if candidates else None
+
+
+class ComarcaResolver:
+    """Resol (província, localitat) a comarca amb el mapa {provincia: {localitat: comarca}} del catàleg."""
+
+    def __init__(self, comarca_map, default_comarcas=DEFAULT_COMARCAS):
+        self.default_comarcas = default_comarcas
+        self._provinces = {prov: _ProvinceIndex(localities) for prov, localities in comarca_map.items()}
+        # Localitats (província, localitat, clau del mapa) resoltes per subcadena en l'última crida a resolve
+        self.substring_hits = []
+
+    def resolve_one(self, provincia, localidad):
+        """Comarca d'una localitat: (comarca, mètode, clau del mapa usada o None)."""
+        provincia = str(provincia).strip().upper()
+        localidad = str(localidad).strip().upper()
+
+        index = self._provinces.get(provincia)
+        if index is not None:
+            if localidad in index.exact:
+                return index.exact[localidad], METHOD_EXACT, localidad
+
+            position = index.variant_match(localidad)
+            if position is not None:
+                return index.comarcas[position], METHOD_VARIANT, index.keys[position]
+
+            position = index.first_match(localidad)
+            if position is not None:
+                return index.comarcas[position], METHOD_SUBSTRING, index.keys[position]
+
+        default = self.default_comarcas.get(provincia, f'NO DEFINIDA - {provincia}')
+        return default, METHOD_DEFAULT, None
+
+    def resolve(self, provincia, localidad):
+        """
+        Columna de comarques alineada amb les entrades: cada parell (província, localitat)
+        distint es resol una sola vegada. Guarda en `substring_hits` els que han necessitat
+        la comparació per subcadena.
+        """
+        provincia = pd.Series(provincia)
+        pairs = pd.MultiIndex.from_arrays([provincia.astype(object).to_numpy(),
+                                           pd.Series(localidad).astype(object).to_numpy()])
+        codes, uniques = pd.factorize(pairs)
+
+        comarcas = []
+        self.substring_hits = []
+        for prov, loc in uniques:
+            comarca, method, key = self.resolve_one(prov, loc)
+            comarcas.append(comarca)
+            if method == METHOD_SUBSTRING:
+                self.substring_hits.append((prov, loc, key))
+
+        values = pd.Series(comarcas, dtype=object).to_numpy()
+        return pd.Series(values[codes], index=provincia.index, dtype=object)
+
+    def print_substring_report(self, label):
+        """Mostra les localitats de l'última crida a resolve que s'han resolt per subcadena."""
+        if not self.substring_hits:
+            return
+        print(f"🔎 {label}: {len(self.substring_hits)} localitats resoltes per subcadena:")
+        for prov, loc, key in self.substring_hits:
+            print(f"   - {prov} / {loc} -> {key}")
@@ -0,0 +1,145 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# COORDENADES: WKT POINT I REPROJECCIÓ EPSG:25830 <-> EPSG:4326
+# ----------------------------------------------------------------------
+#
+# Els exports de centres (12_Centros(Valencia).csv, centros_educativos_*)
+# porten la geometria com a WKT 'POINT (x y)' en ETRS89 / UTM 30N. Abans
+# cada conversió creava un pyproj.Transformer nou (uns quants ms per
+# crida). Ara hi ha un únic Transformer per parell de sistemes, guardat en
+# memòria cau, i les columnes senceres es converteixen en una sola crida.
+# Sense pyproj, el parell 25830 <-> 4326 es calcula amb les sèries de
+# Krüger en NumPy (ETRS89 i WGS84 coincideixen a escala submètrica).
+
+PYPROJ_AVAILABLE = False
+try:
+    import pyproj
+    PYPROJ_AVAILABLE = True
+except ImportError:
+    pass
+
+UTM_CRS = "EPSG:25830"     # ETRS89 / UTM zona 30N
+LATLON_CRS = "EPSG:4326"   # WGS84 latitud / longitud
+
+_WKT_POINT_RE = r'^\s*POINT\s*(?:ZM|Z|M)?\s*\(\s*([-+0-9.eE]+)\s+([-+0-9.eE]+)'
+
+
+@lru_cache(maxsize=None)
+def get_transformer(from_crs, to_crs):
+    """Transformer de pyproj (always_xy) per a un parell de sistemes; es crea una sola vegada."""
+    return pyproj.Transformer.from_crs(from_crs, to_crs, always_xy=True)
+
+
+def parse_wkt_points(wkt):
+    """
+    Extrau (x, y) d'una columna de WKT 'POINT (x y)' en una sola passada.
+    Retorna dos arrays float64; els valors buits, 'POINT EMPTY' o no vàlids queden a NaN.
+    """
+    values = pd.Series(wkt, dtype=object).to_numpy()
+    # Camí ràpid: tots els valors són exactament 'POINT (x y)' -> un sol split de tot el text
+    if all(isinstance(v, str) and v.startswith('POINT (') and v.endswith(')') and v.count(' ') == 2 for v in values):
+        try:
+            xy = np.array(' '.join(v[7:-1] for v in values).split(' '), dtype=float).reshape(-1, 2)
+            return xy[:, 0].copy(), xy[:, 1].copy()
+        except ValueError:
+            pass
+
+    wkt = pd.Series(values, dtype=object)
+    coords = wkt.where(wkt.notna(), '').astype(str).str.extract(_WKT_POINT_RE)
+    x = pd.to_numeric(coords[0], errors='coerce').to_numpy(dtype=float)
+    y = pd.to_numeric(coords[1], errors='coerce').to_numpy(dtype=float)
+    return x, y
+
+
+def format_wkt_points(x, y):
+    """Columna de WKT 'POINT (x y)' a partir de dos arrays (None on falta alguna coordenada)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    wkt = pd.Series("POINT (" + pd.Series(x).astype(str) + " " + pd.Series(y).astype(str) + ")", dtype=object)
+    return wkt.where(~(np.isnan(x) | np.isnan(y)), None)
+
+
+def transform(x, y, from_crs, to_crs):
+    """Reprojecta columnes senceres (ordre x/y, és a dir longitud/latitud per a EPSG:4326)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if from_crs == to_crs:
+        return x.copy(), y.copy()
+    if PYPROJ_AVAILABLE:
+        return get_transformer(from_crs, to_crs).transform(x, y)
+    if (from_crs, to_crs) == (UTM_CRS, LATLON_CRS):
+        lat, lon = _utm_to_latlon(x, y)
+        return lon, lat
+    if (from_crs, to_crs) == (LATLON_CRS, UTM_CRS):
+        return _latlon_to_utm(y, x)
+    raise ValueError(f"Sense pyproj només es pot convertir entre {UTM_CRS} i {LATLON_CRS}")
+
+
+def utm_to_latlon(easting, northing, crs=UTM_CRS):
+    """Coordenades UTM (per defecte EPSG:25830) a (latitud, longitud) WGS84. Accepta escalars o columnes."""
+    lon, lat = transform(easting, northing, crs, LATLON_CRS)
+    if np.ndim(easting) == 0:
+        return float(lat), float(lon)
+    return lat, lon
+
+
+def latlon_to_utm(lat, lon, crs=UTM_CRS):
+    """(latitud, longitud) WGS84 a coordenades UTM (per defecte EPSG:25830). Accepta escalars o columnes."""
+    x, y = transform(lon, lat, LATLON_CRS, crs)
+    if np.ndim(lat) == 0:
+        return float(x), float(y)
+    return x, y
+
+
+def wkt_to_latlon(wkt, crs=UTM_CRS):
+    """Columna de WKT 'POINT (x y)' en `crs` a dos arrays (latitud, longitud)."""
+    x, y = parse_wkt_points(wkt)
+    return utm_to_latlon(x, y, crs)
+
+
+# --- Càlcul sense pyproj: sèries de Krüger, GRS80, UTM zona 30N ---
+
+_A = 6378137.0
+_F = 1 / 298.257222101
+_N = _F / (2 - _F)
+_K0 = 0.9996
+_FALSE_EASTING = 500000.0
+_LON0 = math.radians(-3.0)
+_RECT = _A / (1 + _N) * (1 + _N ** 2 / 4 + _N ** 4 / 64)
+_ALPHA = (_N / 2 - 2 * _N ** 2 / 3 + 5 * _N ** 3 / 16, 13 * _N ** 2 / 48 - 3 * _N ** 3 / 5, 61 * _N ** 3 / 240)
+_BETA = (_N / 2 - 2 * _N ** 2 / 3 + 37 * _N ** 3 / 96, _N ** 2 / 48 + _N ** 3 / 15, 17 * _N ** 3 / 480)
+_DELTA = (2 * _N - 2 * _N ** 2 / 3 - 2 * _N ** 3, 7 * _N ** 2 / 3 - 8 * _N ** 3 / 5, 56 * _N ** 3 / 15)
+
+
+def _utm_to_latlon(easting, northing):
+    xi = northing / (_K0 * _RECT)
+    eta = (easting - _FALSE_EASTING) / (_K0 * _RECT)
+    xi_p, eta_p = xi.copy(), eta.copy()
+    for j, beta in enumerate(_BETA, start=1):
+        xi_p -= beta * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+        eta_p -= beta * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+    chi = np.arcsin(np.sin(xi_p) / np.cosh(eta_p))
+    lat = chi.copy()
+    for j, delta in enumerate(_DELTA, start=1):
+        lat += delta * np.sin(2 * j * chi)
+    lon = _LON0 + np.arctan2(np.sinh(eta_p), np.cos(xi_p))
+    return np.degrees(lat), np.degrees(lon)
+
+
+def _latlon_to_utm(lat, lon):
+    phi = np.radians(lat)
+    dlon = np.radians(lon) - _LON0
+    c = 2 * math.sqrt(_N) / (1 + _N)
+    t = np.sinh(np.arctanh(np.sin(phi)) - c * np.arctanh(c * np.sin(phi)))
+    xi_p = np.arctan2(t, np.cos(dlon))
+    eta_p = np.arctanh(np.sin(dlon) / np.sqrt(1 + t ** 2))
+    easting, northing = eta_p.copy(), xi_p.copy()
+    for j, alpha in enumerate(_ALPHA, start=1):
+        easting += alpha * np.cos(2 * j * xi_p) * np.sinh(2 * j * eta_p)
+        northing += alpha * np.sin(2 * j * xi_p) * np.cosh(2 * j * eta_p)
+    return _FALSE_EASTING + _K0 * _RECT * easting, _K0 * _RECT * northing
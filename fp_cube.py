@@ -0,0 +1,153 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from fp_filter import shared_for_frame
+
+# ----------------------------------------------------------------------
+# CUB D'OFERTES I UNITATS (PROVÍNCIA, COMARCA, FAMÍLIA, GRAU, TORN, RÈGIM)
+# ----------------------------------------------------------------------
+#
+# L'únic agregat que es mostrava era la suma d'UNIDADES de les files
+# filtrades. Per als desglossaments (per família, grau, torn o règim dins
+# de cada comarca), en carregar un conjunt de dades es construeix un cub:
+# primer la taula base (una cel·la per combinació present de totes les
+# dimensions, amb el nombre d'ofertes i la suma d'unitats) i, a partir
+# d'ella, l'agregat de cada subconjunt de dimensions (2^6 = 64 cuboides,
+# cadascun amb menys cel·les que files té l'oferta). Una consulta
+# "desglossa per X amb aquests filtres" es respon des del cuboide més
+# petit que conté X i les columnes filtrades, sense tocar el DataFrame:
+# pujar (roll-up) és consultar un cuboide amb menys dimensions i baixar
+# (drill-down) és afegir un filtre i desglossar per la dimensió següent.
+#
+# Els filtres sobre columnes que no són del cub (localitat, cicle) no es
+# poden respondre des d'aquí: `covers` ho diu abans de consultar.
+
+CUBE_DIMENSIONS = ['PROVINCIA', 'COMARCA', 'FAMILIA', 'GRADO', 'TURNO', 'RÉGIMEN']
+MEASURE_COLUMN = 'UNIDADES'
+
+
+class Cuboid:
+    """Agregat d'un subconjunt de dimensions: codis de cada cel·la, ofertes i unitats."""
+
+    def __init__(self, dimensions, cell_codes, counts, units):
+        self.dimensions = dimensions
+        self.cell_codes = cell_codes
+        self.counts = counts
+        self.units = units
+
+    def __len__(self):
+        return len(self.counts)
+
+
+def _group_cells(cell_codes, radices, counts, units):
+    """Agrupa les cel·les pels codis de `cell_codes` (n_cel·les x n_dimensions) sumant ofertes i unitats."""
+    if cell_codes.shape[1] == 0:
+        return np.zeros((1, 0), dtype=np.int64), np.array([counts.sum()]), np.array([units.sum()])
+    # Clau única per cel·la en base mixta (cada dimensió té radix = nombre de valors)
+    keys = np.zeros(len(cell_codes), dtype=np.int64)
+    for column, radix in enumerate(radices):
+        keys = keys * radix + cell_codes[:, column]
+    unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return (cell_codes[first],
+            np.bincount(inverse, weights=counts, minlength=len(unique_keys)).astype(np.int64),
+            np.bincount(inverse, weights=units, minlength=len(unique_keys)))
+
+
+class UnitsCube:
+    """Tots els cuboides d'ofertes i unitats d'un DataFrame d'oferta sobre CUBE_DIMENSIONS presents."""
+
+    def __init__(self, df, dimensions=CUBE_DIMENSIONS, measure=MEASURE_COLUMN):
+        self.df = df
+        self.dimensions = [dim for dim in dimensions if dim in df.columns]
+        self.categories = {}
+        self._lookup = {}
+
+        # Codis de cada fila; el valor que falta (NaN) té codi propi al final, per no perdre la fila dels totals
+        row_codes = []
+        for dim in self.dimensions:
+            codes, categories = pd.factorize(df[dim].astype(object), sort=True)
+            codes = np.where(codes < 0, len(categories), codes).astype(np.int64)
+            self.categories[dim] = [str(value).strip() for value in categories] + [None]
+            self._lookup[dim] = {value: code for code, value in enumerate(self.categories[dim]) if value is not None}
+            row_codes.append(codes)
+        self._radix = {dim: len(self.categories[dim]) for dim in self.dimensions}
+
+        units = np.nan_to_num(pd.to_numeric(df[measure], errors='coerce').to_numpy(dtype=float))
+        row_codes = np.column_stack(row_codes) if row_codes else np.zeros((len(df), 0), dtype=np.int64)
+        base = Cuboid(tuple(self.dimensions),
+                      *_group_cells(row_codes, [self._radix[d] for d in self.dimensions],
+                                    np.ones(len(df), dtype=np.int64), units))
+
+        # Cada cuboide surt de la taula base (no de les files)
+        self.cuboids = {}
+        for size in range(len(self.dimensions) + 1):
+            for dims in itertools.combinations(self.dimensions, size):
+                positions = [self.dimensions.index(dim) for dim in dims]
+                self.cuboids[frozenset(dims)] = Cuboid(
+                    dims, *_group_cells(base.cell_codes[:, positions], [self._radix[d] for d in dims],
+                                        base.counts, base.units))
+
+    @property
+    def n_cells(self):
+        return sum(len(cuboid) for cuboid in self.cuboids.values())
+
+    def covers(self, filters):
+        """Si els filtres {columna: valor} es poden respondre des del cub (totes les columnes hi són)."""
+        return all(col in self._radix for col in filters)
+
+    def _slice(self, by, filters):
+        """Cuboide de `by` + columnes filtrades i màscara de les seues cel·les que compleixen els filtres."""
+        cuboid = self.cuboids[frozenset(by) | frozenset(filters)]
+        mask = np.ones(len(cuboid), dtype=bool)
+        for col, value in filters.items():
+            code = self._lookup[col].get(value)
+            if code is None:
+                return cuboid, np.zeros(len(cuboid), dtype=bool)
+            mask &= cuboid.cell_codes[:, cuboid.dimensions.index(col)] == code
+        return cuboid, mask
+
+    def total(self, filters=None):
+        """(ofertes, unitats) de les files que compleixen `filters`."""
+        cuboid, mask = self._slice((), filters or {})
+        return int(cuboid.counts[mask].sum()), int(cuboid.units[mask].sum())
+
+    def _aggregate(self, by, filters):
+        """Codis (n x len(by)), ofertes i unitats de cada combinació de `by`, de més a menys unitats."""
+        cuboid, mask = self._slice(by, filters)
+        positions = [cuboid.dimensions.index(dim) for dim in by]
+        codes, counts, units = _group_cells(cuboid.cell_codes[mask][:, positions],
+                                            [self._radix[d] for d in by], cuboid.counts[mask], cuboid.units[mask])
+        order = np.lexsort((-counts, -units))
+        return codes[order], counts[order], units[order].astype(np.int64)
+
+    def rollup(self, by, filters=None):
+        """
+        DataFrame amb una fila per combinació present de les dimensions `by` (llista), les
+        columnes OFERTES i UNITATS, i ordenat per unitats (de més a menys), entre les files
+        que compleixen `filters`. Amb `by` buit, una sola fila amb el total.
+        """
+        by = list(by)
+        codes, counts, units = self._aggregate(by, filters or {})
+        result = pd.DataFrame({dim: pd.Series([self.categories[dim][code] for code in codes[:, i]], dtype=object)
+                               for i, dim in enumerate(by)})
+        result['OFERTES'] = counts
+        result['UNITATS'] = units
+        return result
+
+    def breakdown(self, dimension, filters=None):
+        """Llista [(valor, ofertes, unitats), ...] de `dimension`, de més a menys unitats (per a la UI)."""
+        codes, counts, units = self._aggregate([dimension], filters or {})
+        categories = self.categories[dimension]
+        return [(categories[code], int(count), int(total))
+                for code, count, total in zip(codes[:, 0], counts, units)]
+
+    def drill_down(self, path, dimension, filters=None):
+        """Desglossament (com breakdown) per `dimension` dins del camí [(dimensió, valor), ...] i dels `filters`."""
+        return self.breakdown(dimension, {**(filters or {}), **dict(path)})
+
+
+def get_units_cube(df):
+    """Cub de `df`, construït la primera vegada i compartit mentre algú l'use."""
+    return shared_for_frame(df, UnitsCube)
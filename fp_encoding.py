@@ -0,0 +1,86 @@
+import codecs
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# DETECCIÓ DE CODIFICACIÓ I LECTURA D'UNA SOLA PASSADA
+# ----------------------------------------------------------------------
+#
+# Abans cada lector provava utf-8 i, amb un UnicodeDecodeError, tornava a
+# llegir tot l'arxiu com a latin1 (un byte dolent al final duplicava el
+# temps de càrrega). Ara la codificació i el BOM es detecten amb una
+# mostra limitada dels primers bytes i l'arxiu es descodifica una sola
+# vegada en streaming. Si més avant apareix algun byte que no és utf-8,
+# aquell byte es llegeix com a latin1 en lloc de rellegir-ho tot.
+
+SAMPLE_SIZE = 64 * 1024
+FALLBACK_ENCODING = 'latin1'
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+_FALLBACK_ERRORS = 'fp_latin1_fallback'
+_state = threading.local()
+
+
+def _latin1_fallback(error):
+    """Gestor d'errors de descodificació: els bytes invàlids es llegeixen com a latin1."""
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    _state.fallback_bytes = getattr(_state, 'fallback_bytes', 0) + (error.end - error.start)
+    return error.object[error.start:error.end].decode(FALLBACK_ENCODING), error.end
+
+
+codecs.register_error(_FALLBACK_ERRORS, _latin1_fallback)
+
+
+def sniff_encoding(file_path, sample_size=SAMPLE_SIZE):
+    """
+    Detecta la codificació a partir dels primers `sample_size` bytes:
+    BOM (utf-8-sig, utf-16), després utf-8 i, si la mostra no ho és, latin1.
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    # Descodificador incremental: un caràcter multibyte tallat al final de la mostra no és un error
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        decoder.decode(sample, final=len(sample) < sample_size)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+@contextmanager
+def open_text(file_path, encoding=None):
+    """
+    Obri un arxiu de text amb la codificació detectada (o la indicada).
+    Retorna (stream, encoding); la descodificació es fa una sola vegada mentre es llegeix.
+    """
+    encoding = encoding or sniff_encoding(file_path)
+    errors = _FALLBACK_ERRORS if encoding.startswith('utf-8') else 'strict'
+    with open(file_path, 'r', encoding=encoding, errors=errors, newline='') as f:
+        yield f, encoding
+
+
+def read_csv_sniffed(file_path, encoding=None, verbose=True, **read_csv_kwargs):
+    """pd.read_csv amb detecció de codificació i una sola passada de descodificació."""
+    _state.fallback_bytes = 0
+    with open_text(file_path, encoding) as (f, detected):
+        df = pd.read_csv(f, **read_csv_kwargs)
+
+    if verbose:
+        message = f"   Codificació de '{file_path}': {detected}"
+        if _state.fallback_bytes:
+            message += f" ({_state.fallback_bytes} bytes invàlids llegits com a {FALLBACK_ENCODING})"
+        print(message)
+    return df
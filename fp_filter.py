@@ -0,0 +1,289 @@
+import itertools
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# ÍNDEX INVERTIT PER ALS FILTRES DE LES PESTANYES
+# ----------------------------------------------------------------------
+#
+# Abans cada canvi d'un desplegable començava amb initial_df.copy() i
+# encadenava màscares booleanes sobre tot el DataFrame (a l'app de
+# comarques, tres o quatre còpies per canvi). Ara, per a cada columna
+# filtrable i cada valor distint, es guarda una sola vegada la llista
+# ordenada de files que el tenen (i el codi enter de cada fila). Una
+# combinació de filtres es resol intersecant aquestes llistes: es parteix
+# de la més curta i la resta es comproven amb els codis d'aquelles files,
+# sense copiar cap DataFrame. Només el resultat final es materialitza.
+#
+# L'índex depén només del DataFrame, que és compartit: es construeix una
+# vegada per conjunt de dades i el fan servir totes les sessions.
+#
+# Les facetes (quantes ofertes i unitats tornaria cada opció d'un
+# desplegable amb la resta de filtres actius) surten dels mateixos codis:
+# un sol bincount sobre les files filtrades dona el recompte de tots els
+# valors alhora, sense tornar a filtrar per a cada opció. Amb milers
+# d'opcions, el que costa és reescriure'n els textos: FacetLabels guarda
+# el codi de cada opció i les xifres que mostra, i només reescriu les
+# opcions que han canviat (les xifres iguals comparteixen el text).
+
+FILTER_COLUMNS = ['PROVINCIA', 'COMARCA', 'LOCALIDAD', 'GRADO', 'CICLO', 'FAMILIA', 'TURNO', 'RÉGIMEN']
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+_index_tokens = itertools.count(1)
+
+
+class Facet:
+    """Ofertes i suma d'unitats per valor d'una columna, dins d'un conjunt de files filtrat."""
+
+    def __init__(self, lookup, counts, weights, total_count, total_weight):
+        self._lookup = lookup
+        self.counts = counts
+        self.weights = weights
+        self.total_count = total_count
+        self.total_weight = total_weight
+
+    def get(self, value):
+        """(ofertes, unitats) de `value`; (0, 0) si no apareix en les files filtrades."""
+        code = self._lookup.get(value)
+        if code is None:
+            return 0, 0
+        return int(self.counts[code]), int(self.weights[code])
+
+    def items(self):
+        """[(valor, ofertes, unitats), ...] dels valors presents, de més a menys unitats."""
+        present = [(value, int(self.counts[code]), int(self.weights[code]))
+                   for value, code in self._lookup.items() if self.counts[code]]
+        return sorted(present, key=lambda item: (-item[2], -item[1]))
+
+
+class FilterIndex:
+    """Llistes de files per valor (columnes FILTER_COLUMNS presents) d'un DataFrame d'oferta."""
+
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        self.df = df
+        # Identificador únic de l'índex (i per tant del conjunt de dades) per a claus de memòria cau
+        self.token = next(_index_tokens)
+        self.n_rows = len(df)
+        self.all_rows = np.arange(self.n_rows, dtype=np.int64)
+        self._codes = {}
+        self._categories = {}
+        self._lookup = {}
+        self._postings = {}
+        self._weights = {}
+        self._full_facets = {}
+
+        for col in columns:
+            if col not in df.columns:
+                continue
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                categories = series.cat.categories
+            else:
+                codes, categories = pd.factorize(series, sort=True)
+            codes = codes.astype(np.int32)
+
+            # Una sola ordenació per columna: les files de cada valor queden contigües i ordenades
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+            self._codes[col] = codes
+            self._categories[col] = categories
+            self._lookup[col] = {value: code for code, value in enumerate(categories)}
+            self._postings[col] = [order[bounds[code]:bounds[code + 1]] for code in range(len(categories))]
+
+    @property
+    def columns(self):
+        return list(self._codes)
+
+    def codes(self, column):
+        """Codi del valor de cada fila a `column` (-1 sense valor), com els de les facetes."""
+        return self._codes[column]
+
+    def _code_list(self, col, value):
+        """Codis de `value` (un valor o una llista de valors) a la columna; els desconeguts s'ignoren."""
+        values = [value] if isinstance(value, str) or not hasattr(value, '__iter__') else value
+        lookup = self._lookup[col]
+        return sorted({lookup[v] for v in values if v in lookup})
+
+    def _posting(self, col, codes):
+        if len(codes) == 1:
+            return self._postings[col][codes[0]]
+        return np.sort(np.concatenate([self._postings[col][code] for code in codes]))
+
+    def rows(self, filters=None):
+        """
+        Posicions (ordenades) de les files que compleixen tots els filtres
+        {columna: valor o llista de valors}. Sense filtres, totes les files.
+        """
+        active = {col: value for col, value in (filters or {}).items() if value is not None}
+        if not active:
+            return self.all_rows
+
+        code_lists = {}
+        for col, value in active.items():
+            if col not in self._codes:
+                raise KeyError(f"La columna '{col}' no està indexada")
+            codes = self._code_list(col, value)
+            if not codes:
+                return _EMPTY_ROWS
+            code_lists[col] = codes
+
+        # Es parteix de la llista més curta i s'hi comproven la resta de columnes
+        sizes = {col: sum(len(self._postings[col][code]) for code in codes) for col, codes in code_lists.items()}
+        ordered = sorted(code_lists, key=sizes.get)
+        rows = self._posting(ordered[0], code_lists[ordered[0]])
+        for col in ordered[1:]:
+            if len(rows) == 0:
+                break
+            row_codes = self._codes[col][rows]
+            codes = code_lists[col]
+            keep = row_codes == codes[0] if len(codes) == 1 else np.isin(row_codes, codes)
+            rows = rows[keep]
+        return rows
+
+    def count(self, filters=None):
+        return len(self.rows(filters))
+
+    def values(self, column, filters=None, rows=None):
+        """Valors distints (ordenats, sense NaN) de `column` entre les files filtrades."""
+        if rows is None:
+            rows = self.rows(filters)
+        if column not in self._codes:
+            return sorted(self.df[column].iloc[rows].dropna().astype(str).str.strip().unique().tolist())
+        if rows is self.all_rows:
+            present = np.array([len(posting) for posting in self._postings[column]])
+        else:
+            row_codes = self._codes[column][rows]
+            present = np.bincount(row_codes[row_codes >= 0], minlength=len(self._categories[column]))
+        found = self._categories[column][np.flatnonzero(present)]
+        return sorted({str(value).strip() for value in found})
+
+    def _weight_array(self, weight_column):
+        if weight_column not in self._weights:
+            values = pd.to_numeric(self.df[weight_column], errors='coerce').to_numpy(dtype=float)
+            self._weights[weight_column] = np.nan_to_num(values)
+        return self._weights[weight_column]
+
+    def facet(self, column, filters=None, weight_column=None, rows=None, total_rows=None):
+        """
+        Facet de `column` (ofertes i suma de `weight_column` per valor) entre les files que
+        compleixen `filters` (o entre les posicions `rows`, si es passen). Per a les facetes
+        d'un desplegable, `filters` no ha d'incloure el filtre del mateix desplegable.
+        Amb `total_rows`, els totals es compten sobre aquestes files en lloc de `rows`.
+        """
+        if rows is None:
+            rows = self.rows(filters)
+        key = (column, weight_column)
+        if total_rows is not None:
+            facet = self.facet(column, weight_column=weight_column, rows=rows)
+            total_weight = len(total_rows) if weight_column is None else self._weight_array(weight_column)[total_rows].sum()
+            return Facet(facet._lookup, facet.counts, facet.weights, len(total_rows), total_weight)
+        if rows is self.all_rows and key in self._full_facets:
+            return self._full_facets[key]
+
+        n_values = len(self._categories[column])
+        # +1: el codi -1 (NaN) va a la primera casella, que es descarta
+        shifted = self._codes[column][rows] + 1
+        counts = np.bincount(shifted, minlength=n_values + 1)[1:]
+        if weight_column is None:
+            weights = counts
+            total_weight = len(rows)
+        else:
+            row_weights = self._weight_array(weight_column)[rows]
+            weights = np.bincount(shifted, weights=row_weights, minlength=n_values + 1)[1:]
+            total_weight = row_weights.sum()
+
+        facet = Facet(self._lookup[column], counts, weights, len(rows), total_weight)
+        if rows is self.all_rows:
+            self._full_facets[key] = facet
+        return facet
+
+    def take(self, rows):
+        """DataFrame amb les files indicades (l'única còpia, per mostrar el resultat)."""
+        return self.df.iloc[rows]
+
+
+def format_count(value):
+    """Enter amb punt de milers (2.579)."""
+    return f"{int(value):,}".replace(",", ".")
+
+
+def facet_suffix(count, units):
+    return f" ({format_count(count)} ofertes · {format_count(units)} u.)"
+
+
+def facet_label(value, count, units):
+    """Text d'una opció de desplegable amb les ofertes i unitats que tornaria."""
+    return f"{value}{facet_suffix(count, units)}"
+
+
+class FacetLabels:
+    """
+    Textos amb facetes (facet_label) de les opcions d'un desplegable. L'opció `all_option` mostra
+    els totals. Els codis de les opcions es calculen una vegada per llista d'opcions i índex.
+    """
+
+    def __init__(self, all_option):
+        self.all_option = all_option
+        self._options = None
+        self._lookup = None
+
+    def _bind(self, options, lookup):
+        self._options = options
+        self._lookup = lookup
+        self._keys = [option.key for option in options]
+        self._codes = np.array([lookup.get(key, -1) for key in self._keys], dtype=np.int64)
+        self._is_all = np.array([key == self.all_option for key in self._keys], dtype=bool)
+        # Xifres que mostra cada opció (-1: encara cap)
+        self._counts = np.full(len(options), -1, dtype=np.int64)
+        self._units = np.full(len(options), -1, dtype=np.int64)
+
+    def apply(self, options, facet):
+        """Posa les xifres de `facet` a les opcions que han canviat; en torna quantes."""
+        if options is not self._options or facet._lookup is not self._lookup:
+            self._bind(options, facet._lookup)
+        known = self._codes >= 0
+        counts = np.zeros(len(options), dtype=np.int64)
+        units = np.zeros(len(options), dtype=np.int64)
+        counts[known] = facet.counts[self._codes[known]]
+        units[known] = facet.weights[self._codes[known]]
+        counts[self._is_all] = facet.total_count
+        units[self._is_all] = int(facet.total_weight)
+
+        changed = np.flatnonzero((counts != self._counts) | (units != self._units))
+        suffixes = {}
+        for position, count, unit in zip(changed.tolist(), counts[changed].tolist(), units[changed].tolist()):
+            suffix = suffixes.get((count, unit))
+            if suffix is None:
+                suffix = suffixes[(count, unit)] = facet_suffix(count, unit)
+            options[position].text = self._keys[position] + suffix
+        self._counts, self._units = counts, units
+        return len(changed)
+
+
+# Objectes derivats d'un DataFrame (índexs, cub), vius per constructor i id del DataFrame. Cada
+# objecte referencia el seu DataFrame (atribut `df`), de manera que l'id no es pot reutilitzar
+# mentre l'entrada existeix; quan cap sessió no l'usa, desapareix sol. El bloqueig és reentrant:
+# un constructor pot demanar un altre objecte compartit del mateix DataFrame.
+_cache_lock = threading.RLock()
+_shared_cache = weakref.WeakValueDictionary()
+
+
+def shared_for_frame(df, factory, *args):
+    """`factory(df, *args)`, construït la primera vegada per a `df` i compartit mentre algú l'use."""
+    key = (factory, id(df)) + args
+    with _cache_lock:
+        shared = _shared_cache.get(key)
+        if shared is None or shared.df is not df:
+            shared = factory(df, *args)
+            _shared_cache[key] = shared
+        return shared
+
+
+def get_filter_index(df, columns=FILTER_COLUMNS):
+    """Índex del DataFrame `df`, construït la primera vegada i compartit mentre algú l'use."""
+    return shared_for_frame(df, FilterIndex, tuple(columns))
@@ -0,0 +1,192 @@
+import re
+from collections import Counter
+
+import pandas as pd
+
+from fp_encoding import open_text
+
+# ----------------------------------------------------------------------
+# LECTOR EN STREAMING DE L'OFERTA EXPORTADA DES DEL PDF (grado.csv.txt, especializacion.txt)
+# ----------------------------------------------------------------------
+#
+# L'exportació del PDF és de text en columnes, però cada pàgina té la seua
+# pròpia capçalera i les seues pròpies amplades, i alguns camps (CENTRO i
+# RÉGIMEN, FAMILIA i CICLO...) queden separats per un sol espai. Per això:
+#   - RÉGIMEN, GRADO, TURNO i UNIDADES s'ancoren pel seu vocabulari conegut.
+#   - Les vores LOCALIDAD|CENTRO i FAMILIA|CICLO (columnes alineades a
+#     l'esquerra) s'infereixen una sola vegada per a cada bloc de capçalera.
+# El fitxer es llegeix línia a línia i les files s'emeten en blocs de
+# DataFrames amb les columnes PROVINCIA…UNIDADES ja tipades.
+
+OFFER_COLUMNS = ['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'RÉGIMEN', 'GRADO', 'FAMILIA', 'CICLO', 'TURNO', 'UNIDADES']
+
+REGIMENES = ['Público', 'Privado', 'Concertado']
+TURNOS = ['Diurno', 'Vespertino', 'Nocturno', 'Semipresencial', 'Distancia', 'Mixto']
+GRADOS = ['BÁSICO 2a Oport.', 'BÁSICO', 'MEDIO', 'SUPERIOR']
+
+_REGIMEN_RE = re.compile(r"(?<!\S)(" + "|".join(REGIMENES) + r")(?!\S)")
+_TURNO_SET = frozenset(TURNOS)
+_FIELD_RE = re.compile(r"\S+(?: \S+)*")  # Camps separats per 2 o més espais
+
+DEFAULT_CHUNK_SIZE = 1000
+_SHARED_START_RATIO = 0.9
+_CUT_OFFSETS = (0, -1, 1, -2, 2)  # Més pròxim primer
+
+
+def _is_header(line):
+    return 'PROVINCIA' in line and 'LOCALIDAD' in line
+
+
+def _fields(text, offset):
+    """Camps separats per 2 o més espais, amb la seua posició absoluta dins de la línia."""
+    return [(m.start() + offset, m.group()) for m in _FIELD_RE.finditer(text)]
+
+
+def _split_line(line):
+    """
+    Separa una línia de dades en les parts ancorades pel vocabulari.
+    Retorna None si la línia no és una fila d'oferta (títols, peus de pàgina...).
+    """
+    m_reg = _REGIMEN_RE.search(line)
+    if not m_reg:
+        return None
+
+    # PROVINCIA és sempre una sola paraula al principi de la línia
+    left = line[:m_reg.start()]
+    prov_start = len(left) - len(left.lstrip())
+    prov_end = left.find(' ', prov_start)
+    if prov_start == len(left) or prov_end < 0:
+        return None
+
+    # UNIDADES i TURNO són les dues últimes paraules (si hi són)
+    right = line[m_reg.end():].rstrip()
+    units = None
+    head, _, last = right.rpartition(' ')
+    if last.isdigit():
+        units = int(last)
+        right = head.rstrip()
+        head, _, last = right.rpartition(' ')
+    turno = ''
+    if last in _TURNO_SET:
+        turno = last
+        right = head.rstrip()
+
+    # GRADO: el primer valor conegut, o la primera paraula
+    middle_offset = m_reg.end() + len(right) - len(right.lstrip())
+    rest = right.lstrip()
+    grado = next((g for g in GRADOS if rest.startswith(g)), None)
+    if grado is None:
+        grado = rest.split(' ', 1)[0]
+    middle_offset += len(grado)
+
+    return {
+        'PROVINCIA': left[prov_start:prov_end],
+        'left': _fields(left[prov_end:], prov_end),
+        'middle': _fields(rest[len(grado):], middle_offset),
+        'RÉGIMEN': m_reg.group(1),
+        'GRADO': grado,
+        'TURNO': turno,
+        'UNIDADES': units,
+    }
+
+
+def _infer_cut(parsed, part):
+    """
+    Columna on comença el segon camp de `part` ('left' -> CENTRO, 'middle' -> CICLO).
+    Són columnes alineades a l'esquerra: s'agafa la posició més freqüent on el camp
+    apareix separat per 2 o més espais. Si cap fila del bloc no el separa així, la
+    primera posició on comença una paraula en gairebé totes les files.
+    """
+    starts = Counter(parts[part][1][0] for _, parts in parsed if len(parts[part]) > 1)
+    if starts:
+        return starts.most_common(1)[0][0]
+
+    word_starts = Counter()
+    for line, parts in parsed:
+        fields = parts[part]
+        if not fields:
+            continue
+        start, end = fields[0][0], fields[-1][0] + len(fields[-1][1])
+        word_starts.update(p for p in range(start + 1, end) if line[p - 1] == ' ' and line[p] != ' ')
+
+    shared = [p for p, count in word_starts.items() if count >= _SHARED_START_RATIO * len(parsed)]
+    return min(shared) if shared else None
+
+
+def _cut(line, fields, cut):
+    """Divideix una seqüència de camps en dos per la columna `cut` (o pel primer separador ample)."""
+    if not fields:
+        return '', ''
+    start, end = fields[0][0], fields[-1][0] + len(fields[-1][1])
+    if cut is not None:
+        # L'exportació pot desplaçar una columna un o dos caràcters en algunes files
+        for pos in (cut + offset for offset in _CUT_OFFSETS):
+            if start < pos < end and line[pos - 1] == ' ' and line[pos] != ' ':
+                return line[start:pos].strip(), line[pos:end].strip()
+    if len(fields) == 1:
+        return fields[0][1], ''
+    return fields[0][1], ' '.join(text for _, text in fields[1:])
+
+
+def _parse_block(lines):
+    """Converteix les línies d'un bloc de capçalera en files (tuples OFFER_COLUMNS)."""
+    parsed = [(line, parts) for line in lines if (parts := _split_line(line)) is not None]
+    if not parsed:
+        return []
+
+    # Vores inferides una vegada per bloc: inici de CENTRO i de CICLO
+    centro_cut = _infer_cut(parsed, 'left')
+    ciclo_cut = _infer_cut(parsed, 'middle')
+
+    rows = []
+    for line, parts in parsed:
+        localidad, centro = _cut(line, parts['left'], centro_cut)
+        familia, ciclo = _cut(line, parts['middle'], ciclo_cut)
+        rows.append((parts['PROVINCIA'], localidad, centro, parts['RÉGIMEN'], parts['GRADO'],
+                     familia, ciclo, parts['TURNO'], parts['UNIDADES']))
+    return rows
+
+
+def _rows_to_frame(rows):
+    df = pd.DataFrame(rows, columns=OFFER_COLUMNS)
+    df['UNIDADES'] = pd.array(df['UNIDADES'], dtype='Int64')
+    return df
+
+
+def iter_offer_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """
+    Llegeix l'exportació en streaming i genera DataFrames de com a màxim
+    `chunk_size` files amb les columnes OFFER_COLUMNS. Sense `encoding`, es detecta
+    a partir dels primers bytes de l'arxiu.
+    """
+    pending = []
+    block = []
+
+    def flush_block():
+        pending.extend(_parse_block(block))
+        block.clear()
+
+    with open_text(file_path, encoding) as (f, _):
+        for raw_line in f:
+            line = raw_line.rstrip('\r\n')
+            if _is_header(line):
+                flush_block()
+                while len(pending) >= chunk_size:
+                    yield _rows_to_frame(pending[:chunk_size])
+                    del pending[:chunk_size]
+                continue
+            if line.strip():
+                block.append(line)
+
+    flush_block()
+    while pending:
+        yield _rows_to_frame(pending[:chunk_size])
+        del pending[:chunk_size]
+
+
+def read_offer_txt(file_path, encoding=None):
+    """Llegeix tota l'exportació en un sol DataFrame (concatenant els blocs)."""
+    chunks = list(iter_offer_chunks(file_path, encoding=encoding))
+    if not chunks:
+        return _rows_to_frame([])
+    return pd.concat(chunks, ignore_index=True)
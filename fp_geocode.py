@@ -0,0 +1,128 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# GEOCODIFICACIÓ VECTORITZADA DE L'OFERTA DE FP
+# ----------------------------------------------------------------------
+#
+# Equivalent columnar de get_consistent_coords: la clau PROVINCIA_LOCALIDAD_CENTRO
+# es construeix amb una sola operació de columna, les coordenades reals es
+# resolen amb un únic join contra el catàleg (a.csv) i les simulades es
+# calculen per a totes les files sense coincidència alhora. El resultat és
+# idèntic bit a bit al de la versió fila a fila.
+
+_HASH_SCALE = float(0xFFFFFFFF)
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """Text amb els NaN com a 'nan' (també per a columnes categòriques)."""
+    return series.astype(object).fillna('nan').astype(str)
+
+
+def build_center_key(df: pd.DataFrame) -> pd.Series:
+    """Construeix la clau PROVINCIA_LOCALIDAD_CENTRO per a totes les files alhora (els NaN es formategen com 'nan', igual que amb f-string)."""
+    parts = [_as_text(df[col]) for col in ('PROVINCIA', 'LOCALIDAD', 'CENTRO')]
+    return parts[0] + "_" + parts[1] + "_" + parts[2]
+
+
+def build_coords_catalog(df_coords: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converteix el catàleg de centres ja netejat (columnes KEY, LATITUD, LONGITUD)
+    en una taula indexada per clau. Com a la caché original, guanya la primera aparició;
+    les claus nul·les no poden coincidir amb cap oferta i es descarten.
+    """
+    catalog = df_coords.dropna(subset=['KEY']).drop_duplicates(subset='KEY', keep='first')
+    return pd.DataFrame(
+        {'latitud': catalog['LATITUD'].to_numpy(dtype=float), 'longitud': catalog['LONGITUD'].to_numpy(dtype=float)},
+        index=pd.Index(catalog['KEY'], name='KEY'),
+    )
+
+
+def _md5_words(values) -> np.ndarray:
+    """Retorna els dos primers enters de 32 bits (big-endian) de l'md5 de cada text."""
+    digests = b''.join(hashlib.md5(v.encode()).digest() for v in values)
+    return np.frombuffer(digests, dtype='>u4').reshape(-1, 4)[:, :2].astype(np.float64)
+
+
+def simulated_coords(provincia: pd.Series, localidad: pd.Series, keys: pd.Series, province_center_coords: dict):
+    """
+    Coordenades simulades deterministes (hash md5) per a un conjunt de files.
+    L'md5 només es calcula una vegada per clau i per localitat diferents.
+    Retorna dos arrays (lat, lon); les províncies no mapejades queden a 0.0.
+    """
+    n = len(keys)
+    lat = np.zeros(n, dtype=np.float64)
+    lon = np.zeros(n, dtype=np.float64)
+
+    provincia = _as_text(provincia).to_numpy()
+    known = np.isin(provincia, list(province_center_coords.keys()))
+    if not known.any():
+        return lat, lon
+
+    prov_known = provincia[known]
+    base = {
+        field: np.array([province_center_coords[p][field] for p in pd.unique(prov_known)])
+        for field in ('lat', 'lon', 'delta_lat', 'delta_lon')
+    }
+    prov_codes = pd.Index(pd.unique(prov_known)).get_indexer(prov_known)
+    base_lat, base_lon = base['lat'][prov_codes], base['lon'][prov_codes]
+    delta_lat, delta_lon = base['delta_lat'][prov_codes], base['delta_lon'][prov_codes]
+
+    # Hash de la clau del centre (un md5 per clau única)
+    key_codes, key_uniques = pd.factorize(keys.astype(str).to_numpy()[known])
+    key_words = _md5_words(key_uniques)[key_codes]
+    norm_lat = key_words[:, 0] / _HASH_SCALE
+    norm_lon = key_words[:, 1] / _HASH_SCALE
+
+    # Hash de la localitat (un md5 per PROVINCIA_LOCALIDAD únic)
+    loc_keys = pd.Series(prov_known) + "_" + pd.Series(_as_text(localidad).to_numpy()[known])
+    loc_codes, loc_uniques = pd.factorize(loc_keys.to_numpy())
+    norm_localidad = _md5_words(loc_uniques)[loc_codes, 0] / _HASH_SCALE
+
+    # Mateix ordre d'operacions que get_consistent_coords (resultat idèntic bit a bit)
+    sim_lat = base_lat + (norm_lat - 0.5) * delta_lat * 1.5
+    sim_lon = base_lon + (norm_lon - 0.5) * delta_lon * 1.5
+    sim_lat += (norm_localidad - 0.5) * delta_lat * 0.2
+    sim_lon += (norm_localidad - 0.5) * delta_lon * 0.2
+
+    lat[known] = sim_lat
+    lon[known] = sim_lon
+    return lat, lon
+
+
+def geocode_offers(df: pd.DataFrame, coords_catalog: pd.DataFrame, province_center_coords: dict,
+                   matcher=None) -> pd.DataFrame:
+    """
+    Retorna un DataFrame (latitud, longitud) alineat amb `df`.
+    1. Coordenades reals: un únic join de la clau contra `coords_catalog`.
+    2. Amb `matcher` (fp_match.CenterMatcher), coincidència aproximada per a la resta.
+    3. Coordenades simulades per a les files que queden, calculades en bloc.
+    """
+    keys = build_center_key(df)
+
+    positions = coords_catalog.index.get_indexer(keys) if len(coords_catalog) else np.full(len(df), -1)
+    found = positions >= 0
+
+    lat = np.empty(len(df), dtype=np.float64)
+    lon = np.empty(len(df), dtype=np.float64)
+    lat[found] = coords_catalog['latitud'].to_numpy()[positions[found]]
+    lon[found] = coords_catalog['longitud'].to_numpy()[positions[found]]
+
+    missing = ~found
+    if matcher is not None and missing.any():
+        rows = np.flatnonzero(missing)
+        positions, _ = matcher.resolve(df['PROVINCIA'].iloc[rows], df['LOCALIDAD'].iloc[rows], df['CENTRO'].iloc[rows])
+        matched = positions >= 0
+        matched[matched] = ~np.isnan(matcher.latitude[positions[matched]]) & ~np.isnan(matcher.longitude[positions[matched]])
+        lat[rows[matched]] = matcher.latitude[positions[matched]]
+        lon[rows[matched]] = matcher.longitude[positions[matched]]
+        missing[rows[matched]] = False
+
+    if missing.any():
+        lat[missing], lon[missing] = simulated_coords(
+            df['PROVINCIA'][missing], df['LOCALIDAD'][missing], keys[missing], province_center_coords
+        )
+
+    return pd.DataFrame({'latitud': lat, 'longitud': lon}, index=df.index)
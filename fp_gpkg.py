@@ -0,0 +1,178 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# LECTOR DE GEOPACKAGE (12_Centros.gpkg) AMB sqlite3, SENSE GEOPANDAS
+# ----------------------------------------------------------------------
+#
+# Un GeoPackage és una base de dades SQLite. Cada geometria és un blob
+# amb una capçalera GPKG ('GP', versió, flags, srs_id i un envelope
+# opcional) seguida de WKB. Els blobs de totes les files es concatenen en
+# un sol buffer i les coordenades dels punts s'extrauen de cop amb NumPy.
+# Les consultes per rectangle utilitzen la taula rtree_<taula>_<columna>
+# que el mateix GeoPackage manté (extensió gpkg_rtree_index).
+
+GPKG_FILE = "12_Centros.gpkg"
+
+_GPKG_MAGIC = b'GP'
+_WKB_POINT = 1
+# Mida de l'envelope segons els bits 1-3 dels flags (0: cap, 1: xy, 2: xyz, 3: xym, 4: xyzm)
+_ENVELOPE_SIZES = np.array([0, 32, 48, 48, 64, 0, 0, 0], dtype=np.int64)
+
+
+def decode_points(blobs):
+    """
+    Descodifica en bloc geometries GPKG de tipus punt.
+    Retorna dos arrays float64 (x, y); les geometries buides o nul·les queden a NaN.
+    """
+    n = len(blobs)
+    x = np.full(n, np.nan)
+    y = np.full(n, np.nan)
+    present = np.array([blob is not None and len(blob) > 0 for blob in blobs], dtype=bool)
+    if not present.any():
+        return x, y
+
+    valid_blobs = [bytes(blob) for blob, ok in zip(blobs, present) if ok]
+    lengths = np.fromiter((len(blob) for blob in valid_blobs), dtype=np.int64, count=len(valid_blobs))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    buffer = np.frombuffer(b''.join(valid_blobs), dtype=np.uint8)
+
+    if not (buffer[starts] == _GPKG_MAGIC[0]).all() or not (buffer[starts + 1] == _GPKG_MAGIC[1]).all():
+        raise ValueError("Geometria sense capçalera GPKG ('GP')")
+
+    flags = buffer[starts + 3]
+    empty = (flags & 0b10000) != 0
+    wkb_start = starts + 8 + _ENVELOPE_SIZES[(flags >> 1) & 0b111]
+
+    # WKB: ordre de bytes (1 = little endian), tipus (uint32) i coordenades (2 x float64)
+    little = buffer[wkb_start] == 1
+    type_bytes = buffer[wkb_start[:, None] + np.arange(1, 5)]
+    type_bytes[~little] = type_bytes[~little, ::-1]
+    geom_type = type_bytes.copy().view('<u4').ravel() % 1000
+    if not (empty | (geom_type == _WKB_POINT)).all():
+        raise ValueError("Només es poden descodificar geometries de tipus punt")
+
+    def read_double(offset):
+        raw = buffer[(wkb_start + offset)[:, None] + np.arange(8)]
+        raw[~little] = raw[~little, ::-1]
+        return raw.copy().view('<f8').ravel()
+
+    coords_ok = ~empty
+    px = read_double(5)
+    py = read_double(13)
+    x[np.flatnonzero(present)[coords_ok]] = px[coords_ok]
+    y[np.flatnonzero(present)[coords_ok]] = py[coords_ok]
+    return x, y
+
+
+class GeoPackage:
+    """Accés de només lectura a les capes de punts d'un GeoPackage."""
+
+    def __init__(self, file_path=GPKG_FILE):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"No existeix el GeoPackage '{file_path}'")
+        self.file_path = file_path
+        self.connection = sqlite3.connect(f"file:{file_path}?mode=ro", uri=True, check_same_thread=False)
+        self._layers = None
+        self._primary_keys = {}
+        self._rtrees = {}
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def layers(self):
+        """Capes vectorials: {taula: {'column': columna de geometria, 'srs_id': codi EPSG}}."""
+        if self._layers is None:
+            rows = self.connection.execute(
+                "SELECT table_name, column_name, srs_id FROM gpkg_geometry_columns"
+            ).fetchall()
+            self._layers = {table: {'column': column, 'srs_id': srs_id} for table, column, srs_id in rows}
+        return self._layers
+
+    def _layer(self, table):
+        layers = self.layers()
+        if table is None:
+            if len(layers) != 1:
+                raise ValueError(f"Cal indicar la capa: {', '.join(layers)}")
+            table = next(iter(layers))
+        if table not in layers:
+            raise ValueError(f"La capa '{table}' no existeix al GeoPackage")
+        return table, layers[table]['column']
+
+    def srs_id(self, table=None):
+        """Codi EPSG del sistema de referència de la capa (p. ex. 25830)."""
+        table, _ = self._layer(table)
+        return self.layers()[table]['srs_id']
+
+    def _primary_key(self, table):
+        if table not in self._primary_keys:
+            columns = self.connection.execute(f'PRAGMA table_info("{table}")').fetchall()
+            self._primary_keys[table] = next((name for _, name, _, _, _, pk in columns if pk), 'rowid')
+        return self._primary_keys[table]
+
+    def has_rtree(self, table=None):
+        table, column = self._layer(table)
+        if table not in self._rtrees:
+            self._rtrees[table] = self.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f"rtree_{table}_{column}",)
+            ).fetchone() is not None
+        return self._rtrees[table]
+
+    def _frame(self, sql, params, geom_column, bbox=None):
+        cursor = self.connection.execute(sql, params)
+        names = [description[0] for description in cursor.description]
+        rows = cursor.fetchall()
+        geom_index = names.index(geom_column)
+        columns = list(zip(*rows)) if rows else [()] * len(names)
+
+        x, y = decode_points(columns[geom_index])
+        data = {name: values for name, values in zip(names, columns) if name != geom_column}
+        if bbox is not None:
+            min_x, min_y, max_x, max_y = bbox
+            keep = np.flatnonzero((x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y))
+            data = {name: [values[i] for i in keep] for name, values in data.items()}
+            x, y = x[keep], y[keep]
+
+        df = pd.DataFrame({name: list(values) for name, values in data.items()},
+                          columns=[name for name in names if name != geom_column])
+        df['x'] = x
+        df['y'] = y
+        return df
+
+    def read_points(self, table=None, columns=None):
+        """Llegeix una capa de punts: atributs (`columns` o tots) més les columnes x, y."""
+        table, geom = self._layer(table)
+        pk = self._primary_key(table)
+        select = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+        if columns:
+            select += f', "{geom}"'
+        return self._frame(f'SELECT {select} FROM "{table}" ORDER BY "{pk}"', (), geom)
+
+    def query_bbox(self, min_x, min_y, max_x, max_y, table=None, columns=None):
+        """
+        Punts dins del rectangle (en el sistema de referència de la capa) resolt amb l'índex R-tree.
+        Sense R-tree, es filtra sobre la capa sencera.
+        """
+        table, geom = self._layer(table)
+        bbox = (min_x, min_y, max_x, max_y)
+        if not self.has_rtree(table):
+            select = ", ".join(f'"{c}"' for c in columns) + f', "{geom}"' if columns else "*"
+            return self._frame(f'SELECT {select} FROM "{table}" ORDER BY "{self._primary_key(table)}"', (), geom, bbox)
+
+        pk = self._primary_key(table)
+        select = ", ".join(f't."{c}"' for c in columns) + f', t."{geom}"' if columns else "t.*"
+        sql = (
+            f'SELECT {select} FROM "{table}" t JOIN "rtree_{table}_{geom}" r ON t."{pk}" = r.id '
+            f'WHERE r.maxx >= ? AND r.minx <= ? AND r.maxy >= ? AND r.miny <= ? ORDER BY t."{pk}"'
+        )
+        # L'R-tree guarda caixes en float32 arrodonides cap a fora: es comprova el punt exacte
+        return self._frame(sql, (min_x, max_x, min_y, max_y), geom, bbox)
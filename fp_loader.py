@@ -0,0 +1,115 @@
+import threading
+import time
+
+# ----------------------------------------------------------------------
+# CÀRREGA DE DADES EN SEGON PLA
+# ----------------------------------------------------------------------
+#
+# Abans les aplicacions carregaven l'oferta en importar el mòdul: la
+# finestra no s'obria fins que s'havien llegit, netejat i geocodificat
+# tots els arxius, i qualsevol script que important el mòdul per a una
+# funció auxiliar pagava la mateixa càrrega. Ara la càrrega es fa una
+# sola vegada per procés en un fil, la primera sessió que la necessita la
+# posa en marxa i cada sessió rep el progrés per etapes per pintar-lo
+# mentre espera.
+
+
+class BackgroundLoader:
+    """
+    Executa `load_func(progress)` una sola vegada en un fil en segon pla.
+    `load_func` informa del progrés cridant `progress(etapa, fracció)` (fracció entre 0 i 1).
+    """
+
+    def __init__(self, load_func, name="fp-data-loader"):
+        self.load_func = load_func
+        self.name = name
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+        self._subscribers = []
+        self.stage = "En espera"
+        self.fraction = 0.0
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def elapsed(self):
+        """Segons des de l'inici de la càrrega (fins al final, si ja ha acabat)."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def start(self):
+        """Posa en marxa la càrrega si encara no s'ha fet (es pot cridar des de cada sessió)."""
+        with self._lock:
+            if self._thread is None:
+                self.started_at = time.perf_counter()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Espera el final de la càrrega i en retorna el resultat (torna a llançar l'error, si n'hi ha)."""
+        self.start()
+        self._done.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def subscribe(self, callback):
+        """
+        `callback(loader)` es cridarà a cada canvi d'etapa i en acabar (des del fil de càrrega).
+        Si la càrrega ja ha acabat, es crida immediatament.
+        """
+        with self._lock:
+            if not self.done:
+                self._subscribers.append(callback)
+                return
+        callback(self)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _notify(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"⚠️ No s'ha pogut mostrar el progrés de la càrrega en una sessió: {e}")
+
+    def _progress(self, stage, fraction):
+        self.stage = stage
+        self.fraction = max(0.0, min(1.0, fraction))
+        print(f"   ⏳ [{self.fraction:4.0%}] {stage} ({self.elapsed * 1000:.0f} ms)")
+        self._notify()
+
+    def _run(self):
+        try:
+            self.result = self.load_func(self._progress)
+            self.stage, self.fraction = "Dades carregades", 1.0
+        except Exception as e:
+            self.error = e
+            self.stage = f"Error en carregar les dades: {e}"
+            print(f"❌ {self.stage}")
+        finally:
+            self.finished_at = time.perf_counter()
+            with self._lock:
+                self._done.set()
+                subscribers = list(self._subscribers)
+                self._subscribers.clear()
+            print(f"⏱️ Dades a punt en {self.elapsed * 1000:.0f} ms.")
+            for callback in subscribers:
+                try:
+                    callback(self)
+                except Exception as e:
+                    print(f"⚠️ No s'ha pogut completar la càrrega en una sessió: {e}")
@@ -0,0 +1,274 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from fp_search import normalize_text, trigrams
+
+# ----------------------------------------------------------------------
+# COINCIDÈNCIA APROXIMADA DE CENTRES AMB EL CATÀLEG (a.csv)
+# ----------------------------------------------------------------------
+#
+# El join de coordenades només funcionava si PROVINCIA_LOCALIDAD_CENTRO
+# coincidia exactament. Les localitats bilingües del catàleg
+# ('ALACANT/ALICANTE', 'LA VILA JOIOSA/VILLAJOYOSA' contra 'VILA JOIOSA
+# (LA)'), les províncies ('CASTELLÓ/CASTELLÓN'), els espais sobrants i les
+# abreviatures ('C.P.F.P.') enviaven molts centres a les coordenades
+# simulades. Ara els centres que no coincideixen exactament es busquen
+# per blocs: primer els del catàleg de la mateixa província i localitat
+# (qualsevol de les variants del nom) i, si no n'hi ha, els de tota la
+# província. Dins del bloc, cada candidat puntua per paraules compartides
+# i per trigrames del nom normalitzat. Els blocs, les paraules i els
+# trigrames del catàleg es calculen una sola vegada.
+#
+# Cada coincidència porta una confiança entre 0 i 1; per sota de
+# MIN_CONFIDENCE es considera que el centre no és al catàleg. La taula
+# d'excepcions (OVERRIDES_FILE) fixa a mà el codi de centre (CODCEN)
+# d'una oferta, o el deixa buit per no assignar-li'n cap.
+
+OVERRIDES_FILE = "center_overrides.csv"
+OVERRIDE_COLUMNS = ['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'CODCEN']
+# Columnes de la taula de revisió (report)
+REPORT_COLUMNS = ['PROVINCIA', 'LOCALIDAD', 'CENTRO', 'CODCEN', 'CENTRO_CATALEG', 'LOCALIDAD_CATALEG',
+                  'CONFIANÇA', 'MÈTODE']
+
+MIN_CONFIDENCE = 0.6
+# Penalització de la confiança quan el bloc no és la localitat exacta
+FUZZY_LOCALITY_FACTOR = 0.9
+PROVINCE_BLOCK_FACTOR = 0.75
+MIN_LOCALITY_SIMILARITY = 0.7
+
+# Mètode de cada coincidència
+METHOD_OVERRIDE = 'excepció'
+METHOD_FUZZY = 'aproximada'
+METHOD_NONE = 'sense coincidència'
+
+ARTICLES = {'el', 'la', 'l', 'els', 'les', 'los', 'las', 'lo'}
+STOP_WORDS = ARTICLES | {'de', 'del', 'd', 'i', 'y', 'a', 'en'}
+# Tipus de centre: no compten com a paraules del nom ('IES EL PALMERAL' ~ 'CIPFP EL PALMERAL'),
+# però si els dos noms en porten i no coincideixen, la confiança baixa
+TYPE_WORDS = {'ies', 'cipfp', 'ceip', 'cee', 'cra', 'ei', 'fpa', 'seccio', 'secio', 'centre', 'escola'}
+TYPE_MISMATCH_FACTOR = 0.9
+ABBREVIATIONS = {
+    'cpfp': 'cipfp',
+    'centro': 'centre',
+    'escuela': 'escola',
+    'priv': 'privat',
+    'privado': 'privat',
+    'ed': 'educacio',
+    'inf': 'infantil',
+    'ens': 'ensenyaments',
+    'sra': 'senora',
+    'ntra': 'nuestra',
+}
+
+# Article al final: 'VILA JOIOSA (LA)', 'PUIG DE SANTA MARIA [EL]', 'PINÓS, EL'
+_TRAILING_ARTICLE_RE = re.compile(r'^(.*?)\s*(?:\(([^)]*)\)|\[([^\]]*)\]|,\s*([^,]+))\s*$')
+
+
+def name_tokens(name):
+    """Paraules d'un nom de centre normalitzat: sense accents, sigles juntes ('c p f p' -> 'cipfp') i abreviatures."""
+    tokens, letters = [], []
+    for token in normalize_text(name).split():
+        if len(token) == 1 and token.isalpha():
+            letters.append(token)
+            continue
+        if letters:
+            tokens.append(''.join(letters))
+            letters = []
+        tokens.append(token)
+    if letters:
+        tokens.append(''.join(letters))
+    return [ABBREVIATIONS.get(token, token) for token in tokens]
+
+
+def place_keys(name):
+    """
+    Variants normalitzades d'un nom de localitat o província: cada part d'un nom bilingüe
+    ('ALCOI/ALCOY'), amb l'article de darrere ('VILA JOIOSA (LA)') o de davant eliminat.
+    """
+    keys = set()
+    for part in str(name).split('/'):
+        trailing = _TRAILING_ARTICLE_RE.match(part)
+        if trailing and normalize_text(next(g for g in trailing.groups()[1:] if g is not None)) in ARTICLES:
+            part = trailing.group(1)
+        tokens = normalize_text(part).split()
+        while len(tokens) > 1 and tokens[0] in ARTICLES:
+            tokens = tokens[1:]
+        if tokens:
+            keys.add(' '.join(tokens))
+    return keys
+
+
+def similarity(tokens_a, grams_a, tokens_b, grams_b):
+    """
+    Mitjana de la semblança per paraules (Jaccard, sense paraules buides ni tipus de centre)
+    i per trigrames (Dice), rebaixada si els tipus de centre dels dos noms no coincideixen.
+    """
+    ignored = STOP_WORDS | TYPE_WORDS
+    words_a, words_b = tokens_a - ignored, tokens_b - ignored
+    union = len(words_a | words_b)
+    token_score = len(words_a & words_b) / union if union else 0.0
+    total = len(grams_a) + len(grams_b)
+    gram_score = 2 * len(grams_a & grams_b) / total if total else 0.0
+    score = (token_score + gram_score) / 2
+    types_a, types_b = tokens_a & TYPE_WORDS, tokens_b & TYPE_WORDS
+    if types_a and types_b and not types_a & types_b:
+        score *= TYPE_MISMATCH_FACTOR
+    return score
+
+
+def _name_grams(tokens):
+    return set().union(*(trigrams(token) for token in tokens)) if tokens else set()
+
+
+def load_overrides(file_path=OVERRIDES_FILE):
+    """Taula d'excepcions {(província, localitat, centre) normalitzats: CODCEN o None}; buida si no hi ha arxiu."""
+    if not os.path.exists(file_path):
+        return {}
+    table = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    overrides = {}
+    for prov, loc, centro, codcen in table[OVERRIDE_COLUMNS].itertuples(index=False, name=None):
+        codcen = codcen.strip()
+        overrides[_override_key(prov, loc, centro)] = codcen.zfill(8) if codcen else None
+    print(f"✅ {len(overrides)} excepcions de centres carregades de '{file_path}'.")
+    return overrides
+
+
+def save_overrides(rows, file_path=OVERRIDES_FILE):
+    """Guarda la taula d'excepcions: `rows` és una llista de (PROVINCIA, LOCALIDAD, CENTRO, CODCEN o '')."""
+    pd.DataFrame(rows, columns=OVERRIDE_COLUMNS).to_csv(file_path, index=False)
+
+
+def _override_key(provincia, localidad, centro):
+    return normalize_text(provincia), normalize_text(localidad), ' '.join(name_tokens(centro))
+
+
+class CenterMatcher:
+    """
+    Resol ofertes (província, localitat, centre) a files del catàleg de centres
+    (columnes CODCEN, CENTRO, LOCALIDAD, PROVINCIA, LATITUD, LONGITUD de CenterCatalog).
+    """
+
+    def __init__(self, catalog_frame, overrides=None):
+        self.frame = catalog_frame.reset_index(drop=True)
+        self.overrides = overrides or {}
+        self.latitude = pd.to_numeric(self.frame['LATITUD'], errors='coerce').to_numpy(dtype=float)
+        self.longitude = pd.to_numeric(self.frame['LONGITUD'], errors='coerce').to_numpy(dtype=float)
+        self._resolved = {}
+
+        # Paraules i trigrames de cada nom del catàleg
+        self._tokens = []
+        self._grams = []
+        for name in self.frame['CENTRO'].fillna(''):
+            tokens = name_tokens(name)
+            self._tokens.append(set(tokens))
+            self._grams.append(_name_grams(tokens))
+
+        # Blocs: posicions per província i per (província, localitat), per a cada variant del nom
+        self._province_blocks = {}
+        self._locality_blocks = {}
+        self._locality_grams = {}
+        keys = {}
+        places = zip(self.frame['PROVINCIA'].fillna(''), self.frame['LOCALIDAD'].fillna(''))
+        for position, (prov, loc) in enumerate(places):
+            if (prov, loc) not in keys:
+                keys[(prov, loc)] = (place_keys(prov), place_keys(loc))
+            prov_keys, loc_keys = keys[(prov, loc)]
+            for prov_key in prov_keys:
+                self._province_blocks.setdefault(prov_key, []).append(position)
+                for loc_key in loc_keys:
+                    self._locality_blocks.setdefault((prov_key, loc_key), []).append(position)
+                    self._locality_grams.setdefault(prov_key, {})[loc_key] = trigrams(loc_key)
+
+        self._positions_by_code = {code: position for position, code in
+                                   reversed(list(enumerate(self.frame['CODCEN'].fillna(''))))}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _block(self, provincia, localidad):
+        """Candidats (posicions) i factor de confiança del bloc."""
+        prov_keys = place_keys(provincia)
+        loc_keys = place_keys(localidad)
+        candidates = {position for prov_key in prov_keys for loc_key in loc_keys
+                      for position in self._locality_blocks.get((prov_key, loc_key), ())}
+        if candidates:
+            return candidates, 1.0
+
+        # Localitat escrita d'una altra manera: la més semblant de la província
+        best, best_score = None, MIN_LOCALITY_SIMILARITY
+        for prov_key in prov_keys:
+            for loc_key, grams in self._locality_grams.get(prov_key, {}).items():
+                for wanted in loc_keys:
+                    wanted_grams = trigrams(wanted)
+                    score = 2 * len(grams & wanted_grams) / (len(grams) + len(wanted_grams))
+                    if score > best_score:
+                        best, best_score = (prov_key, loc_key), score
+        if best is not None:
+            return set(self._locality_blocks[best]), FUZZY_LOCALITY_FACTOR
+
+        candidates = {position for prov_key in prov_keys for position in self._province_blocks.get(prov_key, ())}
+        return candidates, PROVINCE_BLOCK_FACTOR
+
+    def match(self, provincia, localidad, centro):
+        """
+        Millor fila del catàleg per a una oferta: (posició, confiança, mètode).
+        Posició -1 si no hi ha cap candidat amb confiança suficient o l'excepció no n'assigna cap.
+        """
+        cache_key = (provincia, localidad, centro)
+        if cache_key in self._resolved:
+            return self._resolved[cache_key]
+
+        override_key = _override_key(provincia, localidad, centro)
+        if override_key in self.overrides:
+            position = self._positions_by_code.get(self.overrides[override_key], -1)
+            result = (position, 1.0 if position >= 0 else 0.0, METHOD_OVERRIDE)
+        else:
+            tokens = name_tokens(centro)
+            token_set, grams = set(tokens), _name_grams(tokens)
+            candidates, factor = self._block(provincia, localidad)
+            best, best_score = -1, 0.0
+            for position in sorted(candidates):
+                score = similarity(token_set, grams, self._tokens[position], self._grams[position])
+                if score > best_score:
+                    best, best_score = position, score
+            confidence = best_score * factor
+            if confidence >= MIN_CONFIDENCE:
+                result = (best, confidence, METHOD_FUZZY)
+            else:
+                result = (-1, confidence, METHOD_NONE)
+
+        self._resolved[cache_key] = result
+        return result
+
+    def resolve(self, provincia, localidad, centro):
+        """
+        Versió per columnes de `match`: arrays (posicions, confiances) alineats amb les entrades.
+        Cada combinació distinta es resol una sola vegada.
+        """
+        places = pd.DataFrame({'p': pd.Series(provincia).astype(str).to_numpy(),
+                               'l': pd.Series(localidad).astype(str).to_numpy(),
+                               'c': pd.Series(centro).astype(str).to_numpy()})
+        codes, uniques = pd.factorize(pd.MultiIndex.from_frame(places))
+        matches = [self.match(*values) for values in uniques]
+        positions = np.array([m[0] for m in matches], dtype=np.int64)[codes]
+        confidences = np.array([m[1] for m in matches], dtype=float)[codes]
+        return positions, confidences
+
+    def report(self, provincia, localidad, centro):
+        """Taula de revisió: una fila per centre distint amb el centre triat, la confiança i el mètode."""
+        rows = []
+        for prov, loc, name in pd.DataFrame({'p': provincia, 'l': localidad, 'c': centro}).drop_duplicates().itertuples(
+                index=False, name=None):
+            position, confidence, method = self.match(prov, loc, name)
+            found = self.frame.iloc[position] if position >= 0 else None
+            rows.append({
+                'PROVINCIA': prov, 'LOCALIDAD': loc, 'CENTRO': name,
+                'CODCEN': found['CODCEN'] if found is not None else '',
+                'CENTRO_CATALEG': found['CENTRO'] if found is not None else '',
+                'LOCALIDAD_CATALEG': found['LOCALIDAD'] if found is not None else '',
+                'CONFIANÇA': round(confidence, 3), 'MÈTODE': method,
+            })
+        return pd.DataFrame(rows, columns=REPORT_COLUMNS).sort_values('CONFIANÇA', ignore_index=True)
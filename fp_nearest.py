@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from fp_filter import shared_for_frame
+from fp_spatial import haversine_km
+
+# ----------------------------------------------------------------------
+# CENTRES MÉS PROPERS A UN PUNT (MODE "A PROP DE")
+# ----------------------------------------------------------------------
+#
+# Les famílies trien un cicle i volen saber quins són els centres més
+# propers que l'ofereixen. Per a cada conjunt de dades es calcula una
+# sola vegada el codi de centre de cada fila (PROVINCIA, LOCALIDAD,
+# CENTRO) i les coordenades de cada centre. Una consulta rep les files
+# que ja han passat els filtres (cicle, grau, torn...), en treu els
+# centres distints, en calcula la distància de cercle màxim (haversine
+# vectoritzat) i es queda amb els K més propers amb argpartition. Tot
+# són operacions sobre arrays de l'índex compartit, sense còpies per
+# sessió: el cost depén de les files filtrades, no de les sessions.
+#
+# Els centres sense coordenades (NaN o (0, 0)) no entren al rànquing.
+#
+# El punt de partida pot ser una localitat: el punt mitjà dels seus
+# centres al catàleg (a.csv) o, si el catàleg no s'ha llegit perquè les
+# dades venen d'una instantània, dels centres de la mateixa oferta.
+
+DEFAULT_K = 10
+
+CENTER_COLUMNS = ['PROVINCIA', 'LOCALIDAD', 'CENTRO']
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+def locality_points(provincia, localidad, lat, lon):
+    """
+    Taula (PROVINCIA, LOCALIDAD, LATITUD, LONGITUD) amb el punt mitjà dels punts de cada
+    localitat, indexada per l'etiqueta "LOCALIDAD (PROVINCIA)" i ordenada per localitat.
+    """
+    points = pd.DataFrame({
+        'PROVINCIA': pd.Series(provincia, dtype=object).to_numpy(),
+        'LOCALIDAD': pd.Series(localidad, dtype=object).to_numpy(),
+        'LATITUD': np.asarray(lat, dtype=float),
+        'LONGITUD': np.asarray(lon, dtype=float),
+    }).dropna()
+    points = points[~((points['LATITUD'] == 0.0) & (points['LONGITUD'] == 0.0))]
+    points = (points.groupby(['PROVINCIA', 'LOCALIDAD'], sort=False)[['LATITUD', 'LONGITUD']]
+              .mean().reset_index().sort_values(['LOCALIDAD', 'PROVINCIA']))
+    points.index = (points['LOCALIDAD'].astype(str) + ' (' + points['PROVINCIA'].astype(str) + ')').to_numpy()
+    return points
+
+
+class NearestCenters:
+    """Codi de centre per fila i coordenades per centre d'un DataFrame d'oferta (posicions de iloc)."""
+
+    def __init__(self, df):
+        self.df = df
+        keys = pd.MultiIndex.from_arrays([df[col].astype(object).to_numpy() for col in CENTER_COLUMNS])
+        codes, uniques = pd.factorize(keys)
+        self.codes = codes.astype(np.int64)
+        self.n_centers = len(uniques)
+
+        # Coordenades de la primera fila de cada centre (totes les files d'un centre en tenen les mateixes)
+        _, first = np.unique(self.codes, return_index=True)
+        self.first = first
+        self.lat = df['latitud'].to_numpy(dtype=float)[first]
+        self.lon = df['longitud'].to_numpy(dtype=float)[first]
+        self.valid = np.isfinite(self.lat) & np.isfinite(self.lon) & ~((self.lat == 0.0) & (self.lon == 0.0))
+        self._locality_points = None
+
+    @property
+    def locality_points(self):
+        """Punt mitjà dels centres de l'oferta de cada localitat (com CenterCatalog.locality_points)."""
+        if self._locality_points is None:
+            self._locality_points = locality_points(self.df['PROVINCIA'].to_numpy()[self.first],
+                                                    self.df['LOCALIDAD'].to_numpy()[self.first],
+                                                    self.lat, self.lon)
+        return self._locality_points
+
+    def nearest(self, lat, lon, rows=None, k=DEFAULT_K):
+        """
+        Files de `rows` (per defecte, totes) que pertanyen als `k` centres més propers al punt,
+        ordenades per distància del centre i, dins de cada centre, per posició.
+        Retorna (files, distància en km del centre de cada fila, nombre de centres).
+        """
+        rows = np.arange(len(self.codes), dtype=np.int64) if rows is None else np.asarray(rows, dtype=np.int64)
+        row_codes = self.codes[rows]
+        centers = np.unique(row_codes)
+        centers = centers[self.valid[centers]]
+        if len(centers) == 0:
+            return _EMPTY_ROWS, np.empty(0), 0
+
+        distance = haversine_km(self.lat[centers], self.lon[centers], lat, lon)
+        if len(centers) > k:
+            keep = np.argpartition(distance, k - 1)[:k]
+            centers, distance = centers[keep], distance[keep]
+        order = np.lexsort((centers, distance))
+        centers, distance = centers[order], distance[order]
+
+        # Rang de cada centre triat (-1 la resta) i files dels centres triats, per rang i posició
+        rank = np.full(self.n_centers, -1, dtype=np.int64)
+        rank[centers] = np.arange(len(centers))
+        row_rank = rank[row_codes]
+        chosen = row_rank >= 0
+        selected, selected_rank = rows[chosen], row_rank[chosen]
+        order = np.lexsort((selected, selected_rank))
+        return selected[order], distance[selected_rank[order]], len(centers)
+
+    def nearest_by_value(self, lat, lon, rows, values, k=DEFAULT_K):
+        """
+        Files de `rows` que són dels `k` centres més propers al punt d'entre els que tenen el
+        mateix valor (`values`: codi enter de cada fila de l'oferta, -1 sense valor): per a
+        cada valor, les que tornaria `nearest` si se filtrara per ell. Sense ordre.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[self.valid[self.codes[rows]]]
+        if len(rows) == 0:
+            return _EMPTY_ROWS
+        row_codes = self.codes[rows]
+        centers = np.unique(row_codes)
+        distance = haversine_km(self.lat[centers], self.lon[centers], lat, lon)
+        # Rang de cada centre per distància (en un empat, el codi), com a `nearest`
+        rank = np.empty(self.n_centers, dtype=np.int64)
+        rank[centers[np.lexsort((centers, distance))]] = np.arange(len(centers))
+
+        # Parells (valor, rang del centre) distints, ordenats; es queden els k primers de cada valor
+        pair = (np.asarray(values)[rows].astype(np.int64) + 1) * len(centers) + rank[row_codes]
+        pairs = np.unique(pair)
+        pair_values = pairs // len(centers)
+        _, starts, counts = np.unique(pair_values, return_index=True, return_counts=True)
+        ordinal = np.arange(len(pairs)) - np.repeat(starts, counts)
+        return rows[np.isin(pair, pairs[ordinal < k])]
+
+
+def get_nearest_index(df):
+    """Índex de centres de `df`, construït la primera vegada i compartit mentre algú l'use."""
+    return shared_for_frame(df, NearestCenters)
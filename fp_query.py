@@ -0,0 +1,101 @@
+import numpy as np
+
+from fp_cube import get_units_cube
+from fp_filter import get_filter_index
+from fp_nearest import get_nearest_index
+from fp_search import get_search_index, normalize_text
+from fp_sort import get_sort_index
+from fp_spatial import get_spatial_index
+
+# ----------------------------------------------------------------------
+# RESULTATS DE CONSULTA COMPARTITS ENTRE SESSIONS I PESTANYES
+# ----------------------------------------------------------------------
+#
+# En mode web cada sessió del navegador tornava a filtrar pel seu compte,
+# tot i que la majoria comencen per la mateixa vista ("totes les
+# províncies / tots els graus") i unes poques províncies populars. Ara
+# el resultat d'una consulta (les files, en l'ordre del resultat i en
+# l'ordre de la llista, els totals i l'URL del mapa amb el seu requadre)
+# es guarda en una memòria cau LRU del procés, amb la signatura
+# normalitzada de la consulta com a clau. La signatura comença pel token
+# del FilterIndex, que identifica el conjunt de dades: després d'una
+# recàrrega les claus velles ja no coincideixen amb cap consulta nova.
+#
+# Un QueryResult és de només lectura: el comparteixen totes les sessions.
+# Per això els seus arrays es marquen com a no modificables (rows pot ser
+# el mateix FilterIndex.all_rows).
+#
+# Una consulta es calcula en un altre fil amb els índexs (QueryIndexes)
+# que tenia la pestanya quan es va enviar: una recàrrega que els canvia
+# mentrestant no li barreja files de dos conjunts de dades.
+
+RESULT_CACHE_SIZE = 256
+
+# Decimals de les coordenades de referència a la signatura (~1 cm)
+COORD_DECIMALS = 7
+
+
+class QueryIndexes:
+    """Índexs compartits d'un conjunt de dades (filtres, cerca, espacial, "a prop de", cub i ordres)."""
+
+    def __init__(self, df):
+        self.df = df
+        self.filter_index = get_filter_index(df)
+        self.search_index = get_search_index(df)
+        self.spatial_index = get_spatial_index(df)
+        self.nearest_index = get_nearest_index(df)
+        self.units_cube = get_units_cube(df)
+        self.sort_index = get_sort_index(df)
+
+
+def _read_only(array):
+    """`array` (o None) marcat com a no modificable: una escriptura per error fallaria en lloc de canviar la memòria cau."""
+    if array is None:
+        return None
+    array = np.asarray(array)
+    array.flags.writeable = False
+    return array
+
+
+class QueryResult:
+    """
+    Resultat d'una consulta: files (posicions) en l'ordre del resultat, ordre de la llista
+    (posicions dins de `rows`, o None si és el mateix), distàncies (de cada fila de `rows`, del
+    mode "a prop de" o de l'ordre per distància) i centres del mode "a prop de", unitats totals,
+    URL del mapa i si només hi ha filtres de desplegables.
+    """
+
+    def __init__(self, rows, order, total_units, map_url, distances=None, n_centers=0, filters_only=True):
+        self.rows = _read_only(rows)
+        self.order = _read_only(order)
+        self.total_units = total_units
+        self.map_url = map_url
+        self.distances = _read_only(distances)
+        self.n_centers = n_centers
+        self.filters_only = filters_only
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def _point_key(point):
+    return None if point is None else (round(point[0], COORD_DECIMALS), round(point[1], COORD_DECIMALS))
+
+
+def query_signature(token, filters, search="", radius_km=None, radius_point=None, near_point=None, k=None,
+                    sort=None, sort_point=None):
+    """
+    Clau normalitzada d'una consulta: conjunt de dades (token de l'índex), filtres ordenats,
+    text de cerca sense accents ni majúscules, radi amb el seu punt, punt del mode "a prop de"
+    i ordre de la llista (amb el punt, si és per distància).
+    Dues consultes amb la mateixa signatura tenen el mateix resultat.
+    """
+    search = " ".join(normalize_text(search or "").split())
+    return (
+        token,
+        tuple(sorted(filters.items())),
+        search,
+        (radius_km, _point_key(radius_point)) if radius_km else None,
+        (_point_key(near_point), k) if near_point else None,
+        (sort, _point_key(sort_point)) if sort else None,
+    )
@@ -0,0 +1,109 @@
+import os
+import threading
+
+# ----------------------------------------------------------------------
+# RECÀRREGA EN CALENT DE LES DADES D'OFERTA
+# ----------------------------------------------------------------------
+#
+# DatasetStore guarda el conjunt de dades actual (dict de DataFrames) que
+# comparteixen totes les sessions. Una recàrrega construeix un dict nou
+# sencer en segon pla i el publica amb una sola assignació: cap sessió no
+# pot veure un conjunt a mig construir. Després s'avisa cada sessió
+# subscrita perquè refresque els desplegables i els resultats.
+#
+# SourceWatcher vigila els arxius d'origen per sondeig (mida i mtime) i
+# només avisa quan un arxiu canviat s'ha mantingut estable durant un
+# interval, per no llegir-lo mentre encara s'està escrivint.
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+class DatasetStore:
+    """Conjunt de dades actual, compartit per totes les sessions de l'aplicació."""
+
+    def __init__(self, data_frames):
+        self._lock = threading.Lock()
+        self._data = data_frames
+        self._subscribers = []
+        self.version = 1
+
+    @property
+    def data(self):
+        """Dict de DataFrames vigent (una referència: no canvia encara que hi haja una recàrrega)."""
+        return self._data
+
+    def subscribe(self, callback):
+        """`callback(data_frames)` es cridarà després de cada recàrrega."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def swap(self, data_frames):
+        """Publica un conjunt nou ja construït i avisa les sessions subscrites."""
+        with self._lock:
+            self._data = data_frames
+            self.version += 1
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(data_frames)
+            except Exception as e:
+                print(f"⚠️ No s'ha pogut refrescar una sessió després de la recàrrega: {e}")
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+
+class SourceWatcher(threading.Thread):
+    """
+    Fil en segon pla que crida `on_change(changed_paths)` quan algun dels
+    arxius vigilats canvia (i ja no s'està escrivint).
+    """
+
+    def __init__(self, paths, on_change, interval=DEFAULT_POLL_INTERVAL):
+        super().__init__(name="fp-source-watcher", daemon=True)
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self._seen = {path: _stat(path) for path in self.paths}
+        self._pending = {}
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def poll(self):
+        """Una passada de sondeig. Retorna els arxius canviats i estables (i en crida on_change)."""
+        ready = set()
+        for path in self.paths:
+            current = _stat(path)
+            if current == self._seen[path] or current is None:
+                self._pending.pop(path, None)
+                continue
+            if self._pending.get(path) == current:
+                ready.add(path)
+            else:
+                self._pending[path] = current
+
+        if ready:
+            try:
+                self.on_change(ready)
+            except Exception as e:
+                print(f"❌ Error en recarregar {', '.join(sorted(ready))}: {e}")
+            for path in ready:
+                self._seen[path] = self._pending.pop(path)
+        return ready
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.poll()
@@ -0,0 +1,157 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from fp_filter import shared_for_frame
+
+# ----------------------------------------------------------------------
+# CERCA LLIURE PER TRIGRAMES (SENSE ACCENTS NI MAJÚSCULES)
+# ----------------------------------------------------------------------
+#
+# Per trobar "ciberseguridad" calia recórrer el desplegable de cicles, i
+# les variants amb o sense accent (VALÈNCIA / VALENCIA) o d'ortografia
+# (MANTENIMENTO / MANTENIMIENTO) no coincidien. Ara els textos de CICLO,
+# FAMILIA, CENTRO i LOCALIDAD es normalitzen (sense accents, en
+# minúscules) i es parteixen en paraules; cada paraula distinta s'indexa
+# pels seus trigrames. Una consulta puntua cada paraula pels trigrames que
+# comparteix amb cada terme escrit (l'últim terme compta com a prefix,
+# perquè l'usuari encara l'està escrivint) i una fila puntua per la millor
+# coincidència de cada terme en qualsevol de les quatre columnes. Només es
+# treballa sobre el vocabulari (uns pocs milers de paraules) i sobre els
+# codis enters de les files, de manera que cada tecla es resol en menys
+# d'un mil·lisegon.
+
+SEARCH_COLUMNS = ['CICLO', 'FAMILIA', 'CENTRO', 'LOCALIDAD']
+
+# Pes de cada tipus de coincidència d'un terme amb una paraula
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.9
+FUZZY_WEIGHT = 0.75
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_text(text):
+    """Text en minúscules, sense accents ni signes ('VALÈNCIA / C.I.P.F.P.' -> 'valencia c i p f p')."""
+    decomposed = unicodedata.normalize('NFKD', str(text).lower())
+    ascii_text = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM_RE.sub(' ', ascii_text).strip()
+
+
+def trigrams(word, prefix=False):
+    """Trigrames d'una paraula amb farciment; amb `prefix`, sense el de final de paraula."""
+    padded = f"  {word}" if prefix else f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def allowed_misses(term):
+    """Trigrames que un terme pot no compartir amb la paraula (0 per als termes curts)."""
+    return 0 if len(term) < 5 else len(term) // 4
+
+
+class SearchIndex:
+    """Índex de trigrames sobre les paraules de SEARCH_COLUMNS d'un DataFrame d'oferta."""
+
+    def __init__(self, df, columns=SEARCH_COLUMNS):
+        self.df = df
+        self.n_rows = len(df)
+        self.columns = [col for col in columns if col in df.columns]
+        self._codes = {}
+        self._pairs = {}
+
+        vocabulary = {}
+        for col in self.columns:
+            codes, categories = pd.factorize(df[col], sort=True)
+            self._codes[col] = codes.astype(np.int32)
+            # Parells (paraula, codi del valor) de cada valor distint de la columna
+            pair_words, pair_values = [], []
+            for code, value in enumerate(categories):
+                for word in set(normalize_text(value).split()):
+                    pair_words.append(vocabulary.setdefault(word, len(vocabulary)))
+                    pair_values.append(code)
+            self._pairs[col] = (np.array(pair_words, dtype=np.int32), np.array(pair_values, dtype=np.int32) + 1,
+                                len(categories) + 1)
+
+        self.words = np.array(list(vocabulary), dtype=object)
+        postings = defaultdict(list)
+        for word_id, word in enumerate(self.words):
+            for gram in trigrams(word):
+                postings[gram].append(word_id)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def match_words(self, term, prefix=False):
+        """
+        Paraules del vocabulari que coincideixen amb `term` (ja normalitzat) i la seua puntuació
+        entre 0 i 1: exacta > prefix > aproximada (per trigrames compartits).
+        """
+        grams = trigrams(term, prefix)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.words))
+        word_ids = np.flatnonzero(shared >= len(grams) - allowed_misses(term))
+        scores = shared[word_ids] / len(grams)
+
+        words = self.words[word_ids]
+        weights = np.full(len(word_ids), FUZZY_WEIGHT)
+        if prefix:
+            weights[[word.startswith(term) for word in words]] = PREFIX_WEIGHT
+        weights[words == term] = EXACT_WEIGHT
+        return word_ids, scores * weights
+
+    def _term_row_scores(self, term, prefix):
+        """Millor puntuació del terme en cada fila (0 si no coincideix en cap columna)."""
+        word_ids, scores = self.match_words(term, prefix)
+        row_scores = np.zeros(self.n_rows)
+        if len(word_ids) == 0:
+            return row_scores
+        word_scores = np.zeros(len(self.words))
+        word_scores[word_ids] = scores
+        for col in self.columns:
+            pair_words, pair_values, n_slots = self._pairs[col]
+            # Millor paraula de cada valor; +1: el codi -1 (NaN) va a la primera casella, que val 0
+            value_scores = np.zeros(n_slots)
+            np.maximum.at(value_scores, pair_values, word_scores[pair_words])
+            np.maximum(row_scores, value_scores[self._codes[col] + 1], out=row_scores)
+        return row_scores
+
+    def scores(self, query):
+        """
+        Puntuació de cada fila per a `query` (0 si no la compleix): cada terme ha de coincidir
+        en alguna columna i la puntuació és la suma de les millors coincidències de cada terme.
+        Sense termes, None.
+        """
+        terms = normalize_text(query).split()
+        if not terms:
+            return None
+        total = np.zeros(self.n_rows)
+        for i, term in enumerate(terms):
+            row_scores = self._term_row_scores(term, prefix=(i == len(terms) - 1))
+            total = np.where(row_scores > 0, total + row_scores, 0) if i else row_scores
+            if not total.any():
+                break
+        return total
+
+    def search(self, query, rows=None):
+        """
+        Posicions de les files (d'entre `rows`, per defecte totes) que compleixen `query`,
+        ordenades per puntuació (les empatades, en l'ordre original), i les seues puntuacions.
+        """
+        scores = self.scores(query)
+        if rows is None:
+            rows = np.arange(self.n_rows, dtype=np.int64)
+        if scores is None:
+            return rows, np.zeros(len(rows))
+        row_scores = scores[rows]
+        keep = row_scores > 0
+        rows, row_scores = rows[keep], row_scores[keep]
+        order = np.argsort(-row_scores, kind='stable')
+        return rows[order], row_scores[order]
+
+
+def get_search_index(df, columns=SEARCH_COLUMNS):
+    """Índex de cerca del DataFrame `df`, construït la primera vegada i compartit mentre algú l'use."""
+    return shared_for_frame(df, SearchIndex, tuple(columns))
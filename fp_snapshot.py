@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# INSTANTÀNIA COLUMNAR (PARQUET) DELS DATAFRAMES D'OFERTA NETEJATS
+# ----------------------------------------------------------------------
+#
+# La primera arrancada llegeix els CSV, els neteja i els geocodifica; el
+# resultat es guarda en Parquet dins de SNAPSHOT_DIR juntament amb la
+# signatura (mida, mtime i hash del contingut) dels arxius d'origen.
+# Les arrancades següents carreguen directament l'instantània mentre cap
+# arxiu d'origen no haja canviat.
+
+# Intentar importar pyarrow (necessari per a Parquet)
+PARQUET_AVAILABLE = False
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    pass
+
+SNAPSHOT_DIR = ".fp_cache"
+
+# S'ha d'incrementar quan canvie la lògica de neteja, per invalidar instantànies antigues
+SNAPSHOT_VERSION = 3
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_signature(file_path):
+    """Retorna la signatura (mida, mtime i md5 del contingut) d'un arxiu, o None si no existeix."""
+    if not os.path.exists(file_path):
+        return None
+
+    stat = os.stat(file_path)
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'md5': digest.hexdigest()}
+
+
+def sources_signature(source_files):
+    """Signatura conjunta de tots els arxius d'origen d'una instantània."""
+    return {
+        'version': SNAPSHOT_VERSION,
+        'sources': {path: file_signature(path) for path in source_files},
+    }
+
+
+def _snapshot_paths(name, frame_key=None):
+    if frame_key is None:
+        return os.path.join(SNAPSHOT_DIR, f"{name}.json")
+    return os.path.join(SNAPSHOT_DIR, f"{name}.{frame_key}.parquet")
+
+
+def load_snapshot(name, source_files):
+    """
+    Carrega la instantània `name` si existeix i la seua signatura coincideix
+    amb la dels arxius d'origen actuals. Retorna un dict de DataFrames o None.
+    """
+    if not PARQUET_AVAILABLE:
+        return None
+
+    meta_path = _snapshot_paths(name)
+    if not os.path.exists(meta_path):
+        return None
+
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        if meta.get('signature') != sources_signature(source_files):
+            return None
+
+        return {
+            key: pd.read_parquet(_snapshot_paths(name, key))
+            for key in meta.get('frames', [])
+        }
+    except Exception as e:
+        print(f"⚠️ No s'ha pogut llegir la instantània '{name}': {e}")
+        return None
+
+
+def save_snapshot(name, source_files, data_frames):
+    """Guarda els DataFrames com a Parquet i, per últim, la signatura dels arxius d'origen."""
+    if not PARQUET_AVAILABLE:
+        return False
+
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+
+        for key, df in data_frames.items():
+            final_path = _snapshot_paths(name, key)
+            tmp_path = final_path + ".tmp"
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, final_path)
+
+        # La metadada s'escriu l'última: sense ella la instantània no és vàlida
+        meta = {'signature': sources_signature(source_files), 'frames': list(data_frames.keys())}
+        meta_path = _snapshot_paths(name)
+        with open(meta_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+        return True
+
+    except Exception as e:
+        print(f"⚠️ No s'ha pogut guardar la instantània '{name}': {e}")
+        return False
+
+
+def clear_snapshot(name):
+    """Esborra la instantània `name` (útil per forçar una càrrega en fred)."""
+    for file_name in os.listdir(SNAPSHOT_DIR) if os.path.isdir(SNAPSHOT_DIR) else []:
+        if file_name == f"{name}.json" or (file_name.startswith(f"{name}.") and file_name.endswith(".parquet")):
+            os.remove(os.path.join(SNAPSHOT_DIR, file_name))
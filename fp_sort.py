@@ -0,0 +1,133 @@
+import numpy as np
+
+from fp_filter import shared_for_frame
+from fp_nearest import get_nearest_index
+from fp_spatial import haversine_km
+
+# ----------------------------------------------------------------------
+# ORDRES DE LA LLISTA PRECALCULATS (PERMUTACIONS DE L'OFERTA)
+# ----------------------------------------------------------------------
+#
+# Cada consulta ordenava les files filtrades amb
+# sort_values(by=['LOCALIDAD', 'CENTRO']): una ordenació de text amb dues
+# claus de tot el resultat, encara que l'ordre de l'oferta no canvia
+# d'una consulta a l'altra. Ara, en carregar un conjunt de dades, cada
+# ordre de la llista es calcula una sola vegada com a permutació de les
+# files (per localitat i centre, per unitats, per nom del cicle) i, per a
+# cada fila, el seu rang dins de la permutació. Ordenar un resultat és
+# recórrer la permutació quedant-se amb les files marcades (temps lineal
+# en l'oferta, sense comparar cap text) o, si el resultat és petit,
+# ordenar-ne els rangs enters.
+#
+# L'ordre per distància depén del punt de referència i no es pot
+# precalcular: se n'ordenen només els centres distints del resultat
+# (pocs, i amb les coordenades ja a l'índex de fp_nearest) i les files
+# s'hi reparteixen per rang del centre amb una ordenació estable d'enters.
+# Dins de cada centre, i en els empats de les altres claus, mana l'ordre
+# per localitat i centre.
+
+SORT_LOCALITY = 'LOCALITAT'
+SORT_UNITS = 'UNITATS'
+SORT_CYCLE = 'CICLE'
+SORT_DISTANCE = 'DISTANCIA'
+
+# Columnes de cada ordre precalculat; UNITATS va de més a menys
+SORT_COLUMNS = {
+    SORT_LOCALITY: ['LOCALIDAD', 'CENTRO'],
+    SORT_UNITS: ['UNIDADES', 'LOCALIDAD', 'CENTRO'],
+    SORT_CYCLE: ['CICLO', 'LOCALIDAD', 'CENTRO'],
+}
+DESCENDING_COLUMNS = {'UNIDADES'}
+
+# Per sota d'1/SMALL_RESULT_RATIO de l'oferta surt més a compte ordenar els rangs que recórrer la permutació
+SMALL_RESULT_RATIO = 16
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+def _stable_argsort(keys, n_values):
+    """argsort estable de claus enteres 0..n_values-1 (numpy hi usa radix sort si caben en 16 bits)."""
+    if n_values <= np.iinfo(np.uint16).max:
+        keys = keys.astype(np.uint16)
+    return np.argsort(keys, kind='stable')
+
+
+class SortIndex:
+    """Permutacions de les files d'un DataFrame d'oferta per a cada ordre de SORT_COLUMNS (posicions de iloc)."""
+
+    def __init__(self, df):
+        self.df = df
+        self.n_rows = len(df)
+        self._permutations = {}
+        self._ranks = {}
+        frame = df.reset_index(drop=True)
+        for key, columns in SORT_COLUMNS.items():
+            if any(col not in frame.columns for col in columns):
+                continue
+            ascending = [col not in DESCENDING_COLUMNS for col in columns]
+            permutation = frame.sort_values(by=columns, ascending=ascending, kind='stable').index.to_numpy(dtype=np.int64)
+            rank = np.empty(self.n_rows, dtype=np.int64)
+            rank[permutation] = np.arange(self.n_rows)
+            self._permutations[key] = permutation
+            self._ranks[key] = rank
+        # Centres de cada fila i les seues coordenades (compartit amb el mode "a prop de")
+        self.centers = get_nearest_index(df)
+
+    @property
+    def orders(self):
+        """Ordres precalculats disponibles (a més de SORT_DISTANCE)."""
+        return list(self._permutations)
+
+    def order(self, rows, key=SORT_LOCALITY):
+        """
+        Ordre de `rows` (files de l'oferta, sense repetir) segons `key`: posicions dins de `rows`,
+        com QueryResult.order. Sense comparar cap valor: només la permutació o els rangs.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return _EMPTY_ROWS
+        rank = self._ranks[key]
+        if len(rows) * SMALL_RESULT_RATIO < self.n_rows:
+            return _stable_argsort(rank[rows], self.n_rows)
+        # Resultat gran: la permutació, quedant-se amb les files marcades, ja dona les files en ordre
+        permutation = self._permutations[key]
+        selected = np.zeros(self.n_rows, dtype=bool)
+        selected[rows] = True
+        position = np.empty(self.n_rows, dtype=np.int64)
+        position[rows] = np.arange(len(rows))
+        return position[permutation[selected[permutation]]]
+
+    def distance_order(self, rows, lat, lon):
+        """
+        Ordre de `rows` per distància del seu centre al punt (els centres sense coordenades, al final)
+        i, dins de cada centre, per localitat i centre. Retorna (ordre com `order`, distància en km
+        del centre de cada fila de `rows`, NaN si no en té).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return _EMPTY_ROWS, np.empty(0)
+        centers = self.centers
+        row_codes = centers.codes[rows]
+        present = np.zeros(centers.n_centers, dtype=bool)
+        present[row_codes] = True
+        codes = np.flatnonzero(present)
+
+        distance = np.full(len(codes), np.nan)
+        valid = centers.valid[codes]
+        distance[valid] = haversine_km(centers.lat[codes[valid]], centers.lon[codes[valid]], lat, lon)
+        # Rang de cada centre del resultat: distància (els que no en tenen, al final) i, en un empat, el codi
+        missing = np.isnan(distance)
+        center_rank = np.empty(centers.n_centers, dtype=np.int64)
+        center_rank[codes[np.lexsort((codes, np.where(missing, 0.0, distance), missing))]] = np.arange(len(codes))
+
+        # Files en ordre de localitat i centre, i després estable pel rang del centre
+        by_locality = self.order(rows, SORT_LOCALITY)
+        order = by_locality[_stable_argsort(center_rank[row_codes[by_locality]], len(codes))]
+        row_distance = np.full(centers.n_centers, np.nan)
+        row_distance[codes] = distance
+        return order, row_distance[row_codes]
+
+
+def get_sort_index(df):
+    """Ordres precalculats de `df`, construïts la primera vegada i compartits mentre algú els use."""
+    return shared_for_frame(df, SortIndex)
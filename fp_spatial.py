@@ -0,0 +1,180 @@
+import numpy as np
+
+from fp_coords import latlon_to_utm
+from fp_filter import shared_for_frame
+
+# ----------------------------------------------------------------------
+# ÍNDEX ESPACIAL (GRAELLA UNIFORME EN UTM) PER A CENTRES I OFERTES
+# ----------------------------------------------------------------------
+#
+# Les coordenades només s'usaven per calcular el requadre del mapa. Ara
+# els punts es projecten una sola vegada a ETRS89 / UTM 30N (metres) i es
+# reparteixen en una graella de cel·les quadrades: les posicions queden
+# ordenades per cel·la, de manera que una columna de cel·les és un sol
+# tros contigu de l'array. Una consulta per radi només mira les cel·les
+# que el toquen i comprova la distància exacta (haversine, sobre la
+# latitud i longitud) dels punts d'aquelles cel·les. El requadre ja ve
+# en latitud/longitud i no es projecta: els punts també s'ordenen per
+# latitud i per longitud, i els candidats són la franja més estreta de
+# les dues (un tros contigu, trobat amb searchsorted). Amb pocs punts o
+# una franja ampla es compara directament cada punt, que en NumPy és
+# més barat. El resultat són posicions ordenades, com les de
+# FilterIndex.rows, i per tant es pot combinar amb els filtres dels
+# desplegables passant-les com a `rows`.
+#
+# Els punts sense coordenades (NaN) o a (0, 0) no entren a l'índex.
+
+DEFAULT_CELL_KM = 2.0
+EARTH_RADIUS_KM = 6371.0088
+# L'escala d'UTM 30N a la Comunitat Valenciana no arriba al 0,1 %: el requadre del radi s'eixampla un 1 %
+UTM_SCALE_MARGIN = 1.01
+# within_bbox compara directament cada punt si n'hi ha menys de tants, o si la franja més estreta del
+# requadre en té més d'un per cada tants punts (mesurat amb bench/bench_spatial.py)
+BBOX_MIN_POINTS = 5000
+BBOX_STRIP_COST = 10
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+def haversine_km(lat, lon, lat0, lon0):
+    """Distància de cercle màxim (km) de cada punt (arrays) al punt (lat0, lon0)."""
+    phi, phi0 = np.radians(lat), np.radians(lat0)
+    a = (np.sin((phi - phi0) / 2) ** 2 +
+         np.cos(phi) * np.cos(phi0) * np.sin(np.radians(np.asarray(lon) - lon0) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    """Graella uniforme sobre punts (latitud, longitud) en WGS84, amb posicions 0..n-1."""
+
+    def __init__(self, lat, lon, cell_km=DEFAULT_CELL_KM):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        self.n_points = len(lat)
+        self.cell = cell_km * 1000.0
+
+        valid = np.isfinite(lat) & np.isfinite(lon) & ~((lat == 0.0) & (lon == 0.0))
+        positions = np.flatnonzero(valid)
+        if len(positions):
+            x, y = latlon_to_utm(lat[positions], lon[positions])
+            x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        else:
+            x = y = np.empty(0)
+        self.x_min = x.min() if len(x) else 0.0
+        self.y_min = y.min() if len(y) else 0.0
+        self.nx = int((x.max() - self.x_min) // self.cell) + 1 if len(x) else 1
+        self.ny = int((y.max() - self.y_min) // self.cell) + 1 if len(y) else 1
+
+        # Punts ordenats per cel·la (columna a columna) i inici de cada cel·la en l'ordre
+        cells = self._cell_x(x) * self.ny + self._cell_y(y)
+        order = np.argsort(cells, kind='stable')
+        self.positions = positions[order]
+        self.x = x[order]
+        self.y = y[order]
+        self.lat = lat[positions][order]
+        self.lon = lon[positions][order]
+        self.starts = np.searchsorted(cells[order], np.arange(self.nx * self.ny + 1))
+
+        # Per a within_bbox: latitud/longitud de tots els punts, amb NaN als que no entren a l'índex
+        # (comparació directa), i els punts ordenats per latitud i per longitud (la franja d'una
+        # coordenada del requadre és un sol tros contigu)
+        self.point_lat = np.where(valid, lat, np.nan)
+        self.point_lon = np.where(valid, lon, np.nan)
+        by_lat = positions[np.argsort(lat[positions], kind='stable')]
+        by_lon = positions[np.argsort(lon[positions], kind='stable')]
+        self.lat_positions = by_lat
+        self.lat_sorted = lat[by_lat]
+        self.lat_other = lon[by_lat]
+        self.lon_positions = by_lon
+        self.lon_sorted = lon[by_lon]
+        self.lon_other = lat[by_lon]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _cell_x(self, x):
+        return np.floor_divide(np.asarray(x) - self.x_min, self.cell).astype(np.int64)
+
+    def _cell_y(self, y):
+        return np.floor_divide(np.asarray(y) - self.y_min, self.cell).astype(np.int64)
+
+    def _candidates(self, x0, y0, x1, y1):
+        """Índexs (en l'ordre per cel·la) dels punts de les cel·les que toquen el requadre en metres."""
+        ix0, ix1 = max(int(self._cell_x(x0)), 0), min(int(self._cell_x(x1)), self.nx - 1)
+        iy0, iy1 = max(int(self._cell_y(y0)), 0), min(int(self._cell_y(y1)), self.ny - 1)
+        if ix0 > ix1 or iy0 > iy1:
+            return _EMPTY_ROWS
+        # Dins de cada columna de cel·les, les de iy0 a iy1 són un sol tros contigu [begin, end)
+        columns = np.arange(ix0, ix1 + 1) * self.ny
+        begin = self.starts[columns + iy0]
+        end = self.starts[columns + iy1 + 1]
+        lengths = end - begin
+        total = int(lengths.sum())
+        if total == 0:
+            return _EMPTY_ROWS
+        # Concatenació dels trossos sense bucle: salts al començament de cada tros i suma acumulada
+        steps = np.ones(total, dtype=np.int64)
+        offsets = np.cumsum(lengths)[:-1]
+        nonempty = lengths > 0
+        firsts = np.concatenate(([0], offsets))[nonempty]
+        steps[firsts] = begin[nonempty] - np.concatenate(([0], end[nonempty][:-1] - 1))
+        return np.cumsum(steps)
+
+    @staticmethod
+    def _restrict(found, rows):
+        """Posicions trobades (ordenades) que també són a `rows` (les files dels filtres, ordenades)."""
+        found = np.sort(found)
+        if rows is None:
+            return found
+        return np.intersect1d(found, rows, assume_unique=True)
+
+    def within_radius(self, lat, lon, radius_km, rows=None):
+        """Posicions (ordenades) a menys de `radius_km` del punt; amb `rows`, només d'entre aquestes."""
+        if len(self.positions) == 0:
+            return _EMPTY_ROWS
+        cx, cy = latlon_to_utm(lat, lon)
+        reach = radius_km * 1000.0 * UTM_SCALE_MARGIN
+        candidates = self._candidates(cx - reach, cy - reach, cx + reach, cy + reach)
+        distance = haversine_km(self.lat[candidates], self.lon[candidates], lat, lon)
+        inside = candidates[distance <= radius_km]
+        return self._restrict(self.positions[inside], rows)
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon, rows=None):
+        """Posicions (ordenades) dins del requadre en latitud/longitud; amb `rows`, només d'entre aquestes."""
+        if len(self.positions) == 0:
+            return _EMPTY_ROWS
+        if len(self.positions) < BBOX_MIN_POINTS:
+            return self._in_box_rows(min_lat, min_lon, max_lat, max_lon, rows)
+        # Franja de latitud i de longitud del requadre (límits inclosos); els candidats són la més estreta
+        lat_begin = self.lat_sorted.searchsorted(min_lat)
+        lat_end = self.lat_sorted.searchsorted(max_lat, 'right')
+        lon_begin = self.lon_sorted.searchsorted(min_lon)
+        lon_end = self.lon_sorted.searchsorted(max_lon, 'right')
+        if min(lat_end - lat_begin, lon_end - lon_begin) * BBOX_STRIP_COST >= len(self.positions):
+            return self._in_box_rows(min_lat, min_lon, max_lat, max_lon, rows)
+        if lat_end - lat_begin <= lon_end - lon_begin:
+            other = self.lat_other[lat_begin:lat_end]
+            found = self.lat_positions[lat_begin:lat_end][(other >= min_lon) & (other <= max_lon)]
+        else:
+            other = self.lon_other[lon_begin:lon_end]
+            found = self.lon_positions[lon_begin:lon_end][(other >= min_lat) & (other <= max_lat)]
+        return self._restrict(found, rows)
+
+    def _in_box_rows(self, min_lat, min_lon, max_lat, max_lon, rows):
+        """within_bbox comparant directament cada punt (ja surten ordenats)."""
+        lat, lon = self.point_lat, self.point_lon
+        found = np.flatnonzero((lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon))
+        return found if rows is None else np.intersect1d(found, rows, assume_unique=True)
+
+
+class OfferSpatialIndex(SpatialIndex):
+    """SpatialIndex d'un DataFrame d'oferta (columnes latitud/longitud); les posicions són les de iloc."""
+
+    def __init__(self, df, cell_km=DEFAULT_CELL_KM):
+        self.df = df
+        super().__init__(df['latitud'].to_numpy(dtype=float), df['longitud'].to_numpy(dtype=float), cell_km)
+
+
+def get_spatial_index(df):
+    """Índex espacial de les ofertes de `df`, construït la primera vegada i compartit mentre algú l'use."""
+    return shared_for_frame(df, OfferSpatialIndex)
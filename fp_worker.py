@@ -0,0 +1,192 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------------------------------------------------
+# CONSULTES FORA DEL FIL DELS ESDEVENIMENTS
+# ----------------------------------------------------------------------
+#
+# update_results filtrava, ordenava i reconstruïa la llista i el mapa dins
+# del gestor de l'esdeveniment: mentre durava una consulta pesada la
+# pestanya no responia, i cada clic ràpid deixava a la cua un recàlcul
+# sencer que ja no interessava a ningú. Ara cada pestanya té un
+# QueryRunner: cada petició rep un número de generació, els canvis dels
+# desplegables i de la cerca s'agrupen (debounce) abans d'enviar-se, el
+# càlcul es fa en un pool de fils compartit per totes les sessions i
+# només s'aplica a la pàgina el resultat de la generació més nova.
+#
+# Una petició que encara no ha començat quan n'arriba una de nova ja no
+# es calcula. Una que ja calculava acaba (el resultat queda a la memòria
+# cau de resultats per a qui el torne a demanar) però es descarta.
+#
+# Les targetes d'un resultat arriben a trossos (un page.update per tros)
+# i la mida del tros s'ajusta amb ChunkSizer al temps que ha tardat a
+# pintar-se l'anterior. Aquest enviament té el seu propi pool: cada tros
+# espera el page.update de la sessió sota el bloqueig de la pestanya, i
+# al pool de consultes ocuparia els fils que necessiten els càlculs.
+
+QUERY_WORKERS = 4
+# Fils que envien trossos de targetes a les pàgines (totes les sessions)
+STREAM_WORKERS = 4
+# Segons sense canvis als desplegables o a la cerca abans d'enviar la consulta
+DEBOUNCE_S = 0.3
+
+_executor_lock = threading.Lock()
+_executors = {}
+
+
+def _shared_executor(name, workers):
+    with _executor_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"fp-{name}")
+        return _executors[name]
+
+
+def get_query_executor():
+    """Pool de fils de les consultes, compartit per totes les sessions del procés."""
+    return _shared_executor("query", QUERY_WORKERS)
+
+
+def get_stream_executor():
+    """Pool de fils que afegeixen les targetes a les llistes, separat del de les consultes."""
+    return _shared_executor("stream", STREAM_WORKERS)
+
+
+class QueryRunner:
+    """
+    Consultes d'una pestanya, de la més nova a la més vella. `compute()` s'executa al pool
+    compartit; `apply(result)` s'executa en acabar, sota `lock` i només si cap petició
+    posterior no l'ha substituïda. Qui toque l'estat que escriu `apply` des d'un altre fil
+    (p. ex. la paginació de la llista) ha de prendre també `lock`.
+
+    Les generacions tenen un bloqueig propi i curt: enviar una petició no espera que acabe
+    d'aplicar-se l'anterior.
+    """
+
+    def __init__(self, executor=None):
+        self._executor = executor
+        self._lock = threading.Lock()
+        self.lock = threading.RLock()
+        self.generation = 0
+        self._timer = None
+        self._future = None
+        self.submitted = 0
+        self.applied = 0
+        self.dropped = 0
+
+    @property
+    def pending(self):
+        """Si hi ha una petició esperant el debounce o calculant-se."""
+        with self._lock:
+            return self._timer is not None or (self._future is not None and not self._future.done())
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def _next_generation(self):
+        self.generation += 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return self.generation
+
+    def submit(self, compute, apply, delay=0.0):
+        """Envia una petició nova (substitueix les anteriors) i en torna la generació."""
+        with self._lock:
+            generation = self._next_generation()
+            self.submitted += 1
+            if delay > 0:
+                self._timer = threading.Timer(delay, self._start, args=(generation, compute, apply))
+                self._timer.daemon = True
+                self._timer.start()
+            else:
+                self._submit(generation, compute, apply)
+        return generation
+
+    def apply_now(self, apply, result):
+        """Aplica un resultat ja disponible (p. ex. de la memòria cau) i descarta les peticions anteriors."""
+        with self._lock:
+            self._next_generation()
+            self.submitted += 1
+        with self.lock:
+            self._apply(apply, result)
+
+    def cancel(self):
+        """Descarta les peticions pendents (p. ex. abans de canviar les dades de la pestanya)."""
+        with self._lock:
+            self._next_generation()
+
+    def wait(self, timeout=None):
+        """Espera que acabe la petició pendent, si n'hi ha (scripts de prova i benchmarks)."""
+        while True:
+            with self._lock:
+                timer, future = self._timer, self._future
+            if timer is not None:
+                timer.join(timeout)
+                if timer.is_alive():
+                    return False
+                with self._lock:
+                    if self._timer is timer:
+                        self._timer = None
+            elif future is not None and not future.done():
+                future.exception(timeout)
+            else:
+                return True
+
+    def _start(self, generation, compute, apply):
+        """Final del debounce (fil del Timer)."""
+        with self._lock:
+            if self._timer is threading.current_thread():
+                self._timer = None
+            if self.is_current(generation):
+                self._submit(generation, compute, apply)
+
+    def _submit(self, generation, compute, apply):
+        executor = self._executor or get_query_executor()
+        self._future = executor.submit(self._run, generation, compute, apply)
+
+    def _is_stale(self, generation):
+        with self._lock:
+            if self.is_current(generation):
+                return False
+            self.dropped += 1
+            return True
+
+    def _run(self, generation, compute, apply):
+        if self._is_stale(generation):
+            return
+        try:
+            result = compute()
+        except Exception as e:
+            print(f"❌ Error en la consulta: {e}")
+            return
+        with self.lock:
+            if not self._is_stale(generation):
+                self._apply(apply, result)
+
+    def _apply(self, apply, result):
+        try:
+            apply(result)
+            self.applied += 1
+        except Exception as e:
+            print(f"⚠️ No s'ha pogut mostrar el resultat de la consulta: {e}")
+
+
+class ChunkSizer:
+    """
+    Mida del tros següent perquè cada tros es pinte en uns `target_ms`: després de cada tros,
+    `record(n, segons)` estima el ritme (elements/ms) i hi acosta la mida, sense sortir de [minimum, maximum].
+    """
+
+    def __init__(self, initial, minimum, maximum, target_ms):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_ms = target_ms
+        self.size = max(minimum, min(maximum, initial))
+
+    def record(self, count, seconds):
+        if count <= 0 or seconds <= 0:
+            return self.size
+        ideal = count * self.target_ms / (seconds * 1000)
+        # Mitjana amb la mida actual, perquè un tros lent (GC, xarxa) no la faça caure de colp
+        self.size = max(self.minimum, min(self.maximum, int(round((self.size + ideal) / 2))))
+        return self.size
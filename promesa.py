@@ -11,6 +11,9 @@ from PIL import Image
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 
+from fp_coords import wkt_to_latlon
+from fp_encoding import read_csv_sniffed
+
 # Suprimir advertencias de contextily
 warnings.filterwarnings('ignore')
 
@@ -28,7 +31,7 @@ try:
     if not os.path.exists(csv_file_name):
         raise FileNotFoundError(f"El archivo {csv_file_name} no se encontró en el directorio actual.")
     
-    centros_df = pd.read_csv(csv_file_name)
+    centros_df = read_csv_sniffed(csv_file_name)
     
     # Limpieza básica de datos
     centros_df.dropna(subset=['provincia', 'comarca', 'latitud', 'longitud', 'dlibre', 'direccion', 'regimen'], inplace=True)
@@ -39,6 +42,11 @@ try:
     # Asegurarse de que las coordenadas son numéricas
     centros_df['latitud'] = pd.to_numeric(centros_df['latitud'], errors='coerce')
     centros_df['longitud'] = pd.to_numeric(centros_df['longitud'], errors='coerce')
+    # La geometría WKT (EPSG:25830) es la fuente fiable: algunas latitudes del CSV han perdido el punto decimal
+    if 'WKT' in centros_df.columns:
+        wkt_lat, wkt_lon = wkt_to_latlon(centros_df['WKT'])
+        centros_df['latitud'] = np.where(np.isnan(wkt_lat), centros_df['latitud'], wkt_lat)
+        centros_df['longitud'] = np.where(np.isnan(wkt_lon), centros_df['longitud'], wkt_lon)
     centros_df = centros_df.dropna(subset=['latitud', 'longitud'])
     
     PROVINCES = sorted(centros_df['provincia_simple'].unique().tolist())
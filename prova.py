@@ -1,20 +1,7 @@
 import flet as ft
-import pyproj
 import webbrowser
 
-
-def utm_to_latlon(easting, northing):
-    """
-    Convierte coordenadas UTM EPSG:25830 (ETRS89 / UTM 30N)
-    a WGS84 (latitud / longitud).
-    """
-    transformer = pyproj.Transformer.from_crs(
-        "EPSG:25830",  # ETRS89 / UTM zona 30N
-        "EPSG:4326",   # WGS84 lat/lon
-        always_xy=True
-    )
-    lon, lat = transformer.transform(easting, northing)
-    return lat, lon
+from fp_coords import utm_to_latlon
 
 
 def main(page: ft.Page):